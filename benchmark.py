@@ -0,0 +1,462 @@
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from base64 import b64decode
+from types import SimpleNamespace
+
+from homeassistant.util.unit_system import UnitOfTemperature
+
+from custom_components.smartir.climate import SmartIRClimate
+from custom_components.smartir.controller import (
+    BROADLINK_IR_PACKET,
+    Helper,
+    get_controller,
+)
+from custom_components.smartir.controller_const import (
+    CONTROLLER_CONF,
+    CONTROLLER_SUPPORT,
+    ENC_BASE64,
+    ENC_PRONTO,
+)
+from custom_components.smartir.device_data import DeviceData
+from custom_components.smartir.smartir_helpers import (
+    closest_match_index,
+    closest_match_value,
+)
+
+USAGE = (
+    "usage: benchmark.py [--seed S] [--rounds N] [--climates N] "
+    "[--output FILE] [--compare FILE] [--threshold PCT]"
+)
+
+CODES_DIR = "codes"
+
+# sends of the sampled frames per round, so a round lasts tens of ms
+SEND_REPEATS = 20
+
+CHECK_DATA = {
+    "climate": {
+        "hvac_modes": ["auto", "heat", "cool", "heat_cool", "fan_only", "dry"],
+    },
+    "fan": {},
+    "media_player": {},
+    "light": {},
+}
+
+# controller data accepted by every controller
+CONTROLLER_DATA = {
+    CONTROLLER_CONF["REMOTE_ENTITY"]: "remote.benchmark",
+    CONTROLLER_CONF["MQTT_TOPIC"]: "benchmark/ir",
+    CONTROLLER_CONF["REMOTE_HOST"]: "192.0.2.1",
+    CONTROLLER_CONF["ESPHOME_SERVICE"]: "benchmark_send_raw",
+    CONTROLLER_CONF["ZHA_IEEE"]: "00:00:00:00:00:00:00:00",
+    CONTROLLER_CONF["ZHA_ENDPOINT_ID"]: 1,
+    CONTROLLER_CONF["ZHA_CLUSTER_ID"]: 57348,
+    CONTROLLER_CONF["ZHA_CLUSTER_TYPE"]: "in",
+    CONTROLLER_CONF["ZHA_COMMAND"]: 2,
+    CONTROLLER_CONF["ZHA_COMMAND_TYPE"]: "server",
+}
+
+
+class StandInServices:
+    """Service registry recording the calls instead of running them."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def async_call(self, domain, service, service_data, *args, **kwargs):
+        self.calls += 1
+
+
+class StandInHass:
+    """The parts of Home Assistant used by the entities and controllers."""
+
+    def __init__(self):
+        self.data = {}
+        self.services = StandInServices()
+        self.config = SimpleNamespace(
+            units=SimpleNamespace(temperature_unit=UnitOfTemperature.CELSIUS)
+        )
+        self.executor_jobs = 0
+
+    async def async_add_executor_job(self, target, *args):
+        # LOOKin sends through an HTTP request, don't run it
+        self.executor_jobs += 1
+
+
+def measure(function, ops, rounds):
+    """Run the function doing ops operations, return the per operation times.
+
+    Like timeit, the garbage collector is disabled while timing.
+    """
+    times = []
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function()
+            times.append((time.perf_counter() - start) / ops)
+        finally:
+            gc.enable()
+    return summary(times, ops)
+
+
+def summary(times, ops):
+    return {
+        "ops": ops,
+        "rounds": len(times),
+        "min_us": round(min(times) * 1e6, 3),
+        "median_us": round(statistics.median(times) * 1e6, 3),
+        "mean_us": round(statistics.mean(times) * 1e6, 3),
+    }
+
+
+def device_files():
+    for device_class in sorted(os.listdir(CODES_DIR)):
+        class_dir = os.path.join(CODES_DIR, device_class)
+        for file_name in sorted(os.listdir(class_dir)):
+            if file_name.endswith(".json"):
+                yield device_class, file_name, os.path.join(class_dir, file_name)
+
+
+def frames_of(commands):
+    frames = []
+    DeviceData.map_frames(commands, lambda frame: frames.append(frame) or frame)
+    return frames
+
+
+def bench_load_validate(results, rounds):
+    """Read, check and expand every file of the corpus in each round.
+
+    Return the expanded device data by device class and file name.
+    """
+    paths = list(device_files())
+    phases = {"read": [], "validate": [], "expand": []}
+    corpus = {}
+    loop = asyncio.new_event_loop()
+    for _ in range(rounds):
+        totals = dict.fromkeys(phases, 0.0)
+        for device_class, file_name, path in paths:
+            start = time.perf_counter()
+            device_data = DeviceData.read_file_as_json(path)
+            read = time.perf_counter()
+            valid = loop.run_until_complete(
+                DeviceData.check_file(
+                    file_name, device_data, device_class, CHECK_DATA[device_class]
+                )
+            )
+            checked = time.perf_counter()
+            if valid:
+                device_data = DeviceData.from_generator(DeviceData.from_v2(device_data))
+                corpus.setdefault(device_class, {})[file_name] = device_data
+            expanded = time.perf_counter()
+            totals["read"] += read - start
+            totals["validate"] += checked - read
+            totals["expand"] += expanded - checked
+        for phase, total in totals.items():
+            phases[phase].append(total / len(paths))
+    loop.close()
+
+    for phase, times in phases.items():
+        results[f"load.{phase}"] = summary(times, len(paths))
+    return corpus
+
+
+class RecordingController:
+    """Controller keeping the last command instead of sending it."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, command):
+        self.sent += 1
+
+    def airtime(self, command, cache=True):
+        return None
+
+
+def climate_requests(corpus, rng, climates):
+    """Return random state tuples for a sample of climate devices."""
+    hass = StandInHass()
+    files = sorted(corpus["climate"])
+    entities = []
+    for file_name in rng.sample(files, min(climates, len(files))):
+        device_data = corpus["climate"][file_name]
+        config = {
+            "name": file_name,
+            "device_code": int(file_name[:-5]),
+            "controller_data": {
+                **CONTROLLER_DATA,
+                "controller_type": device_data["supportedController"],
+            },
+            "delay": 0,
+            "airtime_delay": False,
+            "force_refresh_interval": 0,
+        }
+        entity = SmartIRClimate(hass, config, device_data)
+        entity._controller = RecordingController()
+        entity.async_write_ha_state = lambda: None
+        entity._hvac_mode = entity._hvac_modes[0]
+        entities.append(entity)
+
+    def state(entity):
+        return (
+            rng.choice(["on", "off"]),
+            rng.choice([mode for mode in entity._hvac_modes if mode != "off"]),
+            rng.choice(entity._preset_modes) if entity._preset_modes else None,
+            rng.choice(entity._fan_modes) if entity._fan_modes else None,
+            rng.choice(entity._swing_modes) if entity._swing_modes else None,
+            rng.uniform(entity._min_temperature, entity._max_temperature),
+        )
+
+    return [(entity, state(entity)) for entity in entities for _ in range(1000 // 10)]
+
+
+async def resolve(requests):
+    for entity, request in requests:
+        await entity._send_command(*request)
+
+
+def bench_climate_resolve(results, corpus, rng, rounds, climates):
+    """Resolve random state tuples on a sample of climate devices."""
+    requests = climate_requests(corpus, rng, climates)
+    loop = asyncio.new_event_loop()
+    results["climate.resolve"] = measure(
+        lambda: loop.run_until_complete(resolve(requests)), len(requests), rounds
+    )
+    results["climate.resolve"]["devices"] = len({entity for entity, _ in requests})
+    loop.close()
+
+
+def closest_match_inputs(rng):
+    values = sorted(rng.uniform(0, 100) for _ in range(100))
+    targets = [rng.uniform(-10, 110) for _ in range(10000)]
+    return values, targets
+
+
+def bench_closest_match(results, rng, rounds):
+    values, targets = closest_match_inputs(rng)
+    results["closest_match_value"] = measure(
+        lambda: [closest_match_value(target, values) for target in targets],
+        len(targets),
+        rounds,
+    )
+    results["closest_match_index"] = measure(
+        lambda: [closest_match_index(target, values) for target in targets],
+        len(targets),
+        rounds,
+    )
+
+
+def codec_inputs(corpus, rng):
+    """Return samples of the corpus frames to convert.
+
+    That is Pronto frames, Broadlink IR packets and their pulses.
+    """
+    pronto = []
+    broadlink = []
+    for device_class, files in corpus.items():
+        for device_data in files.values():
+            frames = [
+                frame
+                for frame in frames_of(device_data["commands"])
+                if isinstance(frame, str)
+            ]
+            if device_data["commandsEncoding"] == ENC_PRONTO:
+                pronto.extend(frames)
+            elif device_data["commandsEncoding"] == ENC_BASE64:
+                broadlink.extend(frames)
+    pronto = rng.sample(pronto, min(2000, len(pronto)))
+    packets = []
+    for frame in rng.sample(broadlink, min(2000, len(broadlink))):
+        try:
+            packet = b64decode(frame)
+        except ValueError:
+            # a few corpus frames are not valid Base64
+            continue
+        # RF packets can't be converted to pulses
+        if len(packet) >= 4 and packet[0] == BROADLINK_IR_PACKET:
+            packets.append(packet)
+    pronto_bytes = [bytearray.fromhex(frame.replace(" ", "")) for frame in pronto]
+    pulses = [Helper.broadlink2lirc(packet) for packet in packets]
+    return pronto_bytes, packets, pulses
+
+
+def bench_codecs(results, corpus, rng, rounds):
+    pronto_bytes, broadlink, pulses = codec_inputs(corpus, rng)
+    if pronto_bytes:
+        results["helper.pronto2lirc"] = measure(
+            lambda: [Helper.pronto2lirc(frame) for frame in pronto_bytes],
+            len(pronto_bytes),
+            rounds,
+        )
+    results["helper.broadlink2lirc"] = measure(
+        lambda: [Helper.broadlink2lirc(packet) for packet in broadlink],
+        len(broadlink),
+        rounds,
+    )
+    results["helper.lirc2broadlink"] = measure(
+        lambda: [Helper.lirc2broadlink(frame) for frame in pulses],
+        len(pulses),
+        rounds,
+    )
+    results["helper.normalize_broadlink"] = measure(
+        lambda: [Helper.normalize_broadlink(packet) for packet in broadlink],
+        len(broadlink),
+        rounds,
+    )
+
+
+def controller_cases(corpus):
+    """Return (name, controller, commands) of every controller.
+
+    The controllers send corpus frames to stand-in services.
+    """
+    frames = {}
+    for files in corpus.values():
+        for device_data in files.values():
+            key = (device_data["supportedController"], device_data["commandsEncoding"])
+            if len(frames.setdefault(key, [])) < 500:
+                frames[key].extend(
+                    frame
+                    for frame in frames_of(device_data["commands"])
+                    if isinstance(frame, str)
+                )
+
+    hass = StandInHass()
+    cases = []
+    for (controller_type, encoding), commands in sorted(frames.items()):
+        if encoding not in CONTROLLER_SUPPORT.get(controller_type, []):
+            continue
+        controller = get_controller(
+            hass,
+            controller_type,
+            encoding,
+            {**CONTROLLER_DATA, "controller_type": controller_type},
+        )
+        cases.append(
+            (
+                f"controller.send.{controller_type}.{encoding}",
+                controller,
+                commands[:500],
+            )
+        )
+    return cases
+
+
+async def send(controller, commands):
+    for _ in range(SEND_REPEATS):
+        for command in commands:
+            await controller.send(command)
+
+
+def bench_controller_send(results, corpus, rounds):
+    """Send corpus frames through every controller to stand-in services."""
+    loop = asyncio.new_event_loop()
+    for name, controller, commands in controller_cases(corpus):
+        results[name] = measure(
+            lambda: loop.run_until_complete(send(controller, commands)),
+            len(commands) * SEND_REPEATS,
+            rounds,
+        )
+    loop.close()
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every case against the baseline results.
+
+    The fastest round is compared, it is the least disturbed by other
+    processes. Return the cases slower than the threshold percentage.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            print("%-48s %12.3f us (new)" % (name, result["min_us"]))
+            continue
+        change = (result["min_us"] / previous["min_us"] - 1) * 100
+        flag = ""
+        if change > threshold:
+            flag = " REGRESSION"
+            regressions.append(name)
+        print("%-48s %12.3f us %+7.1f %%%s" % (name, result["min_us"], change, flag))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = sys.argv[1:]
+    seed = 0
+    rounds = 5
+    climates = 50
+    output = None
+    baseline = None
+    threshold = 10.0
+    while args:
+        option = args.pop(0)
+        if option == "--seed":
+            seed = int(args.pop(0))
+        elif option == "--rounds":
+            rounds = int(args.pop(0))
+        elif option == "--climates":
+            climates = int(args.pop(0))
+        elif option == "--output":
+            output = args.pop(0)
+        elif option == "--compare":
+            baseline = args.pop(0)
+        elif option == "--threshold":
+            threshold = float(args.pop(0))
+        else:
+            print(USAGE)
+            sys.exit(1)
+
+    rng = random.Random(seed)
+    results = {}
+    corpus = bench_load_validate(results, rounds)
+    bench_climate_resolve(results, corpus, rng, rounds, climates)
+    bench_closest_match(results, rng, rounds)
+    bench_codecs(results, corpus, rng, rounds)
+    bench_controller_send(results, corpus, rounds)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if baseline:
+        with open(baseline) as file:
+            previous = json.load(file)
+        print("compared to %s (%s)" % (baseline, previous.get("commit")))
+        if compare(results, previous["results"], threshold):
+            sys.exit(1)
+    else:
+        for name, result in sorted(results.items()):
+            print("%-48s %12.3f us" % (name, result["min_us"]))
+
+
+if __name__ == "__main__":
+    main()
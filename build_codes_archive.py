@@ -0,0 +1,93 @@
+import importlib.util
+import os
+import sys
+import time
+
+# load the archive module directly, so Home Assistant is not required
+spec = importlib.util.spec_from_file_location(
+    "codes_archive", "custom_components/smartir/codes_archive.py"
+)
+codes_archive = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(codes_archive)
+
+USAGE = "usage: build_codes_archive.py [--bench] CODES_DIR ARCHIVE"
+
+# sequential read throughput of a typical SD card used for the estimate
+SLOW_STORAGE_BYTES_PER_SEC = 20e6
+
+
+def evict(path):
+    """Drop file from the page cache to simulate cold read."""
+    with open(path, "rb") as file:
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def bench(codes_dir, archive_path):
+    files = []
+    for device_class in sorted(os.listdir(codes_dir)):
+        class_dir = os.path.join(codes_dir, device_class)
+        for file_name in sorted(os.listdir(class_dir)):
+            if file_name.endswith(".json"):
+                files.append((device_class, file_name[:-5]))
+
+    json_time = 0
+    json_bytes = 0
+    archive_time = 0
+    archive_bytes = 0
+    for device_class, device_code in files:
+        path = os.path.join(codes_dir, device_class, device_code + ".json")
+        evict(path)
+        start = time.perf_counter()
+        with open(path, "rb") as file:
+            json_bytes += len(file.read())
+        json_time += time.perf_counter() - start
+
+        evict(archive_path)
+        codes_archive._INDEX_CACHE.clear()
+        start = time.perf_counter()
+        codes_archive.read_archive_bytes(archive_path, device_class, device_code)
+        archive_time += time.perf_counter() - start
+
+    index = codes_archive._INDEX_CACHE[archive_path][1]
+    archive_bytes = sum(length for _, length in index.values())
+
+    print("files:           %d" % len(files))
+    print(
+        "json files:      %8.2f MB read, cold read %8.2f ms per file"
+        % (json_bytes / 1e6, json_time * 1e3 / len(files))
+    )
+    print(
+        "archive:         %8.2f MB read, cold read %8.2f ms per file"
+        % (archive_bytes / 1e6, archive_time * 1e3 / len(files))
+    )
+    print("archive size:    %8.2f MB" % (os.path.getsize(archive_path) / 1e6))
+    print(
+        "slow storage:    json %.2f ms, archive %.2f ms per file (estimated at %d MB/s)"
+        % (
+            json_bytes * 1e3 / SLOW_STORAGE_BYTES_PER_SEC / len(files),
+            archive_bytes * 1e3 / SLOW_STORAGE_BYTES_PER_SEC / len(files)
+            + archive_time * 1e3 / len(files),
+            SLOW_STORAGE_BYTES_PER_SEC / 1e6,
+        )
+    )
+
+
+def main():
+    args = sys.argv[1:]
+    run_bench = False
+    if args and args[0] == "--bench":
+        args.pop(0)
+        run_bench = True
+    if len(args) != 2:
+        print(USAGE)
+        sys.exit(1)
+
+    codes_dir, archive_path = args
+    index = codes_archive.build_archive(codes_dir, archive_path)
+    print("Packed %d device files into '%s'." % (len(index), archive_path))
+
+    if run_bench:
+        bench(codes_dir, archive_path)
+
+
+main()
@@ -0,0 +1,42 @@
+import logging
+
+import pytest
+
+# test_device_data.py is the device file checker script run by the CI
+collect_ignore = ["test_device_data.py"]
+
+
+@pytest.fixture(autouse=True)
+def fail_on_blocking():
+    """Fail the test if a SmartIR entry point blocked the event loop.
+
+    The blocking trace is enabled for the test, with the default threshold.
+    """
+    try:
+        from custom_components.smartir import blocking
+        from custom_components.smartir.tracing import TRACE_BLOCKING, TRACE_LOGGER
+    except ImportError:
+        # without Home Assistant there are no entry points to monitor
+        yield
+        return
+
+    logger = logging.getLogger(f"{TRACE_LOGGER}.{TRACE_BLOCKING}")
+    level = logger.level
+    logger.setLevel(logging.DEBUG)
+    blocking._REPORTS.clear()
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+    reports = blocking.blocking_reports()
+    blocking._REPORTS.clear()
+    if reports:
+        pytest.fail(
+            "SmartIR blocked the event loop:\n"
+            + "\n".join(
+                "%s for %.1f ms\n%s"
+                % (report["function"], report["duration_ms"], report["stack"] or "")
+                for report in reports
+            ),
+            pytrace=False,
+        )
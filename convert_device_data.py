@@ -0,0 +1,156 @@
+import json
+import sys
+import time
+import tracemalloc
+
+from custom_components.smartir.device_data import DeviceData
+from custom_components.smartir.protocol_generator import fit_generator
+
+USAGE = "usage: convert_device_data.py [--to-v2|--to-v1|--to-generator|--stats] FILE..."
+
+
+def dump(device_data):
+    return json.dumps(device_data, indent=2, ensure_ascii=False) + "\n"
+
+
+def convert(file_path, to_v2):
+    device_data = DeviceData.read_file_as_json(file_path)
+    if not isinstance(device_data, dict):
+        return False
+
+    if to_v2:
+        device_data = DeviceData.to_v2(device_data)
+    else:
+        device_data = DeviceData.from_generator(
+            DeviceData.from_v2(device_data), materialize=True
+        )
+
+    with open(file_path, "w") as outfile:
+        outfile.write(dump(device_data))
+    return True
+
+
+def generate(file_path):
+    device_data = DeviceData.read_file_as_json(file_path)
+    if not isinstance(device_data, dict):
+        return False
+    if "commandsGenerator" in device_data:
+        return True
+
+    device_data = DeviceData.from_v2(device_data)
+    levels = ["operation"]
+    for level in ["preset", "fan", "swing"]:
+        if isinstance(device_data.get(level + "Modes"), list):
+            levels.append(level)
+    levels.append("temperature")
+
+    spec = fit_generator(device_data, levels)
+    if spec is None:
+        print("%s: not generatable" % file_path)
+        return True
+
+    original = dump(device_data)
+    device_data["commands"] = {
+        key: value
+        for key, value in device_data["commands"].items()
+        if not isinstance(value, dict)
+    }
+    device_data["commandsGenerator"] = spec
+    generated = dump(device_data)
+    print(
+        "%s: generatable, %d -> %d bytes"
+        % (file_path, len(original.encode()), len(generated.encode()))
+    )
+    with open(file_path, "w") as outfile:
+        outfile.write(generated)
+    return True
+
+
+def parse_time(text, expand, rounds=5):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        device_data = json.loads(text)
+        if expand:
+            DeviceData.from_v2(device_data)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def memory(text, expand):
+    tracemalloc.start()
+    device_data = json.loads(text)
+    if expand:
+        device_data = DeviceData.from_v2(device_data)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def stats(file_path):
+    device_data = DeviceData.read_file_as_json(file_path)
+    if not isinstance(device_data, dict):
+        return None
+
+    v1_text = dump(DeviceData.from_v2(device_data))
+    v2_text = dump(DeviceData.to_v2(device_data))
+    return {
+        "v1_size": len(v1_text.encode()),
+        "v2_size": len(v2_text.encode()),
+        "v1_parse": parse_time(v1_text, False),
+        "v2_parse": parse_time(v2_text, True),
+        "v1_memory": memory(v1_text, False),
+        "v2_memory": memory(v2_text, True),
+    }
+
+
+def main():
+    exit = 0
+    files = sys.argv[1:]
+    if len(files) < 2 or files[0] not in [
+        "--to-v2",
+        "--to-v1",
+        "--to-generator",
+        "--stats",
+    ]:
+        print(USAGE)
+        sys.exit(1)
+    action = files.pop(0)
+
+    if action == "--stats":
+        totals = {}
+        for file_path in files:
+            result = stats(file_path)
+            if result is None:
+                exit = 1
+                continue
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+        if totals:
+            print("files: %d" % len(files))
+            for name, unit, scale in [
+                ("size", "MB", 1 / 1e6),
+                ("parse", "ms", 1e3),
+                ("memory", "MB", 1 / 1e6),
+            ]:
+                v1 = totals["v1_" + name]
+                v2 = totals["v2_" + name]
+                print(
+                    "%-7s v1 %10.2f %s   v2 %10.2f %s   ratio %.2f"
+                    % (name, v1 * scale, unit, v2 * scale, unit, v2 / v1)
+                )
+    elif action == "--to-generator":
+        for file_path in files:
+            if not generate(file_path):
+                exit = 1
+    else:
+        for file_path in files:
+            if not convert(file_path, action == "--to-v2"):
+                exit = 1
+
+    sys.exit(exit)
+
+
+main()
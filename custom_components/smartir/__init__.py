@@ -6,10 +6,15 @@ import logging
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 
+from .services import async_setup_services
+from .smartir_entity import entry_config
+
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "smartir"
 ALLOWED_PLATFORMS = {"climate"}  # <= doit correspondre au manifest
+# diagnostic sensors of entries with send metrics enabled
+METRICS_PLATFORM = "sensor"
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
@@ -17,6 +22,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
         "The SmartIR integration is now config-entry based. "
         "Please remove any 'platform: smartir' entries from configuration.yaml."
     )
+    async_setup_services(hass)
     return True
 
 
@@ -31,10 +37,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         return False
 
-    _LOGGER.warning(
+    _LOGGER.debug(
         "Setting up %s entry %s for platform %s", DOMAIN, entry.title, platform
     )
-    await hass.config_entries.async_forward_entry_setups(entry, [platform])
+    # unloaded as set up, the options may have changed since
+    entry.runtime_data = _entry_platforms(entry, platform)
+    await hass.config_entries.async_forward_entry_setups(entry, entry.runtime_data)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
     return True
 
 
@@ -42,7 +51,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     platform = entry.data.get("platform", "climate")
     if platform not in ALLOWED_PLATFORMS:
         return True
-    _LOGGER.warning(
+    _LOGGER.debug(
         "Unloading %s entry %s for platform %s", DOMAIN, entry.title, platform
     )
-    return await hass.config_entries.async_unload_platforms(entry, [platform])
+    return await hass.config_entries.async_unload_platforms(entry, entry.runtime_data)
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry to apply the changed options."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _entry_platforms(entry: ConfigEntry, platform: str) -> list[str]:
+    """Return the platforms set up for the entry."""
+    if entry_config(entry).get("send_metrics"):
+        return [platform, METRICS_PLATFORM]
+    return [platform]
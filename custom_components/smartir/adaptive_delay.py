@@ -0,0 +1,112 @@
+"""Command delay learned from power sensor feedback.
+
+Entities with a power sensor check that a power change sent to the
+device took effect. Confirmed sends shorten the wait between commands,
+a missed send backs it off and allows one more retransmission, so every
+device converges to the fastest rate it reliably receives commands at.
+The learned values are persisted across restarts.
+"""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .controller_const import DOMAIN
+
+STORAGE_KEY = f"{DOMAIN}.adaptive_delay"
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+
+DATA_ADAPTIVE_STORE = "adaptive_store"
+
+MIN_FACTOR = 0.25
+MAX_FACTOR = 4.0
+# factor multiplier after a confirmed and after a missed send
+CONFIRM_FACTOR = 0.98
+MISS_FACTOR = 2.0
+MAX_RETRIES = 3
+# confirmed sends in a row before a retransmission is given back
+RETRY_DECAY = 50
+
+
+class AdaptiveDelay:
+    """Learned delay factor and retransmission count of a device."""
+
+    __slots__ = ("factor", "retries", "confirmed_in_row", "confirmed", "missed")
+
+    def __init__(self, factor=1.0, retries=0):
+        self.factor = factor
+        self.retries = retries
+        self.confirmed_in_row = 0
+        self.confirmed = 0
+        self.missed = 0
+
+    def confirm(self):
+        """Learn from a send confirmed by the power sensor."""
+        self.confirmed += 1
+        self.confirmed_in_row += 1
+        self.factor = max(self.factor * CONFIRM_FACTOR, MIN_FACTOR)
+        if self.retries and self.confirmed_in_row >= RETRY_DECAY:
+            self.retries -= 1
+            self.confirmed_in_row = 0
+
+    def miss(self):
+        """Learn from a send the power sensor didn't confirm."""
+        self.missed += 1
+        self.confirmed_in_row = 0
+        self.factor = min(self.factor * MISS_FACTOR, MAX_FACTOR)
+        self.retries = min(self.retries + 1, MAX_RETRIES)
+
+    def as_dict(self):
+        return {
+            "factor": round(self.factor, 4),
+            "retries": self.retries,
+            "confirmed": self.confirmed,
+            "missed": self.missed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        adaptive = cls(data.get("factor", 1.0), data.get("retries", 0))
+        adaptive.confirmed = data.get("confirmed", 0)
+        adaptive.missed = data.get("missed", 0)
+        return adaptive
+
+
+class AdaptiveDelayStore:
+    """Persisted learned values of all entities."""
+
+    def __init__(self, hass: HomeAssistant):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._devices = None
+
+    async def async_get(self, key):
+        """Return the learned values of the entity with the key."""
+        async with self._lock:
+            if self._devices is None:
+                data = await self._store.async_load() or {}
+                self._devices = {
+                    device_key: AdaptiveDelay.from_dict(values)
+                    for device_key, values in data.items()
+                }
+        return self._devices.setdefault(key, AdaptiveDelay())
+
+    @callback
+    def async_schedule_save(self):
+        """Save the learned values after a while, batching updates."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self):
+        return {key: device.as_dict() for key, device in self._devices.items()}
+
+
+@callback
+def async_get_adaptive_store(hass: HomeAssistant) -> AdaptiveDelayStore:
+    """Return the store shared by all entities."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_ADAPTIVE_STORE not in data:
+        data[DATA_ADAPTIVE_STORE] = AdaptiveDelayStore(hass)
+    return data[DATA_ADAPTIVE_STORE]
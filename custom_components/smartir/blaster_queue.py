@@ -0,0 +1,147 @@
+"""Priority queue of the transmissions of one blaster.
+
+Every frame sent through a blaster takes the blaster for the frame
+airtime and the delay after it. Waiting frames are served by priority,
+so an urgent off on one entity overtakes a long step sequence or channel
+digit burst of another entity sharing the blaster.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .controller_const import DOMAIN
+
+DATA_BLASTER_QUEUES = "blaster_queues"
+
+PRIORITY_OFF = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_AUTOMATION = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_OFF: "off",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_AUTOMATION: "automation",
+}
+
+# waiting frames of a blaster before the oldest lowest priority is dropped
+DEFAULT_MAX_DEPTH = 16
+
+
+class BlasterQueueFull(HomeAssistantError):
+    """The frame was dropped to bound the queue depth."""
+
+
+class BlasterQueue:
+    """Transmission queue of one blaster."""
+
+    def __init__(self, blaster, max_depth=DEFAULT_MAX_DEPTH):
+        self.blaster = blaster
+        self.max_depth = max_depth
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._busy = False
+        self._transmitted = 0
+        self._dropped = 0
+        self._max_depth_seen = 0
+        self._wait_time = {
+            priority: {"count": 0, "total": 0.0, "max": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    @property
+    def depth(self):
+        """Return the number of waiting frames."""
+        return sum(1 for entry in self._waiting if not entry[2].done())
+
+    async def async_transmit(self, priority, transmit):
+        """Wait for the blaster, then run the transmit coroutine function.
+
+        Raise BlasterQueueFull if the frame was dropped while waiting.
+        """
+        enqueued = time.monotonic()
+        if self._busy:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (priority, next(self._sequence), future))
+            depth = self.depth
+            if depth > self.max_depth:
+                self._drop()
+                depth -= 1
+            self._max_depth_seen = max(self._max_depth_seen, depth)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the blaster was handed over already
+                    self._release()
+                raise
+        self._busy = True
+
+        wait = time.monotonic() - enqueued
+        wait_time = self._wait_time[priority]
+        wait_time["count"] += 1
+        wait_time["total"] += wait
+        wait_time["max"] = max(wait_time["max"], wait)
+        try:
+            return await transmit()
+        finally:
+            self._transmitted += 1
+            self._release()
+
+    def _release(self):
+        """Hand the blaster over to the next waiting frame."""
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._busy = False
+
+    def _drop(self):
+        """Drop the oldest waiting frame of the lowest priority."""
+        waiting = [entry for entry in self._waiting if not entry[2].done()]
+        _, _, future = max(waiting, key=lambda entry: (entry[0], -entry[1]))
+        future.set_exception(
+            BlasterQueueFull(f"Transmission queue of {self.blaster[1]} is full")
+        )
+        self._dropped += 1
+
+    def stats(self):
+        """Return queue depth and wait time metrics."""
+        return {
+            "depth": self.depth,
+            "max_depth": self._max_depth_seen,
+            "transmitted": self._transmitted,
+            "dropped": self._dropped,
+            "wait_time": {
+                PRIORITY_NAMES[priority]: {
+                    "count": wait_time["count"],
+                    "mean": (
+                        round(wait_time["total"] / wait_time["count"], 3)
+                        if wait_time["count"]
+                        else 0.0
+                    ),
+                    "max": round(wait_time["max"], 3),
+                }
+                for priority, wait_time in self._wait_time.items()
+            },
+        }
+
+
+@callback
+def async_get_blaster_queue(hass: HomeAssistant, blaster) -> BlasterQueue:
+    """Return the queue of the blaster, shared by all its entities."""
+    queues = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_BLASTER_QUEUES, {})
+    if blaster not in queues:
+        queues[blaster] = BlasterQueue(blaster)
+    return queues[blaster]
+
+
+@callback
+def async_get_blaster_queues(hass: HomeAssistant) -> dict:
+    """Return the queues of all blasters."""
+    return hass.data.get(DOMAIN, {}).get(DATA_BLASTER_QUEUES, {})
@@ -0,0 +1,167 @@
+"""Detection of SmartIR code blocking the event loop.
+
+With the blocking trace enabled, e.g.:
+
+    logger:
+      logs:
+        custom_components.smartir.trace.blocking: debug
+
+every step of a SmartIR entry point, the code it runs between two awaits,
+is timed. A step holding the event loop longer than the threshold is
+logged with its duration and the stack it was blocked in, sampled by a
+watchdog thread. The latest reports are kept for the diagnostics.
+"""
+
+import asyncio
+from collections import deque
+import functools
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+from .tracing import BLOCKING
+
+_LOGGER = logging.getLogger(__name__)
+
+# seconds a step may hold the event loop
+BLOCKING_THRESHOLD = 0.05
+
+MAX_REPORTS = 20
+
+_REPORTS = deque(maxlen=MAX_REPORTS)
+
+# tasks running a monitored entry point, nested entry points aren't
+# monitored again
+_MONITORED_TASKS = weakref.WeakSet()
+
+
+class _Watchdog:
+    """Samples the stack of the event loop thread during long steps.
+
+    The thread runs while the blocking trace is enabled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        # [name, start, thread id, stack] of the running step
+        self._step = None
+
+    def start_step(self, name):
+        step = [name, time.perf_counter(), threading.get_ident(), None]
+        self._step = step
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="smartir_blocking", daemon=True
+                    )
+                    self._thread.start()
+        return step
+
+    def end_step(self):
+        self._step = None
+
+    def _run(self):
+        try:
+            while BLOCKING.enabled:
+                time.sleep(BLOCKING_THRESHOLD / 2)
+                step = self._step
+                if step is None or step[3] is not None:
+                    continue
+                if time.perf_counter() - step[1] <= BLOCKING_THRESHOLD:
+                    continue
+                frame = sys._current_frames().get(step[2])
+                if frame is not None and self._step is step:
+                    step[3] = "".join(traceback.format_stack(frame))
+        finally:
+            with self._lock:
+                self._thread = None
+
+
+_WATCHDOG = _Watchdog()
+
+
+def _check_step(step):
+    name, start, _, stack = step
+    duration = time.perf_counter() - start
+    if duration <= BLOCKING_THRESHOLD:
+        return
+    _REPORTS.append(
+        {
+            "function": name,
+            "duration_ms": round(duration * 1000, 1),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stack": stack,
+        }
+    )
+    _LOGGER.warning(
+        "SmartIR %s blocked the event loop for %.1f ms%s",
+        name,
+        duration * 1000,
+        f", in:\n{stack}" if stack else "",
+    )
+
+
+class _MonitoredCoroutine:
+    """Awaitable timing every step of the wrapped coroutine."""
+
+    __slots__ = ("_coro", "_name")
+
+    def __init__(self, coro, name):
+        self._coro = coro
+        self._name = name
+
+    def __await__(self):
+        coro = self._coro
+        value = None
+        error = None
+        while True:
+            step = _WATCHDOG.start_step(self._name)
+            try:
+                if error is None:
+                    future = coro.send(value)
+                else:
+                    future = coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                _WATCHDOG.end_step()
+                _check_step(step)
+            value = None
+            error = None
+            try:
+                value = yield future
+            except BaseException as e:
+                error = e
+
+
+def detect_blocking(func):
+    """Monitor the entry point for blocking while the trace is enabled.
+
+    Disabled, the wrapper costs a level check per call.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not BLOCKING.enabled:
+            return await func(*args, **kwargs)
+        task = asyncio.current_task()
+        if task is None or task in _MONITORED_TASKS:
+            return await func(*args, **kwargs)
+        _MONITORED_TASKS.add(task)
+        try:
+            return await _MonitoredCoroutine(func(*args, **kwargs), name)
+        finally:
+            _MONITORED_TASKS.discard(task)
+
+    return wrapper
+
+
+def blocking_reports():
+    """Return the latest steps which blocked the event loop."""
+    return list(_REPORTS)
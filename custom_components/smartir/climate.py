@@ -2,17 +2,19 @@
 
 from __future__ import annotations
 import logging
-import asyncio
+from collections.abc import Mapping
 from numbers import Number
 
 # Retire PLATFORM_SCHEMA/YAML si tu n'en as plus besoin
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
+    ATTR_HVAC_MODE,
     HVACMode,
     HVACAction,
     ClimateEntityFeature,
 )
 from homeassistant.const import (
+    ATTR_TEMPERATURE,
     CONF_NAME,
     CONF_UNIQUE_ID,
     STATE_ON,
@@ -25,14 +27,18 @@ from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.util.unit_system import UnitOfTemperature
-from homeassistant.util.temperature import TemperatureConverter
+from homeassistant.util.unit_conversion import TemperatureConverter
 
 # Constante locale depuis le config_flow
-from .config_flow import CONF_DEVICE_CODE
+from .config_flow import CONF_DEVICE_CODE, CONF_GROUP_MEMBERS
 
 # Base/helper réels
-from .smartir_entity import load_device_data_file, SmartIR
+from .climate_group import SmartIRClimateGroup
+from .blocking import detect_blocking
+from .device_data import DeviceData
+from .smartir_entity import entry_config, load_device_data_file, SmartIR
 from .smartir_helpers import closest_match_value
+from .tracing import RESOLVER
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,10 +55,15 @@ PRECISION_HALVES = 0.5
 # ✅ Signature correcte pour une plateforme
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> None:
     """Set up a climate device from a config entry."""
-    _LOGGER.warning("Setting up SmartIR Climate entity for %s", entry.title)
+    _LOGGER.debug("Setting up SmartIR Climate entity for %s", entry.title)
 
+    if CONF_GROUP_MEMBERS in entry.data:
+        async_add_entities([SmartIRClimateGroup(hass, entry.data)])
+        return
+
+    config = entry_config(entry)
     device_data = await load_device_data_file(
-        entry.data,
+        config,
         "climate",
         {},  # ou tes overrides si nécessaires
         hass,
@@ -61,7 +72,7 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> N
         _LOGGER.error("Could not load climate data for %s", entry.title)
         return
 
-    entity = SmartIRClimate(hass, entry.data, device_data)
+    entity = SmartIRClimate(hass, config, device_data)
     async_add_entities([entity], True)
 
 
@@ -69,6 +80,14 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
     """SmartIR Climate entity implementation."""
 
     _enable_turn_on_off_backwards_compatibility = False
+    _state_attrs = SmartIR._state_attrs + (
+        "_hvac_mode",
+        "_preset_mode",
+        "_fan_mode",
+        "_swing_mode",
+        "_target_temperature",
+        "_hvac_action",
+    )
 
     def __init__(self, hass: HomeAssistant, config: ConfigType, device_data):
         SmartIR.__init__(self, hass, config, device_data)
@@ -151,32 +170,117 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         self._target_temperature = self._min_temperature
 
         # hvac_modes
-        self._hvac_modes = device_data["operationModes"]
-        self._hvac_modes.append(HVACMode.OFF)
+        self._hvac_modes = list(device_data["operationModes"]) + [HVACMode.OFF]
 
         # preset_modes
-        self._preset_modes = device_data.get("presetModes")
+        self._preset_modes = _modes_list(device_data.get("presetModes"))
         if isinstance(self._preset_modes, list) and len(self._preset_modes):
             self._support_flags = self._support_flags | ClimateEntityFeature.PRESET_MODE
             self._preset_mode = self._preset_modes[0]
 
         # fan_modes
-        self._fan_modes = device_data.get("fanModes")
+        self._fan_modes = _modes_list(device_data.get("fanModes"))
         if isinstance(self._fan_modes, list) and len(self._fan_modes):
             self._support_flags = self._support_flags | ClimateEntityFeature.FAN_MODE
             self._fan_mode = self._fan_modes[0]
 
         # swing_modes
-        self._swing_modes = device_data.get("swingModes")
+        self._swing_modes = _modes_list(device_data.get("swingModes"))
         if isinstance(self._swing_modes, list) and len(self._swing_modes):
             self._support_flags = self._support_flags | ClimateEntityFeature.SWING_MODE
             self._swing_mode = self._swing_modes[0]
 
+        # HA <-> device temperature tables, one per distinct set of device
+        # temperature command keys
+        self._temp_grid = temperature_grid(
+            self._min_temperature, self._max_temperature, self._temp_step
+        )
+        self._temp_tables = {}
+        for keys in self._temperature_key_sets():
+            self._temperature_table(keys)
+
+    def _reachable_commands(self, config, device_data):
+        """Return commands for the declared operation, preset, fan and swing modes."""
+        modes = device_data["operationModes"]
+        levels = [
+            set(["on", "off"] + modes + ["off_" + mode for mode in modes]),
+        ]
+        for attr in ["presetModes", "fanModes", "swingModes"]:
+            if isinstance(device_data.get(attr), list):
+                levels.append(set(["-"] + device_data[attr]))
+        return DeviceData.prune_commands(device_data["commands"], levels)
+
+    def _temperature_key_sets(self):
+        """Return distinct device temperature command key sets."""
+        depth = len(
+            [
+                modes
+                for modes in [self._preset_modes, self._fan_modes, self._swing_modes]
+                if modes
+            ]
+        )
+        key_sets = set()
+
+        def walk(commands, level):
+            if not isinstance(commands, Mapping):
+                return
+            if level == depth:
+                if "-" not in commands:
+                    key_sets.add(tuple(commands.keys()))
+                return
+            for value in commands.values():
+                walk(value, level + 1)
+
+        for mode in self._hvac_modes:
+            if mode != HVACMode.OFF:
+                walk(self._commands.get(mode), 0)
+        return key_sets
+
+    def _temperature_table(self, keys):
+        """Return HA setpoint -> (device key, HA temperature) table for keys."""
+        keys = tuple(keys)
+        table = self._temp_tables.get(keys)
+        if table is None:
+            # device key -> HA temperature
+            device_to_ha = {
+                key: convert_temp(
+                    key,
+                    self._data_temperature_unit,
+                    self._ha_temperature_unit,
+                    self._temp_step,
+                )
+                for key in keys
+            }
+            table = {}
+            for setpoint in self._temp_grid:
+                key = closest_match_value(
+                    convert_temp(
+                        setpoint,
+                        self._ha_temperature_unit,
+                        self._data_temperature_unit,
+                        None,
+                    ),
+                    keys,
+                )
+                if key is not None:
+                    table[setpoint] = (key, device_to_ha[key])
+            self._temp_tables[keys] = table
+        return table
+
+    def cache_stats(self):
+        """Return the entity caches, with the temperature tables."""
+        stats = super().cache_stats()
+        stats["temperature_tables"] = {
+            "tables": len(self._temp_tables),
+            "setpoints": sum(len(table) for table in self._temp_tables.values()),
+        }
+        return stats
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
-        _LOGGER.warning(
-            f"async_added_to_hass {self} {self.name} {self.supported_features}"
+        _LOGGER.debug(
+            "async_added_to_hass %s %s %s", self, self.name, self.supported_features
         )
 
         last_state = await self.async_get_last_state()
@@ -204,12 +308,10 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
                 self._swing_mode = last_state.attributes.get("swing_mode")
 
             temperature = last_state.attributes.get("temperature")
-            if (
-                temperature is not None
-                and temperature >= self._min_temperature
-                and temperature <= self._max_temperature
-            ):
-                self._target_temperature = temperature
+            if isinstance(temperature, Number):
+                temperature = round_temp(temperature, self._temp_step)
+                if temperature in self._temp_grid:
+                    self._target_temperature = temperature
 
         if self._temperature_sensor:
             async_track_state_change_event(
@@ -362,7 +464,7 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         """Set operation mode."""
         if hvac_mode not in self._hvac_modes:
             _LOGGER.error("The hvac_mode '%s' is not supported.", hvac_mode)
-            return
+            return False
 
         if hvac_mode == HVACMode.OFF:
             state = STATE_OFF
@@ -370,7 +472,7 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         else:
             state = STATE_ON
 
-        await self._send_command(
+        return await self._async_send_state(
             state,
             hvac_mode,
             self._preset_mode,
@@ -385,11 +487,11 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         temperature = kwargs.get(ATTR_TEMPERATURE)
 
         if temperature is None or not isinstance(temperature, Number):
-            return
+            return False
 
         if temperature < self._min_temperature or temperature > self._max_temperature:
             _LOGGER.error("The temperature value is out of min/max range.")
-            return
+            return False
 
         if hvac_mode is None:
             hvac_mode = self._hvac_mode
@@ -399,7 +501,7 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
                 state = STATE_ON
         elif hvac_mode not in self._hvac_modes:
             _LOGGER.error("The hvac mode '%s' is not supported.", hvac_mode)
-            return
+            return False
         else:
             if hvac_mode == HVACMode.OFF:
                 state = STATE_OFF
@@ -407,7 +509,7 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
             else:
                 state = STATE_ON
 
-        await self._send_command(
+        return await self._async_send_state(
             state,
             hvac_mode,
             self._preset_mode,
@@ -421,9 +523,9 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         preset_mode = str(preset_mode)
         if preset_mode not in self._preset_modes:
             _LOGGER.error("The preset mode '%s' is not supported.", preset_mode)
-            return
+            return False
 
-        await self._send_command(
+        return await self._async_send_state(
             self._state,
             self._hvac_mode,
             preset_mode,
@@ -437,9 +539,9 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         fan_mode = str(fan_mode)
         if fan_mode not in self._fan_modes:
             _LOGGER.error("The fan mode '%s' is not supported.", fan_mode)
-            return
+            return False
 
-        await self._send_command(
+        return await self._async_send_state(
             self._state,
             self._hvac_mode,
             self._preset_mode,
@@ -453,9 +555,9 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         swing_mode = str(swing_mode)
         if swing_mode not in self._swing_modes:
             _LOGGER.error("The swing mode '%s' is not supported.", swing_mode)
-            return
+            return False
 
-        await self._send_command(
+        return await self._async_send_state(
             self._state,
             self._hvac_mode,
             self._preset_mode,
@@ -466,16 +568,41 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
 
     async def async_turn_off(self):
         """Turn off."""
-        await self.async_set_hvac_mode(HVACMode.OFF)
+        return await self.async_set_hvac_mode(HVACMode.OFF)
 
     async def async_turn_on(self):
         """Turn on."""
-        await self.async_set_hvac_mode(self._hvac_mode)
+        return await self.async_set_hvac_mode(self._hvac_mode)
+
+    async def async_off_frame(self):
+        """Return the 'off_<mode>' frame, or the 'off' frame."""
+        if self._state == STATE_OFF:
+            return None
+        for key in ["off_" + str(self._hvac_mode), "off"]:
+            if isinstance(self._commands.get(key), str):
+                return self._commands[key]
+        return None
+
+    async def async_off_sent(self):
+        self._state = STATE_OFF
+        await self._async_update_hvac_action()
+        await super().async_off_sent()
 
     async def _send_command(
         self, state, hvac_mode, preset_mode, fan_mode, swing_mode, temperature
     ):
         async with self._temp_lock:
+            request = (
+                state,
+                hvac_mode,
+                preset_mode,
+                fan_mode,
+                swing_mode,
+                temperature,
+            )
+            if self._is_redundant_send(request):
+                return True
+
             if self._power_sensor and self._state != state:
                 self._async_power_sensor_check_schedule(state)
 
@@ -485,9 +612,9 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
                     if off_mode in self._commands.keys() and isinstance(
                         self._commands[off_mode], str
                     ):
-                        _LOGGER.warning("Found '%s' operation mode command.", off_mode)
-                        await self._controller.send(self._commands[off_mode])
-                        await asyncio.sleep(self._delay)
+                        if RESOLVER.enabled:
+                            RESOLVER("Found '%s' operation mode command.", off_mode)
+                        await self._async_transmit(self._commands[off_mode], state)
                     elif "off" in self._commands.keys() and isinstance(
                         self._commands["off"], str
                     ):
@@ -498,21 +625,22 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
                             and self._state == STATE_OFF
                         ):
                             # prevent to resend 'off' command if same as 'on' and device is already off
-                            _LOGGER.warning(
-                                "As 'on' and 'off' commands are identical and device is already in requested '%s' state, skipping sending '%s' command",
-                                self._state,
-                                "off",
-                            )
+                            if RESOLVER.enabled:
+                                RESOLVER(
+                                    "As 'on' and 'off' commands are identical and device is already in requested '%s' state, skipping sending '%s' command",
+                                    self._state,
+                                    "off",
+                                )
                         else:
-                            _LOGGER.warning("Found 'off' operation mode command.")
-                            await self._controller.send(self._commands["off"])
-                            await asyncio.sleep(self._delay)
+                            if RESOLVER.enabled:
+                                RESOLVER("Found 'off' operation mode command.")
+                            await self._async_transmit(self._commands["off"], state)
                     else:
                         _LOGGER.error(
                             "Missing device IR code for 'off' or '%s' operation mode.",
                             off_mode,
                         )
-                        return
+                        return False
                 else:
                     if "on" in self._commands.keys() and isinstance(
                         self._commands["on"], str
@@ -524,184 +652,182 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
                             and self._state == STATE_ON
                         ):
                             # prevent to resend 'on' command if same as 'off' and device is already on
-                            _LOGGER.warning(
-                                "As 'on' and 'off' commands are identical and device is already in requested '%s' state, skipping sending '%s' command",
-                                self._state,
-                                "on",
-                            )
+                            if RESOLVER.enabled:
+                                RESOLVER(
+                                    "As 'on' and 'off' commands are identical and device is already in requested '%s' state, skipping sending '%s' command",
+                                    self._state,
+                                    "on",
+                                )
                         else:
                             # if on code is not present, the on bit can be still set later in the all operation/fan codes"""
-                            _LOGGER.warning("Found 'on' operation mode command.")
-                            await self._controller.send(self._commands["on"])
-                            await asyncio.sleep(self._delay)
+                            if RESOLVER.enabled:
+                                RESOLVER("Found 'on' operation mode command.")
+                            await self._async_transmit(self._commands["on"], state)
 
                     commands = self._commands
                     if hvac_mode in commands.keys():
                         commands = commands[hvac_mode]
-                        _LOGGER.warning(
-                            "Found '%s' operation mode command.",
-                            hvac_mode,
-                        )
+                        if RESOLVER.enabled:
+                            RESOLVER(
+                                "Found '%s' operation mode command.",
+                                hvac_mode,
+                            )
                     else:
                         _LOGGER.error(
                             "Missing device IR code for '%s' operation mode.", hvac_mode
                         )
-                        return
+                        return False
 
                     if self._preset_modes:
-                        if isinstance(commands, dict):
+                        if isinstance(commands, Mapping):
                             for key in ["-", preset_mode] + self._preset_modes:
                                 if key in commands.keys():
                                     preset_mode = key
                                     commands = commands[key]
-                                    _LOGGER.warning(
-                                        "Found '%s' preset mode command.",
-                                        preset_mode,
-                                    )
+                                    if RESOLVER.enabled:
+                                        RESOLVER(
+                                            "Found '%s' preset mode command.",
+                                            preset_mode,
+                                        )
                                     break
                             else:
                                 _LOGGER.error(
                                     "Missing device IR codes for selected '%s' preset mode.",
                                     preset_mode,
                                 )
-                                return
+                                return False
                         else:
                             _LOGGER.error(
                                 "No device IR codes for preset modes are defined.",
                             )
-                            return
+                            return False
 
                     if self._fan_modes:
-                        if isinstance(commands, dict):
+                        if isinstance(commands, Mapping):
                             for key in ["-", fan_mode] + self._fan_modes:
                                 if key in commands.keys():
                                     fan_mode = key
                                     commands = commands[key]
-                                    _LOGGER.warning(
-                                        "Found '%s' fan mode command.",
-                                        fan_mode,
-                                    )
+                                    if RESOLVER.enabled:
+                                        RESOLVER(
+                                            "Found '%s' fan mode command.",
+                                            fan_mode,
+                                        )
                                     break
                             else:
                                 _LOGGER.error(
                                     "Missing device IR codes for selected '%s' fan mode.",
                                     fan_mode,
                                 )
-                                return
+                                return False
                         else:
                             _LOGGER.error(
                                 "No device IR codes for fan modes are defined.",
                             )
-                            return
+                            return False
 
                     if self._swing_modes:
-                        if isinstance(commands, dict):
+                        if isinstance(commands, Mapping):
                             for key in ["-", swing_mode] + self._swing_modes:
                                 if key in commands.keys():
                                     swing_mode = key
                                     commands = commands[key]
-                                    _LOGGER.warning(
-                                        "Found '%s' swing mode command.",
-                                        swing_mode,
-                                    )
+                                    if RESOLVER.enabled:
+                                        RESOLVER(
+                                            "Found '%s' swing mode command.",
+                                            swing_mode,
+                                        )
                                     break
                             else:
                                 _LOGGER.error(
                                     "Missing device IR codes for selected '%s' swing mode.",
                                     swing_mode,
                                 )
-                                return
+                                return False
                         else:
                             _LOGGER.error(
                                 "No device IR codes for swing modes are defined.",
                             )
-                            return
-
-                    if isinstance(commands, dict):
-                        target_temperature = convert_temp(
-                            temperature,
-                            self._ha_temperature_unit,
-                            self._data_temperature_unit,
-                            None,
-                        )
-                        _LOGGER.warning(
-                            "Input HA temperature '%s%s' converted into device temperature '%s%s'.",
-                            temperature,
-                            self._ha_temperature_unit,
-                            target_temperature,
-                            self._data_temperature_unit,
-                        )
+                            return False
 
+                    if isinstance(commands, Mapping):
                         if "-" in commands.keys():
                             temperature = "-"
                             commands = commands["-"]
                         elif (
-                            temp := closest_match_value(
-                                target_temperature, commands.keys()
-                            )
-                        ) and temp is not None:
-                            # convert selected device temperature back to HA units
-                            temp_ha = convert_temp(
-                                temp,
-                                self._data_temperature_unit,
-                                self._ha_temperature_unit,
-                                self._temp_step,
-                            )
-                            _LOGGER.warning(
-                                "Input HA temperature '%s%s' closest found device temperature command '%s%s' converts back into HA '%s%s' temperature.",
-                                temperature,
-                                self._ha_temperature_unit,
-                                temp,
-                                self._data_temperature_unit,
-                                temp_ha,
-                                self._ha_temperature_unit,
+                            entry := self._temperature_table(commands.keys()).get(
+                                round_temp(temperature, self._temp_step)
                             )
+                        ) is not None:
+                            temp, temp_ha = entry
+                            if RESOLVER.enabled:
+                                RESOLVER(
+                                    "Input HA temperature '%s%s' maps to device temperature command '%s%s', HA '%s%s' temperature.",
+                                    temperature,
+                                    self._ha_temperature_unit,
+                                    temp,
+                                    self._data_temperature_unit,
+                                    temp_ha,
+                                    self._ha_temperature_unit,
+                                )
                             temperature = temp_ha
-                            commands = commands[str(temp)]
+                            commands = commands[temp]
                         else:
                             _LOGGER.error(
                                 "Missing device IR codes for selected '%s' temperature.",
-                                target_temperature,
+                                temperature,
+                            )
+                            return False
+                        if RESOLVER.enabled:
+                            RESOLVER(
+                                "Found '%s', temperature command.",
+                                temperature,
                             )
-                            return
-                        _LOGGER.warning(
-                            "Found '%s', temperature command.",
-                            temperature,
-                        )
                     else:
                         _LOGGER.error(
                             "No device IR codes for temperatures are defined.",
                         )
-                        return
+                        return False
 
                     if not isinstance(commands, str):
                         _LOGGER.error(
                             "No device IR code found.",
                         )
-                        return
-
-                    await self._controller.send(commands)
-                    await asyncio.sleep(self._delay)
-
-                self._on_by_remote = False
-                self._state = state
-                self._hvac_mode = hvac_mode
-                if preset_mode != "-":
-                    self._preset_mode = preset_mode
-                if fan_mode != "-":
-                    self._fan_mode = fan_mode
-                if swing_mode != "-":
-                    self._swing_mode = swing_mode
-                if temperature != "-":
-                    self._target_temperature = temperature
-                await self._async_update_hvac_action()
+                        return False
+
+                    await self._async_transmit(commands, state)
+
+                self._record_send(request)
+                await self._async_apply_state(
+                    state, hvac_mode, preset_mode, fan_mode, swing_mode, temperature
+                )
                 self.async_write_ha_state()
+                return True
 
             except Exception as e:
                 _LOGGER.exception(
                     "Exception raised in the in the _send_command '%s'", e
                 )
+                return False
 
+    async def _async_apply_state(
+        self, state, hvac_mode, preset_mode, fan_mode, swing_mode, temperature
+    ):
+        """Set the entity state attributes from the sent state."""
+        self._on_by_remote = False
+        self._state = state
+        self._hvac_mode = hvac_mode
+        if preset_mode != "-":
+            self._preset_mode = preset_mode
+        if fan_mode != "-":
+            self._fan_mode = fan_mode
+        if swing_mode != "-":
+            self._swing_mode = swing_mode
+        if temperature != "-":
+            self._target_temperature = temperature
+        await self._async_update_hvac_action()
+
+    @detect_blocking
     async def _async_temp_sensor_changed(
         self, event: Event[EventStateChangedData]
     ) -> None:
@@ -714,6 +840,7 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
         await self._async_update_hvac_action()
         self.async_write_ha_state()
 
+    @detect_blocking
     async def _async_humidity_sensor_changed(
         self, event: Event[EventStateChangedData]
     ) -> None:
@@ -785,15 +912,41 @@ class SmartIRClimate(SmartIR, ClimateEntity, RestoreEntity):
             _LOGGER.error("Unable to update from humidity sensor: %s", ex)
 
 
-def convert_temp(temperature: Number, from_unit: str, to_unit: str, precision: Number):
-    _LOGGER.warning(
-        "convert temp '%s' from '%s' to '%s' with '%s' precision.",
-        temperature,
-        from_unit,
-        to_unit,
-        precision,
+def _modes_list(modes):
+    """Return private copy of the device modes list."""
+    if isinstance(modes, list):
+        return list(modes)
+    return modes
+
+
+def temperature_grid(min_temperature: Number, max_temperature: Number, step: Number):
+    """Return all setpoints from min to max temperature in step increments."""
+    if min_temperature is None or max_temperature is None:
+        return ()
+    count = int(round((max_temperature - min_temperature) / step))
+    return tuple(
+        round_temp(min_temperature + index * step, step) for index in range(count + 1)
     )
 
+
+def round_temp(temperature: Number, precision: Number):
+    """Round temperature to the given precision."""
+    if precision is None:
+        return temperature
+    elif precision == PRECISION_HALVES:
+        return round(temperature * 2) / 2.0
+    elif precision == PRECISION_TENTHS:
+        return round(temperature, 1)
+    elif precision == PRECISION_WHOLE:
+        return round(temperature)
+    elif precision >= PRECISION_DOUBLE:
+        return round(temperature / precision) * precision
+    else:
+        _LOGGER.error("Invalid precision '%s'.", precision)
+        return None
+
+
+def convert_temp(temperature: Number, from_unit: str, to_unit: str, precision: Number):
     if temperature is None:
         _LOGGER.error("Invalid temperature '%s'.", temperature)
         return None
@@ -814,16 +967,4 @@ def convert_temp(temperature: Number, from_unit: str, to_unit: str, precision: N
         )
 
     # Round in the units appropriate
-    if precision is None:
-        return temperature
-    elif precision == PRECISION_HALVES:
-        return round(temperature * 2) / 2.0
-    elif precision == PRECISION_TENTHS:
-        return round(temperature, 1)
-    elif precision == PRECISION_WHOLE:
-        return round(temperature)
-    elif precision >= PRECISION_DOUBLE:
-        return round(temperature / precision) * precision
-    else:
-        _LOGGER.error("Invalid precision '%s'.", precision)
-        return None
+    return round_temp(temperature, precision)
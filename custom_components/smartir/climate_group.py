@@ -0,0 +1,264 @@
+"""Group of SmartIR climate entities commanded together."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+from homeassistant.components.climate import ClimateEntity
+from homeassistant.components.climate.const import (
+    ATTR_HVAC_MODE,
+    HVACMode,
+    ClimateEntityFeature,
+)
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_TEMPERATURE, CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.typing import ConfigType
+
+from .config_flow import CONF_GROUP_MEMBERS
+from .smartir_entity import CONF_UNIQUE_ID, async_get_entities
+from .tracing import SCHEDULER
+
+_LOGGER = logging.getLogger(__name__)
+
+GROUP_FEATURES = (
+    ClimateEntityFeature.TARGET_TEMPERATURE
+    | ClimateEntityFeature.TURN_ON
+    | ClimateEntityFeature.TURN_OFF
+    | ClimateEntityFeature.FAN_MODE
+    | ClimateEntityFeature.SWING_MODE
+    | ClimateEntityFeature.PRESET_MODE
+)
+
+
+class SmartIRClimateGroup(ClimateEntity):
+    """Climate entity fanning one target state out to SmartIR climates.
+
+    Members behind different blasters are commanded concurrently, members
+    sharing a blaster one after another, so the wall time of a change is
+    the time of the busiest blaster rather than the sum of all sends.
+    """
+
+    _attr_should_poll = False
+    _attr_assumed_state = True
+    _enable_turn_on_off_backwards_compatibility = False
+
+    def __init__(self, hass: HomeAssistant, config: ConfigType):
+        self.hass = hass
+        self._attr_name = config.get(CONF_NAME)
+        self._attr_unique_id = config.get(CONF_UNIQUE_ID)
+        self._members = list(config.get(CONF_GROUP_MEMBERS, []))
+        self._last_dispatch = None
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass, self._members, self._async_member_changed
+            )
+        )
+
+    @callback
+    def _async_member_changed(self, event):
+        self.async_write_ha_state()
+
+    def _member_entities(self):
+        """Return the loaded member entities."""
+        entities = async_get_entities(self.hass)
+        return [
+            entities[entity_id] for entity_id in self._members if entity_id in entities
+        ]
+
+    def _common(self, attr):
+        """Return the values of the attribute list shared by all members."""
+        members = self._member_entities()
+        if not members:
+            return []
+        common = set(getattr(members[0], attr) or [])
+        for member in members[1:]:
+            common &= set(getattr(member, attr) or [])
+        return [value for value in getattr(members[0], attr) or [] if value in common]
+
+    def _reference(self, attr):
+        """Return the attribute of the first loaded member."""
+        members = self._member_entities()
+        if not members:
+            return None
+        return getattr(members[0], attr)
+
+    @property
+    def available(self):
+        return bool(self._member_entities())
+
+    @property
+    def supported_features(self):
+        features = GROUP_FEATURES
+        for member in self._member_entities():
+            features &= member.supported_features
+        return features
+
+    @property
+    def temperature_unit(self):
+        return self.hass.config.units.temperature_unit
+
+    @property
+    def hvac_modes(self):
+        return self._common("hvac_modes")
+
+    @property
+    def hvac_mode(self):
+        """Return the mode shared by all members, None if they differ."""
+        modes = {member.hvac_mode for member in self._member_entities()}
+        if len(modes) == 1:
+            return modes.pop()
+        return None
+
+    @property
+    def fan_modes(self):
+        return self._common("fan_modes")
+
+    @property
+    def fan_mode(self):
+        return self._reference("fan_mode")
+
+    @property
+    def swing_modes(self):
+        return self._common("swing_modes")
+
+    @property
+    def swing_mode(self):
+        return self._reference("swing_mode")
+
+    @property
+    def preset_modes(self):
+        return self._common("preset_modes")
+
+    @property
+    def preset_mode(self):
+        return self._reference("preset_mode")
+
+    @property
+    def target_temperature(self):
+        return self._reference("target_temperature")
+
+    @property
+    def target_temperature_step(self):
+        return max(
+            (member.target_temperature_step for member in self._member_entities()),
+            default=None,
+        )
+
+    @property
+    def min_temp(self):
+        return max(
+            (member.min_temp for member in self._member_entities()), default=None
+        )
+
+    @property
+    def max_temp(self):
+        return min(
+            (member.max_temp for member in self._member_entities()), default=None
+        )
+
+    @property
+    def current_temperature(self):
+        temperatures = [
+            member.current_temperature
+            for member in self._member_entities()
+            if member.current_temperature is not None
+        ]
+        if not temperatures:
+            return None
+        return sum(temperatures) / len(temperatures)
+
+    @property
+    def extra_state_attributes(self):
+        return {
+            ATTR_ENTITY_ID: self._members,
+            "last_dispatch": self._last_dispatch,
+        }
+
+    async def async_set_hvac_mode(self, hvac_mode):
+        await self._async_dispatch("async_set_hvac_mode", hvac_mode)
+
+    async def async_set_temperature(self, **kwargs):
+        data = {
+            key: kwargs[key]
+            for key in [ATTR_TEMPERATURE, ATTR_HVAC_MODE]
+            if key in kwargs
+        }
+        await self._async_dispatch("async_set_temperature", **data)
+
+    async def async_set_fan_mode(self, fan_mode):
+        await self._async_dispatch("async_set_fan_mode", fan_mode)
+
+    async def async_set_swing_mode(self, swing_mode):
+        await self._async_dispatch("async_set_swing_mode", swing_mode)
+
+    async def async_set_preset_mode(self, preset_mode):
+        await self._async_dispatch("async_set_preset_mode", preset_mode)
+
+    async def async_turn_off(self):
+        await self._async_dispatch("async_set_hvac_mode", HVACMode.OFF)
+
+    async def async_turn_on(self):
+        await self._async_dispatch("async_turn_on")
+
+    async def _async_dispatch(self, method, *args, **kwargs):
+        """Call the method on all members, one blaster at a time each.
+
+        The result of the dispatch is published in the 'last_dispatch'
+        attribute, with the reason of every member failure.
+        """
+        start = time.monotonic()
+        # the members send in the context of the group call, e.g. with the
+        # blaster queue priority of a user action
+        context = self._context
+        entities = async_get_entities(self.hass)
+        failed = {}
+        blasters = {}
+        for entity_id in self._members:
+            entity = entities.get(entity_id)
+            if entity is None:
+                failed[entity_id] = "unavailable"
+                continue
+            blasters.setdefault(entity.blaster(), []).append(entity)
+
+        async def _async_send(members):
+            for member in members:
+                if context is not None:
+                    member.async_set_context(context)
+                try:
+                    sent = await getattr(member, method)(*args, **kwargs)
+                except Exception as e:
+                    _LOGGER.exception(
+                        "Exception raised sending to group member %s", member.entity_id
+                    )
+                    failed[member.entity_id] = str(e) or type(e).__name__
+                    continue
+                if sent is False:
+                    failed[member.entity_id] = "not sent"
+
+        await asyncio.gather(*(_async_send(members) for members in blasters.values()))
+
+        duration = time.monotonic() - start
+        self._last_dispatch = {
+            "completed": len(self._members) - len(failed),
+            "failed": failed,
+            "duration": round(duration, 3),
+        }
+        if SCHEDULER.enabled:
+            SCHEDULER(
+                "Group %s dispatched '%s' to %d blasters in %.3f s, failed %s.",
+                self.name,
+                method,
+                len(blasters),
+                duration,
+                failed,
+            )
+        if failed:
+            _LOGGER.error(
+                "Group %s failed to send '%s' to %s", self.name, method, list(failed)
+            )
+        self.async_write_ha_state()
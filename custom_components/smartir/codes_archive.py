@@ -0,0 +1,119 @@
+"""Compressed device codes archive with random access index.
+
+The archive holds every device file as separately compressed block, so a
+single device file can be read without decompressing the whole archive.
+
+Layout:
+    magic (8 bytes) | index offset (u64 LE) | index length (u32 LE)
+    compressed device file blocks ...
+    compressed JSON index {"<device_class>/<device_code>": [offset, length]}
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+
+_LOGGER = logging.getLogger(__name__)
+
+ARCHIVE_FILE_NAME = "codes.pack"
+ARCHIVE_MAGIC = b"SIRPACK1"
+ARCHIVE_HEADER = struct.Struct("<8sQI")
+COMPRESSION_LEVEL = 9
+
+# archive path -> (mtime, index)
+_INDEX_CACHE = {}
+_INDEX_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def archive_key(device_class, device_code):
+    return f"{device_class}/{device_code}"
+
+
+def _read_index(file, path):
+    stat = os.fstat(file.fileno())
+    cached = _INDEX_CACHE.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns:
+        _INDEX_CACHE_STATS["hits"] += 1
+        return cached[1]
+    _INDEX_CACHE_STATS["misses"] += 1
+
+    magic, offset, length = ARCHIVE_HEADER.unpack(file.read(ARCHIVE_HEADER.size))
+    if magic != ARCHIVE_MAGIC:
+        raise ValueError(f"'{path}' is not a SmartIR codes archive")
+    file.seek(offset)
+    index = json.loads(zlib.decompress(file.read(length)))
+    _INDEX_CACHE[path] = (stat.st_mtime_ns, index)
+    return index
+
+
+def index_cache_stats():
+    """Return the cached archive indexes and the index cache hit rate."""
+    lookups = _INDEX_CACHE_STATS["hits"] + _INDEX_CACHE_STATS["misses"]
+    return {
+        "archives": len(_INDEX_CACHE),
+        "entries": sum(len(index) for _, index in _INDEX_CACHE.values()),
+        **_INDEX_CACHE_STATS,
+        "hit_rate": (
+            round(_INDEX_CACHE_STATS["hits"] / lookups, 3) if lookups else None
+        ),
+    }
+
+
+def read_archive_bytes(path, device_class, device_code):
+    """Return the raw device file content from the archive or None."""
+    with open(path, "rb") as file:
+        index = _read_index(file, path)
+        entry = index.get(archive_key(device_class, device_code))
+        if entry is None:
+            return None
+        file.seek(entry[0])
+        return zlib.decompress(file.read(entry[1]))
+
+
+def read_archive_json(path, device_class, device_code):
+    """Return the parsed device file from the archive or None."""
+    try:
+        content = read_archive_bytes(path, device_class, device_code)
+        if content is None:
+            return None
+        return json.loads(content)
+    except Exception as e:
+        _LOGGER.error(
+            "Error reading '%s' device file '%s' from codes archive '%s': '%s'.",
+            device_class,
+            device_code,
+            path,
+            e,
+        )
+        return None
+
+
+def build_archive(codes_dir, path):
+    """Pack all '<codes_dir>/<device_class>/<device_code>.json' files."""
+    index = {}
+    with open(path, "wb") as file:
+        file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, 0, 0))
+        for device_class in sorted(os.listdir(codes_dir)):
+            class_dir = os.path.join(codes_dir, device_class)
+            if not os.path.isdir(class_dir):
+                continue
+            for file_name in sorted(os.listdir(class_dir)):
+                device_code, ext = os.path.splitext(file_name)
+                if ext != ".json":
+                    continue
+                with open(os.path.join(class_dir, file_name), "rb") as device_file:
+                    block = zlib.compress(device_file.read(), COMPRESSION_LEVEL)
+                index[archive_key(device_class, device_code)] = [
+                    file.tell(),
+                    len(block),
+                ]
+                file.write(block)
+
+        offset = file.tell()
+        block = zlib.compress(json.dumps(index).encode(), COMPRESSION_LEVEL)
+        file.write(block)
+        file.seek(0)
+        file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, offset, len(block)))
+    return index
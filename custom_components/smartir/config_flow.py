@@ -6,10 +6,22 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import selector, config_validation as cv
 from homeassistant.const import CONF_NAME, CONF_UNIQUE_ID
 
+from .smartir_entity import (
+    CONF_ADAPTIVE_DELAY,
+    CONF_AIRTIME_DELAY,
+    CONF_AIRTIME_GUARD,
+    CONF_FORCE_REFRESH_INTERVAL,
+    CONF_NORMALIZE_COMMANDS,
+    CONF_OPTIMISTIC,
+    CONF_SEND_METRICS,
+    DEFAULT_AIRTIME_GUARD,
+    DEFAULT_FORCE_REFRESH_INTERVAL,
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 # Domaine unique pour SmartIR
@@ -17,14 +29,46 @@ DOMAIN = "smartir"
 
 # Constante locale (n’existe pas dans Home Assistant)
 CONF_DEVICE_CODE = "device_code"
+CONF_GROUP_MEMBERS = "members"
 
 
 # ----------------------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------------------
-def _warning_log(title: str, payload: dict) -> None:
+def _debug_log(title: str, payload: dict) -> None:
     """Convenience wrapper that logs the whole step in one line."""
-    _LOGGER.warning("%s: %s", title, payload)
+    _LOGGER.debug("%s: %s", title, payload)
+
+
+def _send_options_schema(config: dict) -> dict:
+    """Fields of the send options, defaulting to the values of config."""
+    return {
+        vol.Optional(
+            CONF_FORCE_REFRESH_INTERVAL,
+            default=config.get(
+                CONF_FORCE_REFRESH_INTERVAL, DEFAULT_FORCE_REFRESH_INTERVAL
+            ),
+        ): cv.positive_int,
+        vol.Optional(
+            CONF_OPTIMISTIC, default=config.get(CONF_OPTIMISTIC, False)
+        ): cv.boolean,
+        vol.Optional(
+            CONF_AIRTIME_DELAY, default=config.get(CONF_AIRTIME_DELAY, True)
+        ): cv.boolean,
+        vol.Optional(
+            CONF_AIRTIME_GUARD,
+            default=config.get(CONF_AIRTIME_GUARD, DEFAULT_AIRTIME_GUARD),
+        ): cv.positive_float,
+        vol.Optional(
+            CONF_ADAPTIVE_DELAY, default=config.get(CONF_ADAPTIVE_DELAY, False)
+        ): cv.boolean,
+        vol.Optional(
+            CONF_NORMALIZE_COMMANDS, default=config.get(CONF_NORMALIZE_COMMANDS, False)
+        ): cv.boolean,
+        vol.Optional(
+            CONF_SEND_METRICS, default=config.get(CONF_SEND_METRICS, False)
+        ): cv.boolean,
+    }
 
 
 # ----------------------------------------------------------------------
@@ -38,6 +82,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         self._user_input: dict | None = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow of a device entry."""
+        return OptionsFlow(config_entry)
+
+    @classmethod
+    @callback
+    def async_supports_options_flow(cls, config_entry) -> bool:
+        """Climate groups have no send options."""
+        return CONF_GROUP_MEMBERS not in config_entry.data
+
     async def _async_get_esphome_services(self) -> list[str]:
         """
         Retourne la liste triée des noms de services disponibles sous le domaine
@@ -46,7 +102,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         try:
             all_services = await self.hass.services.async_services()
             esphome_services = sorted(all_services.get("esphome", {}).keys())
-            _LOGGER.warning("ESPHome services détectés : %s", esphome_services)
+            _LOGGER.debug("ESPHome services détectés : %s", esphome_services)
             return esphome_services
         except Exception as exc:
             _LOGGER.warning("Impossible de récupérer les services ESPHome : %s", exc)
@@ -56,16 +112,21 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     # Step: User
     # ---------------------------
     async def async_step_user(self, user_input=None):
-        """Étape 0 – saisie des paramètres obligatoires."""
-        _LOGGER.warning("SmartIR ConfigFlow : async_step_user appelé")
+        """Étape 0 – choix entre un appareil et un groupe de climatiseurs."""
+        _LOGGER.debug("SmartIR ConfigFlow : async_step_user appelé")
+        return self.async_show_menu(step_id="user", menu_options=["device", "group"])
+
+    # ---------------------------
+    # Step: Device
+    # ---------------------------
+    async def async_step_device(self, user_input=None):
+        """Étape 1 – saisie des paramètres obligatoires."""
+        _LOGGER.debug("SmartIR ConfigFlow : async_step_device appelé")
 
         if user_input:
-            # L’utilisateur a soumis le formulaire.
+            # L’utilisateur a soumis le formulaire, étape 2 : options.
             self._user_input = user_input
-            return await self.async_create_entry(
-                title=user_input.get(CONF_NAME, "SmartIR"),
-                data=user_input,
-            )
+            return await self.async_step_optional()
 
         # Récupération dynamique des services ESPHome
         esphome_services = await self._async_get_esphome_services()
@@ -75,7 +136,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 selector.SelectSelectorConfig(options=esphome_services)
             )
         else:  # Fallback si aucun service trouvé
-            _LOGGER.warning("Aucun service ESPHome détecté – fallback mode texte.")
+            _LOGGER.debug("Aucun service ESPHome détecté – fallback mode texte.")
             es_service_selector = selector.TextSelector()
 
         # Construction du schéma de formulaire
@@ -99,19 +160,47 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="device",
             data_schema=schema,
             description_placeholders={
                 "example": "master_bedroom_smart_ir_send_raw_command"
             },
         )
 
+    # ---------------------------
+    # Step: Group
+    # ---------------------------
+    async def async_step_group(self, user_input=None):
+        """Étape 1 – groupe de climatiseurs SmartIR commandés ensemble."""
+        _LOGGER.debug("SmartIR ConfigFlow : async_step_group appelé")
+
+        if user_input:
+            data = {**user_input, "platform": "climate"}
+            return await self.async_create_entry(
+                title=data.get(CONF_NAME, "SmartIR Group"),
+                data=data,
+            )
+
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_NAME, default="SmartIR Group"): cv.string,
+                vol.Required(CONF_UNIQUE_ID): cv.string,
+                vol.Required(CONF_GROUP_MEMBERS): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="climate", integration=DOMAIN, multiple=True
+                    )
+                ),
+            }
+        )
+
+        return self.async_show_form(step_id="group", data_schema=schema)
+
     # ---------------------------
     # Step: Optional
     # ---------------------------
     async def async_step_optional(self, user_input=None) -> config_entries.FlowResult:
-        """Step 1 – ask for optional sensors."""
-        _LOGGER.warning("SmartIR ConfigFlow: async_step_optional called")
+        """Step 2 – ask for optional sensors and send options."""
+        _LOGGER.debug("SmartIR ConfigFlow: async_step_optional called")
 
         if self._user_input is None:
             return await self.async_abort(reason="missing_user_input")
@@ -137,6 +226,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         domain="binary_sensor", multiple=False
                     )
                 ),
+                **_send_options_schema({}),
             }
         )
 
@@ -150,8 +240,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         Called when a YAML entry is imported.
         We simply convert it to a config-entry so the UI stays consistent.
         """
-        _LOGGER.warning("SmartIR ConfigFlow: async_step_import called")
-        _warning_log("Importing data", import_info)
+        _LOGGER.debug("SmartIR ConfigFlow: async_step_import called")
+        _debug_log("Importing data", import_info)
 
         # The import dict contains exactly what we would have gotten from the user
         self._user_input = import_info
@@ -168,5 +258,27 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, title: str, data: dict
     ) -> config_entries.FlowResult:
         """Create the final entry."""
-        _LOGGER.warning("SmartIR ConfigFlow: creating entry %s", title)
+        _LOGGER.debug("SmartIR ConfigFlow: creating entry %s", title)
         return super().async_create_entry(title=title, data=data)
+
+
+# ----------------------------------------------------------------------
+# Options flow
+# ----------------------------------------------------------------------
+class OptionsFlow(config_entries.OptionsFlow):
+    """Change the send options of a SmartIR device entry."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> config_entries.FlowResult:
+        """Single step – the send options, the entry is reloaded with them."""
+        _LOGGER.debug("SmartIR OptionsFlow: async_step_init called")
+
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        config = {**self._entry.data, **self._entry.options}
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(_send_options_schema(config))
+        )
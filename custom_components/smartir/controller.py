@@ -1,8 +1,6 @@
 from abc import ABC, abstractmethod
-from base64 import b64encode
-import ipaddress
+from base64 import b64decode, b64encode
 import binascii
-import requests
 import struct
 import json
 
@@ -29,6 +27,15 @@ from .controller_const import (
 
 from homeassistant.const import ATTR_ENTITY_ID
 
+from .tracing import CONTROLLER
+
+# pulse unit of Broadlink packets is 8192/269 us
+BROADLINK_IR_PACKET = 0x26
+# gaps of at least 10 ms separate frames repeated inside a packet
+BROADLINK_FRAME_GAP = 328
+# shortest trailing gap left by the normalization, 50 ms
+BROADLINK_MIN_TRAILING_GAP = 1641
+
 
 def get_controller(hass, controller, encoding, controller_data):
     """Return a controller compatible with the specification provided."""
@@ -54,6 +61,13 @@ def get_controller(hass, controller, encoding, controller_data):
     return controllers[controller](hass, controller, encoding, controller_data)
 
 
+def _ip_address(value):
+    """Validate an IP address, ipaddress is only imported for LOOKin."""
+    import ipaddress
+
+    return ipaddress.ip_address(value)
+
+
 def get_controller_schema(vol, cv):
     """Return a controller schema."""
     schema = vol.Any(
@@ -65,6 +79,7 @@ def get_controller_schema(vol, cv):
                 vol.Required(CONTROLLER_CONF["REMOTE_ENTITY"]): cv.entity_id,
                 vol.Optional(CONTROLLER_CONF["NUM_REPEATS"]): cv.positive_int,
                 vol.Optional(CONTROLLER_CONF["DELAY_SECS"]): cv.positive_float,
+                vol.Optional(CONTROLLER_CONF["PACKET_REPEATS"]): cv.boolean,
             }
         ),
         vol.Schema(
@@ -97,7 +112,7 @@ def get_controller_schema(vol, cv):
                     LOOKIN_CONTROLLER
                 ),
                 vol.Required(CONTROLLER_CONF["REMOTE_HOST"]): vol.All(
-                    ipaddress.ip_address, cv.string
+                    _ip_address, cv.string
                 ),
             }
         ),
@@ -130,11 +145,17 @@ def get_controller_schema(vol, cv):
 class AbstractController(ABC):
     """Representation of a controller."""
 
+    # send() transmits a list of commands in one service call
+    batch_send = False
+
     def __init__(self, hass, controller, encoding, controller_data):
         self.hass = hass
         self._controller = controller
         self._encoding = encoding
         self._controller_data = controller_data
+        self._airtime_cache = {}
+        self._airtime_hits = 0
+        self._airtime_misses = 0
 
     @abstractmethod
     def check_encoding(self, encoding):
@@ -146,10 +167,80 @@ class AbstractController(ABC):
         """Send a command."""
         pass
 
+    def airtime(self, command, cache=True):
+        """Return the transmission time of the command in seconds.
+
+        Return None if the command pulses can't be decoded.
+        """
+        key = command if not isinstance(command, list) else tuple(command)
+        if key in self._airtime_cache:
+            self._airtime_hits += 1
+            return self._airtime_cache[key]
+        self._airtime_misses += 1
+        try:
+            pulses = self._pulses(command)
+        except Exception:
+            pulses = None
+        airtime = None if pulses is None else sum(pulses) / 1e6
+        if cache:
+            self._airtime_cache[key] = airtime
+        return airtime
+
+    def normalize(self, command):
+        """Return the command optimized for transmission."""
+        return command
+
+    def cache_stats(self):
+        """Return size and hit rate of the airtime cache."""
+        lookups = self._airtime_hits + self._airtime_misses
+        return {
+            "size": len(self._airtime_cache),
+            "hits": self._airtime_hits,
+            "misses": self._airtime_misses,
+            "hit_rate": round(self._airtime_hits / lookups, 3) if lookups else None,
+        }
+
+    def blaster(self):
+        """Return identity of the transmitting device.
+
+        Controllers configured with the same identity send through the same
+        physical device.
+        """
+        for key in [
+            "REMOTE_ENTITY",
+            "REMOTE_HOST",
+            "ESPHOME_SERVICE",
+            "MQTT_TOPIC",
+            "ZHA_IEEE",
+        ]:
+            if CONTROLLER_CONF[key] in self._controller_data:
+                return (self._controller, self._controller_data[CONTROLLER_CONF[key]])
+        return (self._controller, id(self))
+
+    def _pulses(self, command):
+        """Return the command pulses in microseconds, None if unknown."""
+        if self._encoding == ENC_PRONTO:
+            return Helper.pronto2lirc(bytearray.fromhex(command.replace(" ", "")))
+        return None
+
+    async def _async_call_service(self, domain, service, service_data):
+        """Call the Home Assistant service that transmits a command."""
+        if CONTROLLER.enabled:
+            CONTROLLER(
+                "%s controller calling '%s.%s' with %s.",
+                self._controller,
+                domain,
+                service,
+                service_data,
+            )
+        await self.hass.services.async_call(domain, service, service_data)
+
 
 class BroadlinkController(AbstractController):
     """Controls a Broadlink device."""
 
+    batch_send = True
+
     def check_encoding(self, encoding):
         """Check if the encoding is supported by the controller."""
         if encoding not in BROADLINK_COMMANDS_ENCODING:
@@ -157,12 +248,75 @@ class BroadlinkController(AbstractController):
                 "The encoding is not supported " "by the Broadlink controller."
             )
 
+    def _folded_repeats(self, command):
+        """Return the repeats written into the packet repeat byte, 1 if none.
+
+        Only a single packet is folded, the service repeats a sequence of
+        packets as a whole, which the repeat byte can't reproduce.
+        """
+        if len(command) != 1 or not self._controller_data.get(
+            CONTROLLER_CONF["PACKET_REPEATS"], False
+        ):
+            return 1
+        return self._controller_data.get(CONTROLLER_CONF["NUM_REPEATS"], 1)
+
+    def _pulses(self, command):
+        """Return pulses of all packets, including packet and command repeats."""
+        if not isinstance(command, (list, tuple)):
+            command = [command]
+        folded = self._folded_repeats(command)
+
+        pulses = []
+        for _command in command:
+            if pulses:
+                # the blaster waits 'delay_secs' between the commands
+                pulses.append(
+                    self._controller_data.get(CONTROLLER_CONF["DELAY_SECS"], 0) * 1e6
+                )
+            if self._encoding == ENC_PRONTO:
+                packet_pulses = super()._pulses(_command)
+                repeats = 1
+            else:
+                if self._encoding == ENC_HEX:
+                    packet = binascii.unhexlify(_command)
+                else:
+                    packet = b64decode(_command)
+                packet_pulses = Helper.broadlink2lirc(packet)
+                repeats = packet[1] + 1
+            pulses += packet_pulses * min(repeats * folded, 256)
+        return pulses * (
+            self._controller_data.get(CONTROLLER_CONF["NUM_REPEATS"], 1) // folded
+        )
+
+    def normalize(self, command):
+        """Return the command with normalized Broadlink packets."""
+        if self._encoding == ENC_PRONTO:
+            return command
+        if isinstance(command, (list, tuple)):
+            return [self.normalize(_command) for _command in command]
+
+        try:
+            if self._encoding == ENC_HEX:
+                packet = binascii.unhexlify(command)
+            else:
+                packet = b64decode(command)
+        except (binascii.Error, ValueError):
+            return command
+
+        normalized = Helper.normalize_broadlink(packet)
+        if normalized == packet:
+            return command
+        if self._encoding == ENC_HEX:
+            return binascii.hexlify(normalized).decode("utf-8")
+        return b64encode(normalized).decode("utf-8")
+
     async def send(self, command):
         """Send a command."""
         commands = []
 
-        if not isinstance(command, list):
+        if not isinstance(command, (list, tuple)):
             command = [command]
+        folded = self._folded_repeats(command)
 
         for _command in command:
             if self._encoding == ENC_HEX:
@@ -184,6 +338,10 @@ class BroadlinkController(AbstractController):
                         "Error while converting " "Pronto to Base64 encoding"
                     )
 
+            if folded > 1:
+                _command = Helper.broadlink_repeat(b64decode(_command), folded)
+                _command = b64encode(_command).decode("utf-8")
+
             commands.append("b64:" + _command)
 
         service_data = {
@@ -194,12 +352,12 @@ class BroadlinkController(AbstractController):
             service_data["delay_secs"] = self._controller_data[
                 CONTROLLER_CONF["DELAY_SECS"]
             ]
-        if CONTROLLER_CONF["NUM_REPEATS"] in self._controller_data:
+        if CONTROLLER_CONF["NUM_REPEATS"] in self._controller_data and folded == 1:
             service_data["num_repeats"] = self._controller_data[
                 CONTROLLER_CONF["NUM_REPEATS"]
             ]
 
-        await self.hass.services.async_call("remote", "send_command", service_data)
+        await self._async_call_service("remote", "send_command", service_data)
 
 
 class XiaomiController(AbstractController):
@@ -219,7 +377,7 @@ class XiaomiController(AbstractController):
             "command": self._encoding.lower() + ":" + command,
         }
 
-        await self.hass.services.async_call("remote", "send_command", service_data)
+        await self._async_call_service("remote", "send_command", service_data)
 
 
 class MQTTController(AbstractController):
@@ -237,7 +395,7 @@ class MQTTController(AbstractController):
             "payload": command,
         }
 
-        await self.hass.services.async_call("mqtt", "publish", service_data)
+        await self._async_call_service("mqtt", "publish", service_data)
 
 
 class LookinController(AbstractController):
@@ -261,7 +419,17 @@ class LookinController(AbstractController):
             + "/"
             + command
         )
-        await self.hass.async_add_executor_job(requests.get, url)
+        if CONTROLLER.enabled:
+            CONTROLLER("%s controller requesting '%s'.", self._controller, url)
+        await self.hass.async_add_executor_job(_http_get, url)
+
+
+def _http_get(url):
+    # requests is imported on the first LOOKin send, not at Home Assistant
+    # startup
+    import requests
+
+    return requests.get(url)
 
 
 class ESPHomeController(AbstractController):
@@ -274,11 +442,14 @@ class ESPHomeController(AbstractController):
                 "The encoding is not supported " "by the ESPHome controller."
             )
 
+    def _pulses(self, command):
+        return [abs(int(pulse)) for pulse in json.loads(command)]
+
     async def send(self, command):
         """Send a command."""
         service_data = {"command": json.loads(command)}
 
-        await self.hass.services.async_call(
+        await self._async_call_service(
             "esphome",
             self._controller_data[CONTROLLER_CONF["ESPHOME_SERVICE"]],
             service_data,
@@ -306,7 +477,7 @@ class ZHAController(AbstractController):
             "command_type": self._controller_data[CONTROLLER_CONF["ZHA_COMMAND_TYPE"]],
             "params": {"code": command},
         }
-        await self.hass.services.async_call(
+        await self._async_call_service(
             "zha", "issue_zigbee_cluster_command", service_data
         )
 
@@ -326,7 +497,7 @@ class UFOR11Controller(MQTTController):
             "payload": json.dumps({"ir_code_to_send": command}),
         }
 
-        await self.hass.services.async_call("mqtt", "publish", service_data)
+        await self._async_call_service("mqtt", "publish", service_data)
 
 
 class Helper:
@@ -370,3 +541,119 @@ class Helper:
         if remainder:
             packet += bytearray(16 - remainder)
         return packet
+
+    @staticmethod
+    def broadlink_repeat(packet, repeats):
+        """Return the packet with the transmissions multiplied by repeats.
+
+        The device transmits a packet 1 + repeat byte times, the product is
+        capped at the 256 transmissions the byte can encode.
+        """
+        packet = bytearray(packet)
+        packet[1] = min((packet[1] + 1) * repeats, 256) - 1
+        return packet
+
+    @staticmethod
+    def broadlink2lirc(packet):
+        return [
+            int(round(pulse * 8192 / 269)) for pulse in Helper.broadlink2units(packet)
+        ]
+
+    @staticmethod
+    def broadlink2units(packet):
+        """Return the packet pulses in Broadlink units."""
+        if len(packet) < 4 or packet[0] != BROADLINK_IR_PACKET:
+            raise ValueError("Broadlink IR packet should start with 0x26")
+
+        length = struct.unpack("<H", packet[2:4])[0]
+        data = packet[4 : 4 + length]
+        pulses = []
+        i = 0
+        while i < len(data):
+            pulse = data[i]
+            i += 1
+            if pulse == 0:
+                if i + 2 > len(data):
+                    break
+                pulse = struct.unpack(">H", data[i : i + 2])[0]
+                i += 2
+            pulses.append(pulse)
+        return pulses
+
+    @staticmethod
+    def units2broadlink(pulses, repeat=0):
+        """Return Broadlink IR packet of the pulses in Broadlink units."""
+        array = bytearray()
+        for pulse in pulses:
+            if 0 < pulse < 256:
+                array += bytearray(struct.pack(">B", pulse))
+            else:
+                array += bytearray([0x00])
+                array += bytearray(struct.pack(">H", pulse))
+
+        packet = bytearray([BROADLINK_IR_PACKET, repeat])
+        packet += bytearray(struct.pack("<H", len(array)))
+        packet += array
+        packet += bytearray([0x0D, 0x05])
+
+        # Add 0s to make ultimate packet size a multiple of 16 for 128-bit AES encryption.
+        remainder = (len(packet) + 4) % 16
+        if remainder:
+            packet += bytearray(16 - remainder)
+        return packet
+
+    @staticmethod
+    def normalize_broadlink(packet):
+        """Return the IR packet with less silence and in-packet repeats.
+
+        Identical frames repeated inside the packet are collapsed into the
+        repeat byte. The trailing gap of a packet without repeats is cut
+        to its longest inner gap, but not below 50 ms. The packet is
+        returned as it is if it can't be decoded, or if the normalized
+        packet doesn't transmit the same pulses up to the trailing gap.
+        """
+        try:
+            pulses = Helper.broadlink2units(packet)
+        except ValueError:
+            return packet
+        # a complete packet ends with the gap after the last mark
+        if len(pulses) < 2 or len(pulses) % 2:
+            return packet
+        repeat = packet[1]
+
+        frames = []
+        start = 0
+        for i in range(1, len(pulses), 2):
+            if pulses[i] >= BROADLINK_FRAME_GAP or i == len(pulses) - 1:
+                frames.append(pulses[start : i + 1])
+                start = i + 1
+
+        normalized = pulses
+        first = frames[0]
+        if (
+            len(frames) > 1
+            and (repeat + 1) * len(frames) <= 256
+            and all(frame[:-1] == first[:-1] for frame in frames)
+            and all(frame[-1] == first[-1] for frame in frames[:-1])
+            and frames[-1][-1] >= first[-1]
+        ):
+            normalized = first
+            repeat = (repeat + 1) * len(frames) - 1
+        elif not repeat:
+            gap = max(max(pulses[1:-1:2], default=0), BROADLINK_MIN_TRAILING_GAP)
+            normalized = pulses[:-1] + [min(pulses[-1], gap)]
+
+        normalized = Helper.units2broadlink(normalized, repeat)
+
+        # round-trip check of the transmitted pulses
+        before = pulses * (packet[1] + 1)
+        after = Helper.broadlink2units(normalized) * (normalized[1] + 1)
+        if (
+            len(after) != len(before)
+            or after[:-1] != before[:-1]
+            or after[-1] > before[-1]
+        ):
+            return packet
+        if len(normalized) >= len(packet) and after == before:
+            return packet
+        return bytes(normalized)
@@ -37,6 +37,7 @@ CONTROLLER_CONF = {
     "REMOTE_ENTITY": "remote_entity",
     "NUM_REPEATS": "num_repeats",
     "DELAY_SECS": "delay_secs",
+    "PACKET_REPEATS": "packet_repeats",
     "MQTT_TOPIC": "mqtt_topic",
     "REMOTE_HOST": "remote_host",
     "ESPHOME_SERVICE": "esphome_service",
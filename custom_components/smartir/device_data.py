@@ -1,12 +1,23 @@
 import logging
 import hashlib
 import json
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
 
 from .smartir_helpers import precision_round
 from .controller_const import CONTROLLER_SUPPORT
+from .protocol_generator import (
+    GENERATOR_SUPPORT,
+    PROTOCOL_PULSE_DISTANCE,
+    GeneratedCommands,
+    ProtocolGenerator,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+DEVICE_DATA_VERSION_V2 = 2
+
 
 class DeviceData:
     @staticmethod
@@ -24,8 +35,252 @@ class DeviceData:
                 )
                 return None
 
+    @staticmethod
+    def is_v2(device_data) -> bool:
+        """Return True if the device data uses the v2 command table format."""
+        return (
+            isinstance(device_data, dict)
+            and device_data.get("version") == DEVICE_DATA_VERSION_V2
+        )
+
+    @staticmethod
+    def to_v2(device_data: dict) -> dict:
+        """Convert v1 device data into the v2 deduplicated command table format.
+
+        Every IR frame is stored once in 'commandsTable' and the 'commands' tree
+        references frames by their table index. A frame sequence (list) becomes
+        a list of indices.
+        """
+        if DeviceData.is_v2(device_data):
+            return device_data
+
+        table = []
+        index = {}
+
+        def ref(frame):
+            if frame not in index:
+                index[frame] = len(table)
+                table.append(frame)
+            return index[frame]
+
+        def walk(node):
+            if isinstance(node, dict):
+                return {key: walk(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [ref(frame) for frame in node]
+            if node is None:
+                return None
+            return ref(node)
+
+        result = {"version": DEVICE_DATA_VERSION_V2}
+        for key, value in device_data.items():
+            if key != "commands":
+                result[key] = value
+        result["commandsTable"] = table
+        result["commands"] = walk(device_data.get("commands", {}))
+        return result
+
+    @staticmethod
+    def from_v2(device_data: dict) -> dict:
+        """Expand v2 device data back into the v1 nested commands format.
+
+        Identical frames share the same string object from the command table.
+        Raise ValueError on invalid table references.
+        """
+        if not DeviceData.is_v2(device_data):
+            return device_data
+
+        table = device_data["commandsTable"]
+
+        def frame(idx):
+            if not isinstance(idx, int) or isinstance(idx, bool):
+                raise ValueError(f"invalid command reference '{idx}'")
+            if idx < 0 or idx >= len(table):
+                raise ValueError(f"command reference '{idx}' out of table range")
+            return table[idx]
+
+        def walk(node):
+            if isinstance(node, dict):
+                return {key: walk(value) for key, value in node.items()}
+            if isinstance(node, list):
+                return [frame(idx) for idx in node]
+            if node is None:
+                return None
+            return frame(node)
+
+        result = {}
+        for key, value in device_data.items():
+            if key not in ["version", "commandsTable", "commands"]:
+                result[key] = value
+        result["commands"] = walk(device_data.get("commands", {}))
+        return result
+
+    @staticmethod
+    def check_file_v2(file_name, device_data, device_class):
+        """Check v2 command table and return expanded v1 data or None."""
+        if not (
+            "commandsTable" in device_data
+            and isinstance(device_data["commandsTable"], list)
+            and len(device_data["commandsTable"])
+            and all(isinstance(frame, str) for frame in device_data["commandsTable"])
+        ):
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': missing or invalid attribute 'commandsTable'.",
+                device_class,
+                file_name,
+            )
+            return None
+
+        try:
+            return DeviceData.from_v2(device_data)
+        except ValueError as e:
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': %s.",
+                device_class,
+                file_name,
+                e,
+            )
+            return None
+
+    @staticmethod
+    def prune_commands(commands, levels):
+        """Return copy of the commands tree with only reachable keys.
+
+        'levels' is the list of allowed keys for every tree depth, None
+        allows any key. Generated commands are returned as they are.
+        """
+        if isinstance(commands, GeneratedCommands) or not isinstance(commands, Mapping):
+            return commands
+        if not levels:
+            return commands
+
+        allowed = levels[0]
+        return {
+            key: DeviceData.prune_commands(value, levels[1:])
+            for key, value in commands.items()
+            if allowed is None or key in allowed
+        }
+
+    @staticmethod
+    def map_frames(commands, function):
+        """Return copy of the commands tree with every frame mapped.
+
+        Generated commands are returned as they are.
+        """
+        if isinstance(commands, GeneratedCommands):
+            return commands
+        if isinstance(commands, Mapping):
+            return {
+                key: DeviceData.map_frames(value, function)
+                for key, value in commands.items()
+            }
+        if isinstance(commands, (list, tuple)):
+            return [DeviceData.map_frames(value, function) for value in commands]
+        if isinstance(commands, str):
+            return function(commands)
+        return commands
+
+    @staticmethod
+    def compile_commands(commands):
+        """Return read-only copy of the commands tree with interned frames."""
+        if isinstance(commands, GeneratedCommands):
+            return commands
+        if isinstance(commands, Mapping):
+            return MappingProxyType(
+                {
+                    key: DeviceData.compile_commands(value)
+                    for key, value in commands.items()
+                }
+            )
+        if isinstance(commands, list):
+            return tuple(DeviceData.compile_commands(value) for value in commands)
+        if isinstance(commands, str):
+            return sys.intern(commands)
+        return commands
+
+    @staticmethod
+    def commands_memory(commands) -> dict:
+        """Return memory statistics of the compiled commands tree."""
+        report = {
+            "commands": 0,
+            "frames": 0,
+            "frame_bytes": 0,
+            "table_bytes": 0,
+            "generated": isinstance(commands, GeneratedCommands),
+        }
+        frames = set()
+
+        def walk(node):
+            if isinstance(node, GeneratedCommands):
+                report["table_bytes"] += sys.getsizeof(node)
+                for key in node.static_keys():
+                    walk(node[key])
+            elif isinstance(node, Mapping):
+                report["table_bytes"] += sys.getsizeof(node) + sys.getsizeof(dict(node))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, (list, tuple)):
+                report["table_bytes"] += sys.getsizeof(node)
+                for value in node:
+                    walk(value)
+            elif isinstance(node, str):
+                report["commands"] += 1
+                if id(node) not in frames:
+                    frames.add(id(node))
+                    report["frames"] += 1
+                    report["frame_bytes"] += sys.getsizeof(node)
+
+        walk(commands)
+        if report["generated"]:
+            report.update(commands.generator_stats())
+        return report
+
+    @staticmethod
+    def interned_pool(command_tables) -> dict:
+        """Return frames shared by the compiled command tables.
+
+        Frames are interned when compiled, so entities with the same
+        device file hold one copy of each frame.
+        """
+        frames = {}
+        references = 0
+
+        def walk(node):
+            nonlocal references
+            if isinstance(node, GeneratedCommands):
+                for key in node.static_keys():
+                    walk(node[key])
+            elif isinstance(node, Mapping):
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, (list, tuple)):
+                for value in node:
+                    walk(value)
+            elif isinstance(node, str):
+                references += 1
+                frames.setdefault(id(node), sys.getsizeof(node))
+
+        for commands in command_tables:
+            walk(commands)
+        return {
+            "frames": len(frames),
+            "references": references,
+            "bytes": sum(frames.values()),
+        }
+
     @staticmethod
     async def check_file(file_name, device_data, device_class, check_data):
+        return DeviceData.check_device_data(
+            file_name, device_data, device_class, check_data
+        )
+
+    @staticmethod
+    def check_device_data(file_name, device_data, device_class, check_data):
+        """Check the device data, log the first error found.
+
+        It walks all commands of the file, so Home Assistant runs it in the
+        executor.
+        """
         if not isinstance(device_data, dict):
             _LOGGER.error(
                 "Invalid %s device JSON file '%s': invalid JSON format.",
@@ -83,6 +338,27 @@ class DeviceData:
             )
             return False
 
+        if device_data.get("version", 1) not in [1, DEVICE_DATA_VERSION_V2]:
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': unsupported attribute 'version'.",
+                device_class,
+                file_name,
+            )
+            return False
+
+        if DeviceData.is_v2(device_data):
+            device_data = DeviceData.check_file_v2(file_name, device_data, device_class)
+            if device_data is None:
+                return False
+
+        if "commandsGenerator" in device_data and device_class != "climate":
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': attribute 'commandsGenerator' is supported only for climate devices.",
+                device_class,
+                file_name,
+            )
+            return False
+
         if device_class == "climate":
             if DeviceData.check_file_climate(
                 file_name, device_data, device_class, check_data
@@ -232,6 +508,16 @@ class DeviceData:
             )
             return False
 
+        if "commandsGenerator" in device_data:
+            return DeviceData.check_file_climate_generator(
+                file_name,
+                modes_list,
+                modes_used,
+                device_class,
+                check_data,
+                device_data,
+            )
+
         results = DeviceData.check_file_climate_commands(
             file_name,
             0,
@@ -253,6 +539,137 @@ class DeviceData:
 
         return results
 
+    @staticmethod
+    def check_file_climate_generator(
+        file_name,
+        modes_list,
+        modes_used,
+        device_class,
+        check_data,
+        device_data,
+    ):
+        spec = device_data["commandsGenerator"]
+        commands = device_data["commands"]
+
+        if not (
+            isinstance(spec, dict)
+            and spec.get("protocol") == PROTOCOL_PULSE_DISTANCE
+            and GENERATOR_SUPPORT.get(device_data["supportedController"])
+            == device_data["commandsEncoding"]
+            and spec.get("levels") == modes_list
+            and isinstance(spec.get("states"), dict)
+            and isinstance(spec.get("segments"), list)
+            and isinstance(spec.get("fields"), list)
+            and isinstance(spec.get("timing"), dict)
+        ):
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': invalid attribute 'commandsGenerator'.",
+                device_class,
+                file_name,
+            )
+            return False
+
+        if not isinstance(commands, dict):
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': invalid format of the 'commands'.",
+                device_class,
+                file_name,
+            )
+            return False
+
+        for mode in modes_used["operation"]:
+            if not (
+                ("off" in commands and isinstance(commands["off"], str))
+                or (
+                    "off_" + mode in commands
+                    and isinstance(commands["off_" + mode], str)
+                )
+            ):
+                _LOGGER.error(
+                    "Invalid %s device JSON file '%s': missing or invalid 'off' or '%s' operation mode command.",
+                    device_class,
+                    file_name,
+                    "off_" + mode,
+                )
+                return False
+
+            states = spec["states"].get(mode)
+            if not (isinstance(states, list) and len(states) == len(modes_list) - 1):
+                _LOGGER.error(
+                    "Invalid %s device JSON file '%s': missing or invalid generator states for operation mode '%s'.",
+                    device_class,
+                    file_name,
+                    mode,
+                )
+                return False
+
+            for level, keys in zip(modes_list[1:], states):
+                for key in keys:
+                    if level == "temperature" and key != "-":
+                        try:
+                            valid = (
+                                precision_round(key, check_data["precision"])
+                                in modes_used[level]
+                            )
+                        except ValueError:
+                            valid = False
+                    else:
+                        valid = key == "-" or key in modes_used[level]
+                    if not valid:
+                        _LOGGER.error(
+                            "Invalid %s device JSON file '%s': not defined '%s' mode '%s' generator state used.",
+                            device_class,
+                            file_name,
+                            level,
+                            key,
+                        )
+                        return False
+
+        invalid = [
+            mode for mode in spec["states"] if mode not in modes_used["operation"]
+        ]
+        if invalid:
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': operation mode '%s' is not defined, but it is used in generator.",
+                device_class,
+                file_name,
+                invalid[0],
+            )
+            return False
+
+        try:
+            generator = ProtocolGenerator(spec, device_data["supportedController"])
+            for mode, states in spec["states"].items():
+                generator.bits([mode] + [keys[0] for keys in states])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            _LOGGER.error(
+                "Invalid %s device JSON file '%s': invalid attribute 'commandsGenerator', '%s'.",
+                device_class,
+                file_name,
+                e,
+            )
+            return False
+
+        return True
+
+    @staticmethod
+    def from_generator(device_data: dict, materialize=False) -> dict:
+        """Replace generator definition by the lazy (or enumerated) commands."""
+        if "commandsGenerator" not in device_data:
+            return device_data
+
+        generator = ProtocolGenerator(
+            device_data["commandsGenerator"], device_data["supportedController"]
+        )
+        commands = generator.commands(device_data["commands"])
+        result = {
+            key: value
+            for key, value in device_data.items()
+            if key != "commandsGenerator"
+        }
+        result["commands"] = commands.materialize() if materialize else commands
+        return result
+
     @staticmethod
     def check_file_climate_commands(
         file_name,
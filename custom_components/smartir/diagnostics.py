@@ -0,0 +1,80 @@
+"""Diagnostics support for SmartIR."""
+
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .blaster_queue import async_get_blaster_queues
+from .blocking import blocking_reports
+from .codes_archive import index_cache_stats
+from .device_data import DeviceData
+from .metrics import SendMetrics
+from .smartir_entity import async_get_device_files, async_get_entities
+from .tracing import trace_levels
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry.
+
+    The entities of the entry are reported in detail, the device files,
+    caches, interned frames, controllers and blaster queues of all SmartIR
+    entities globally. Everything is read from counters kept while
+    running, the report walks each commands table once.
+    """
+    entities = {}
+    controllers = {}
+    registry = {}
+    for entity_id, entity in async_get_entities(hass).items():
+        metrics = entity.metrics()
+        if metrics is not None:
+            controllers.setdefault(entity._supported_controller, SendMetrics()).merge(
+                metrics
+            )
+        registry.setdefault(
+            str(entity.blaster()[1]),
+            {"controller": entity._supported_controller, "entities": []},
+        )["entities"].append(entity_id)
+
+        platform = getattr(entity, "platform", None)
+        if platform is None or platform.config_entry is None:
+            continue
+        if platform.config_entry.entry_id != entry.entry_id:
+            continue
+        entities[entity_id] = {
+            "device_code": entity._device_code,
+            "device_file": f"{platform.domain}/{entity._device_code}.json",
+            "supported_controller": entity._supported_controller,
+            "commands_encoding": entity._commands_encoding,
+            "memory": entity.memory_report(),
+            "caches": entity.cache_stats(),
+            "sends": entity.send_stats(),
+            "normalization": entity.normalize_stats(),
+            "metrics": metrics.report() if metrics is not None else None,
+        }
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "platform": entry.data.get("platform"),
+            "device_code": entry.data.get("device_code"),
+        },
+        "entities": entities,
+        "device_files": async_get_device_files(hass),
+        "caches": {"archive_index": index_cache_stats()},
+        "interned_pool": DeviceData.interned_pool(
+            entity._commands for entity in async_get_entities(hass).values()
+        ),
+        "controller_registry": registry,
+        "blasters": {
+            str(blaster[1]): queue.stats()
+            for blaster, queue in async_get_blaster_queues(hass).items()
+        },
+        "controllers": {
+            controller: metrics.report() for controller, metrics in controllers.items()
+        },
+        "tracing": trace_levels(),
+        "blocking": blocking_reports(),
+    }
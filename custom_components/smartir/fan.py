@@ -1,5 +1,5 @@
-import asyncio
 import logging
+from collections.abc import Mapping
 
 import voluptuous as vol
 
@@ -18,7 +18,13 @@ from homeassistant.util.percentage import (
     ordered_list_item_to_percentage,
     percentage_to_ordered_list_item,
 )
-from .smartir_entity import load_device_data_file, SmartIR, PLATFORM_SCHEMA
+from .device_data import DeviceData
+from .smartir_entity import (
+    entry_config,
+    load_device_data_file,
+    SmartIR,
+    PLATFORM_SCHEMA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,51 +39,27 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 )
 
 
-from __future__ import annotations
-
-import logging
-
-from homeassistant.components.fan import FanEntity, PLATFORM_SCHEMA
-from homeassistant.const import (
-    CONF_NAME,
-    CONF_UNIQUE_ID,
-    CONF_DEVICE_CODE,
-    CONF_CONTROLLER_DATA,
-)
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.restore_state import RestoreEntity
-from .smartir_entity import SmartIRFan  # Your existing class
-
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup_entry(hass: HomeAssistant, entry) -> bool:
-    """Set up a fan device from a config‑entry."""
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> None:
+    """Set up a fan device from a config entry."""
     _LOGGER.debug("Setting up SmartIR Fan entity for %s", entry.title)
 
-    # Load the same device data that the old YAML code used
-    device_data = await load_device_data_file(
-        entry.data,
-        "fan",
-        {
-            "speed": [mode for mode in speed if mode != speed.OFF],
-        },
-        hass,
-    )
+    config = entry_config(entry)
+    device_data = await load_device_data_file(config, "fan", {}, hass)
     if not device_data:
         _LOGGER.error("Could not load fan data for %s", entry.title)
-        return False
+        return
 
-    # Pass the config entry data to the existing SmartIRFan class
-    entity = SmartIRFan(hass, entry.data, device_data)
-    hass.async_create_task(
-        hass.helpers.entity_platform.async_add_entities([entity], True)
-    )
-    return True
+    entity = SmartIRFan(hass, config, device_data)
+    async_add_entities([entity], True)
 
 
-class SmartIRFan(FanEntity, RestoreEntity):
+class SmartIRFan(SmartIR, FanEntity, RestoreEntity):
     _enable_turn_on_off_backwards_compatibility = False
+    _state_attrs = SmartIR._state_attrs + (
+        "_speed",
+        "_current_direction",
+        "_oscillating",
+    )
 
     def __init__(self, hass: HomeAssistant, config: ConfigType, device_data):
         # Initialize SmartIR device
@@ -111,6 +93,25 @@ class SmartIRFan(FanEntity, RestoreEntity):
             self._oscillating = False
             self._support_flags = self._support_flags | FanEntityFeature.OSCILLATE
 
+    def _reachable_commands(self, config, device_data):
+        """Return power, oscillation and direction commands for declared speeds."""
+        return DeviceData.prune_commands(
+            device_data["commands"],
+            [
+                set(
+                    [
+                        "on",
+                        "off",
+                        "oscillate",
+                        "default",
+                        DIRECTION_FORWARD,
+                        DIRECTION_REVERSE,
+                    ]
+                ),
+                set(device_data["speed"]),
+            ],
+        )
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
@@ -185,7 +186,7 @@ class SmartIRFan(FanEntity, RestoreEntity):
             state = STATE_ON
             speed = percentage_to_ordered_list_item(self._speed_list, percentage)
 
-        await self._send_command(
+        await self._async_send_state(
             state, speed, self._current_direction, self._oscillating
         )
 
@@ -194,7 +195,7 @@ class SmartIRFan(FanEntity, RestoreEntity):
         if not self._support_flags & FanEntityFeature.OSCILLATE:
             return
 
-        await self._send_command(
+        await self._async_send_state(
             self._state, self._speed, self._current_direction, oscillating
         )
 
@@ -203,7 +204,9 @@ class SmartIRFan(FanEntity, RestoreEntity):
         if not self._support_flags & FanEntityFeature.DIRECTION:
             return
 
-        await self._send_command(self._state, self._speed, direction, self._oscillating)
+        await self._async_send_state(
+            self._state, self._speed, direction, self._oscillating
+        )
 
     async def async_turn_on(
         self, percentage: int = None, preset_mode: str = None, **kwargs
@@ -220,6 +223,9 @@ class SmartIRFan(FanEntity, RestoreEntity):
 
     async def _send_command(self, state, speed, direction, oscillate):
         async with self._temp_lock:
+            request = (state, speed, direction, oscillate)
+            if self._is_redundant_send(request):
+                return True
 
             if self._power_sensor and self._state != state:
                 self._async_power_sensor_check_schedule(state)
@@ -243,11 +249,10 @@ class SmartIRFan(FanEntity, RestoreEntity):
                             )
                         else:
                             _LOGGER.debug("Found 'off' operation mode command.")
-                            await self._controller.send(self._commands["off"])
-                            await asyncio.sleep(self._delay)
+                            await self._async_transmit(self._commands["off"], state)
                     else:
                         _LOGGER.error("Missing device IR code for 'off' mode.")
-                        return
+                        return False
                 else:
                     if "on" in self._commands.keys() and isinstance(
                         self._commands["on"], str
@@ -267,44 +272,50 @@ class SmartIRFan(FanEntity, RestoreEntity):
                         else:
                             # if on code is not present, the on bit can be still set later in the all operation/fan codes"""
                             _LOGGER.debug("Found 'on' operation mode command.")
-                            await self._controller.send(self._commands["on"])
-                            await asyncio.sleep(self._delay)
+                            await self._async_transmit(self._commands["on"], state)
 
                     if oscillate:
                         if "oscillate" in self._commands:
-                            await self._controller.send(self._commands["oscillate"])
-                            await asyncio.sleep(self._delay)
+                            await self._async_transmit(
+                                self._commands["oscillate"], state
+                            )
                         else:
                             _LOGGER.error(
                                 "Missing device IR code for 'oscillate' mode."
                             )
-                            return
+                            return False
                     else:
                         if (
                             direction in self._commands
-                            and isinstance(self._commands[direction], dict)
+                            and isinstance(self._commands[direction], Mapping)
                             and speed in self._commands[direction]
                         ):
-                            await self._controller.send(
-                                self._commands[direction][speed]
+                            await self._async_transmit(
+                                self._commands[direction][speed], state
                             )
-                            await asyncio.sleep(self._delay)
                         else:
                             _LOGGER.error(
                                 "Missing device IR code for direction '%s' speed '%s'.",
                                 direction,
                                 speed,
                             )
-                            return
+                            return False
 
-                self._state = state
-                self._speed = speed
-                self._on_by_remote = False
-                self._current_direction = direction
-                self._oscillating = oscillate
+                self._record_send(request)
+                await self._async_apply_state(state, speed, direction, oscillate)
                 self.async_write_ha_state()
+                return True
 
             except Exception as e:
                 _LOGGER.exception(
                     "Exception raised in the in the _send_command '%s'", e
                 )
+                return False
+
+    async def _async_apply_state(self, state, speed, direction, oscillate):
+        """Set the entity state attributes from the sent state."""
+        self._state = state
+        self._speed = speed
+        self._on_by_remote = False
+        self._current_direction = direction
+        self._oscillating = oscillate
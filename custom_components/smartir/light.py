@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from collections.abc import Mapping
 
 import voluptuous as vol
 
@@ -14,8 +15,17 @@ from homeassistant.core import HomeAssistant, Event, EventStateChangedData
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType
+from .light_planner import STEP_DOWN, STEP_UP, LevelPlanner
+from .protocol_generator import decode_frame
 from .smartir_helpers import closest_match_index
-from .smartir_entity import load_device_data_file, SmartIR, PLATFORM_SCHEMA
+from .device_data import DeviceData
+from .blocking import detect_blocking
+from .smartir_entity import (
+    entry_config,
+    load_device_data_file,
+    SmartIR,
+    PLATFORM_SCHEMA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,51 +46,21 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
 )
 
 
-"""Climate platform that uses config‑entries."""
-from __future__ import annotations
-
-import logging
-
-from homeassistant.components.light import LightEntity, PLATFORM_SCHEMA
-from homeassistant.const import (
-    CONF_NAME,
-    CONF_UNIQUE_ID,
-    CONF_DEVICE_CODE,
-    CONF_CONTROLLER_DATA,
-)
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.restore_state import RestoreEntity
-from .smartir_entity import SmartIRLight  # Your existing class
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> None:
+    """Set up a light device from a config entry."""
+    _LOGGER.debug("Setting up SmartIR Light entity for %s", entry.title)
 
-_LOGGER = logging.getLogger(__name__)
-
-
-async def async_setup_entry(hass: HomeAssistant, entry) -> bool:
-    """Set up a climate device from a config‑entry."""
-    _LOGGER.debug("Setting up SmartIR Climate entity for %s", entry.title)
-
-    # Load the same device data that the old YAML code used
-    device_data = await load_device_data_file(
-        entry.data,
-        "light",
-        {
-            "light_modes": [mode for mode in LIGHT_MODES if mode != LIGHTMode.OFF],
-        },
-        hass,
-    )
+    config = entry_config(entry)
+    device_data = await load_device_data_file(config, "light", {}, hass)
     if not device_data:
-        _LOGGER.error("Could not load climate data for %s", entry.title)
-        return False
+        _LOGGER.error("Could not load light data for %s", entry.title)
+        return
 
-    # Pass the config entry data to the existing SmartIRClimate class
-    entity = SmartIRLight(hass, entry.data, device_data)
-    hass.async_create_task(
-        hass.helpers.entity_platform.async_add_entities([entity], True)
-    )
-    return True
+    entity = SmartIRLight(hass, config, device_data)
+    async_add_entities([entity], True)
 
 
-class SmartIRLight(LightEntity, RestoreEntity):
+class SmartIRLight(SmartIR, LightEntity, RestoreEntity):
 
     def __init__(self, hass: HomeAssistant, config: ConfigType, device_data):
         # Initialize SmartIR device
@@ -89,8 +69,10 @@ class SmartIRLight(LightEntity, RestoreEntity):
         self._brightness = None
         self._colortemp = None
 
-        self._brightnesses = device_data["brightness"]
-        self._colortemps = device_data["colorTemperature"]
+        self._step_task = None
+
+        self._brightnesses = list(device_data.get("brightness", []))
+        self._colortemps = list(device_data.get("colorTemperature", []))
 
         if CMD_COLOR_TEMPERATURE in self._commands or (
             CMD_COLOR_MODE_COLDER in self._commands
@@ -118,6 +100,81 @@ class SmartIRLight(LightEntity, RestoreEntity):
         elif CMD_POWER_OFF in self._commands and CMD_POWER_ON in self._commands:
             self._attr_supported_color_modes = [ColorMode.ONOFF]
 
+        # level planners, the device level is unknown until restored
+        self._colortemp_planner, self._colortemp_frames = self._level_planner(
+            self._colortemps,
+            CMD_COLOR_TEMPERATURE,
+            CMD_COLOR_MODE_COLDER,
+            CMD_COLOR_MODE_WARMER,
+        )
+        self._brightness_planner, self._brightness_frames = self._level_planner(
+            self._brightnesses,
+            CMD_BRIGHTNESS,
+            CMD_BRIGHTNESS_INCREASE,
+            CMD_BRIGHTNESS_DECREASE,
+        )
+
+    def _level_planner(self, values, cmd_absolute, cmd_up, cmd_down):
+        """Return planner for the level values and frames of its actions."""
+        absolute = {}
+        if isinstance(self._commands.get(cmd_absolute), Mapping):
+            for index, value in enumerate(values):
+                if str(value) in self._commands[cmd_absolute]:
+                    absolute[index] = self._commands[cmd_absolute][str(value)]
+        frames = dict(absolute)
+        stepping = cmd_up in self._commands and cmd_down in self._commands
+        if stepping:
+            frames[STEP_UP] = self._commands[cmd_up]
+            frames[STEP_DOWN] = self._commands[cmd_down]
+
+        # plan for least airtime if all frames can be decoded, else for
+        # fewest frames
+        try:
+            costs = {
+                action: sum(
+                    sum(
+                        decode_frame(
+                            frame, self._supported_controller, self._commands_encoding
+                        )
+                    )
+                    for frame in (command if isinstance(command, tuple) else [command])
+                )
+                for action, command in frames.items()
+            }
+        except Exception:
+            costs = None
+
+        return LevelPlanner(len(values), absolute.keys(), costs, stepping), frames
+
+    def _reachable_commands(self, config, device_data):
+        """Return light commands, absolute levels only for declared values."""
+        commands = DeviceData.prune_commands(
+            device_data["commands"],
+            [
+                set(
+                    [
+                        CMD_POWER_ON,
+                        CMD_POWER_OFF,
+                        CMD_NIGHTLIGHT,
+                        CMD_BRIGHTNESS_INCREASE,
+                        CMD_BRIGHTNESS_DECREASE,
+                        CMD_COLOR_MODE_COLDER,
+                        CMD_COLOR_MODE_WARMER,
+                        CMD_BRIGHTNESS,
+                        CMD_COLOR_TEMPERATURE,
+                    ]
+                )
+            ],
+        )
+        for cmd, attr in [
+            (CMD_BRIGHTNESS, "brightness"),
+            (CMD_COLOR_TEMPERATURE, "colorTemperature"),
+        ]:
+            if isinstance(commands.get(cmd), Mapping):
+                values = set(str(value) for value in device_data.get(attr, []))
+                commands[cmd] = DeviceData.prune_commands(commands[cmd], [values])
+        return commands
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
@@ -126,8 +183,16 @@ class SmartIRLight(LightEntity, RestoreEntity):
         if last_state is not None:
             if ATTR_BRIGHTNESS in last_state.attributes:
                 self._brightness = last_state.attributes[ATTR_BRIGHTNESS]
+                if self._brightnesses and self._brightness is not None:
+                    self._brightness_planner.reset(
+                        closest_match_index(self._brightness, self._brightnesses)
+                    )
             if ATTR_COLOR_TEMP_KELVIN in last_state.attributes:
                 self._colortemp = last_state.attributes[ATTR_COLOR_TEMP_KELVIN]
+                if self._colortemps and self._colortemp is not None:
+                    self._colortemp_planner.reset(
+                        closest_match_index(self._colortemp, self._colortemps)
+                    )
 
     @property
     def color_mode(self):
@@ -175,7 +240,9 @@ class SmartIRLight(LightEntity, RestoreEntity):
             "commands_encoding": self._commands_encoding,
         }
 
+    @detect_blocking
     async def async_turn_on(self, **params):
+        await self._async_cancel_steps()
         did_something = False
         # Turn the light on if off
         if self._state != STATE_ON and not self._on_by_remote:
@@ -201,42 +268,22 @@ class SmartIRLight(LightEntity, RestoreEntity):
         ):
             did_something = True
             target = params.get(ATTR_COLOR_TEMP_KELVIN)
-            old_color_temp = closest_match_index(self._colortemp, self._colortemps)
             new_color_temp = closest_match_index(target, self._colortemps)
-            final_color_temp = f"{self._colortemps[new_color_temp]}"
-            if (
-                CMD_COLOR_TEMPERATURE in self._commands
-                and isinstance(self._commands[CMD_COLOR_TEMPERATURE], dict)
-                and final_color_temp in self._commands[CMD_COLOR_TEMPERATURE]
+            plan = self._colortemp_planner.plan(new_color_temp)
+            _LOGGER.debug(
+                "Changing color temp from %sK to %sK with plan %s",
+                self._colortemp,
+                target,
+                plan,
+            )
+            if not await self._async_send_plan(
+                plan,
+                self._colortemp_planner,
+                self._colortemp_frames,
+                "_colortemp",
+                self._colortemps,
             ):
-                _LOGGER.debug(
-                    f"Changing color temp from {self._colortemp}K to {target}K using found remote command for {final_color_temp}K"
-                )
-                found_command = self._commands[CMD_COLOR_TEMPERATURE][final_color_temp]
-                self._colortemp = self._colortemps[new_color_temp]
-                await self.send_remote_command(found_command)
-            else:
-                _LOGGER.debug(
-                    f"Changing color temp from {self._colortemp}K step {old_color_temp} to {target}K step {new_color_temp}"
-                )
-                steps = new_color_temp - old_color_temp
-                if steps < 0:
-                    cmd = CMD_COLOR_MODE_WARMER
-                    steps = abs(steps)
-                else:
-                    cmd = CMD_COLOR_MODE_COLDER
-
-                if steps > 0 and cmd:
-                    # If we are heading for the highest or lowest value,
-                    # take the opportunity to resync by issuing enough
-                    # commands to go the full range.
-                    if (
-                        new_color_temp == len(self._colortemps) - 1
-                        or new_color_temp == 0
-                    ):
-                        steps = len(self._colortemps)
-                    self._colortemp = self._colortemps[new_color_temp]
-                    await self.send_command(cmd, steps)
+                return
 
         if ATTR_BRIGHTNESS in params and self._support_brightness:
             # before checking the supported brightnesses, make a special case
@@ -246,48 +293,28 @@ class SmartIRLight(LightEntity, RestoreEntity):
                 self._state = STATE_ON
                 did_something = True
                 await self.send_command(CMD_NIGHTLIGHT)
+                # the stepped level after nightlight is device specific
+                self._brightness_planner.reset()
 
             elif self._brightnesses:
                 did_something = True
                 target = params.get(ATTR_BRIGHTNESS)
-                old_brightness = closest_match_index(
-                    self._brightness, self._brightnesses
-                )
                 new_brightness = closest_match_index(target, self._brightnesses)
-                final_brightness = f"{self._brightnesses[new_brightness]}"
-                if (
-                    CMD_BRIGHTNESS in self._commands
-                    and isinstance(self._commands[CMD_BRIGHTNESS], dict)
-                    and final_brightness in self._commands[CMD_BRIGHTNESS]
+                plan = self._brightness_planner.plan(new_brightness)
+                _LOGGER.debug(
+                    "Changing brightness from %s to %s with plan %s",
+                    self._brightness,
+                    target,
+                    plan,
+                )
+                if not await self._async_send_plan(
+                    plan,
+                    self._brightness_planner,
+                    self._brightness_frames,
+                    "_brightness",
+                    self._brightnesses,
                 ):
-                    _LOGGER.debug(
-                        f"Changing brightness from {self._brightness} to {target} using found remote command for {final_brightness}"
-                    )
-                    found_command = self._commands[CMD_BRIGHTNESS][final_brightness]
-                    self._brightness = self._brightnesses[new_brightness]
-                    await self.send_remote_command(found_command)
-                else:
-                    _LOGGER.debug(
-                        f"Changing brightness from {self._brightness} step {old_brightness} to {target} step {new_brightness}"
-                    )
-                    steps = new_brightness - old_brightness
-                    if steps < 0:
-                        cmd = CMD_BRIGHTNESS_DECREASE
-                        steps = abs(steps)
-                    else:
-                        cmd = CMD_BRIGHTNESS_INCREASE
-
-                    if steps > 0 and cmd:
-                        # If we are heading for the highest or lowest value,
-                        # take the opportunity to resync by issuing enough
-                        # commands to go the full range.
-                        if (
-                            new_brightness == len(self._brightnesses) - 1
-                            or new_brightness == 0
-                        ):
-                            steps = len(self._brightnesses)
-                        self._brightness = self._brightnesses[new_brightness]
-                        await self.send_command(cmd, steps)
+                    return
 
         # If we did nothing above, and the light is not detected as on
         # already issue the on command, even though we think the light
@@ -301,12 +328,25 @@ class SmartIRLight(LightEntity, RestoreEntity):
 
         self.async_write_ha_state()
 
+    @detect_blocking
     async def async_turn_off(self):
+        await self._async_cancel_steps()
         if self._state != STATE_OFF:
             self._state = STATE_OFF
             await self.send_command(CMD_POWER_OFF)
             self.async_write_ha_state()
 
+    async def async_off_prepare(self):
+        """Stop the step sequence holding the entity lock."""
+        await self._async_cancel_steps()
+
+    async def async_off_frame(self):
+        """Stop the step sequence and return the 'off' frames."""
+        await self._async_cancel_steps()
+        if self._state == STATE_OFF:
+            return None
+        return self._commands.get(CMD_POWER_OFF)
+
     async def async_toggle(self):
         await (self.async_turn_on() if not self.is_on else self.async_turn_off())
 
@@ -316,14 +356,68 @@ class SmartIRLight(LightEntity, RestoreEntity):
             return
         _LOGGER.debug(f"Sending {cmd} remote command {count} times.")
         remote_cmd = self._commands.get(cmd)
-        await self.send_remote_command(remote_cmd, count)
+        state = STATE_OFF if cmd == CMD_POWER_OFF else STATE_ON
+        await self.send_remote_command(remote_cmd, count, state)
+
+    async def _async_cancel_steps(self):
+        """Cancel the in-flight step sequence and wait until it stopped."""
+        task = self._step_task
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.wait([task])
+
+    async def _async_send_plan(self, plan, planner, frames, attr, values):
+        """Send planned level commands as a cancellable task.
+
+        The 'attr' value follows the commands actually emitted, so a new
+        target can re-plan from the position reached. Return False if
+        the sequence was cancelled by a newer request.
+        """
+        if not plan:
+            return True
+        task = self.hass.async_create_task(
+            self._async_step(plan, planner, frames, attr, values)
+        )
+        self._step_task = task
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+        await asyncio.wait([task])
+        if self._step_task is task:
+            self._step_task = None
+        return not task.cancelled()
+
+    @detect_blocking
+    async def _async_step(self, plan, planner, frames, attr, values):
+        def emitted(action):
+            planner.apply(action)
+            setattr(self, attr, values[planner.position])
+
+        async with self._temp_lock:
+            self._on_by_remote = False
+            try:
+                for action in plan:
+                    send = self.hass.async_create_task(
+                        self._async_transmit(frames[action])
+                    )
+                    try:
+                        await asyncio.shield(send)
+                    except asyncio.CancelledError:
+                        # the frame is already on its way, account for it
+                        await asyncio.wait([send])
+                        if not send.cancelled() and send.exception() is None:
+                            emitted(action)
+                        raise
+                    emitted(action)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _LOGGER.exception(e)
 
-    async def send_remote_command(self, remote_cmd, count=1):
+    async def send_remote_command(self, remote_cmd, count=1, state=STATE_ON):
         async with self._temp_lock:
             self._on_by_remote = False
             try:
                 for _ in range(count):
-                    await self._controller.send(remote_cmd)
-                    await asyncio.sleep(self._delay)
+                    await self._async_transmit(remote_cmd, state)
             except Exception as e:
                 _LOGGER.exception(e)
@@ -0,0 +1,133 @@
+"""Minimal cost planner for stepped light levels.
+
+A light level (brightness or colour temperature) is tracked as a
+confidence window of level indexes the device can be at. Step commands
+move the window and saturate at both ends of the range, which collapses
+it, absolute codes collapse it to a single level. The planner searches
+the cheapest sequence of commands that leaves the window exactly at the
+target level, so a resync is only sent when the window is not exact.
+"""
+
+import heapq
+
+STEP_UP = "up"
+STEP_DOWN = "down"
+
+# step frames sent without confirmation before the window widens by one
+# level on both sides, to account for lost frames
+DEFAULT_DRIFT_STEPS = 64
+
+
+class LevelPlanner:
+    """Plan and track commands moving a light level to a target index."""
+
+    def __init__(
+        self,
+        count,
+        absolute=(),
+        costs=None,
+        stepping=True,
+        drift_steps=DEFAULT_DRIFT_STEPS,
+    ):
+        """Create planner for 'count' levels.
+
+        'absolute' are the level indexes with absolute command, 'costs'
+        maps STEP_UP, STEP_DOWN and absolute indexes to the command cost,
+        every command costs 1 frame by default. Without 'stepping' only
+        the absolute commands are planned.
+        """
+        self.count = count
+        self.absolute = frozenset(absolute)
+        self.costs = costs or {}
+        self.stepping = stepping
+        self.drift_steps = drift_steps
+        self.window = (0, count - 1)
+        self.unconfirmed = 0
+
+    @property
+    def known(self):
+        return self.window[0] == self.window[1]
+
+    @property
+    def position(self):
+        """Return the most likely level index."""
+        return (self.window[0] + self.window[1]) // 2
+
+    def reset(self, index=None):
+        """Set the level as known index, or unknown if index is None."""
+        if index is None:
+            self.window = (0, self.count - 1)
+        else:
+            self.window = (index, index)
+        self.unconfirmed = 0
+
+    def _cost(self, action):
+        return self.costs.get(action, 1)
+
+    def _move(self, window, action):
+        lo, hi = window
+        if action == STEP_UP:
+            return (min(lo + 1, self.count - 1), min(hi + 1, self.count - 1))
+        if action == STEP_DOWN:
+            return (max(lo - 1, 0), max(hi - 1, 0))
+        return (action, action)
+
+    def plan(self, target):
+        """Return the cheapest list of actions reaching the target index.
+
+        Actions are STEP_UP, STEP_DOWN or an absolute level index.
+        """
+        if self.count <= 0 or not 0 <= target < self.count:
+            return []
+        goal = (target, target)
+        if self.window == goal:
+            return []
+
+        actions = sorted(self.absolute)
+        if self.stepping:
+            actions = [STEP_UP, STEP_DOWN] + actions
+        start = self.window
+        costs = {start: 0}
+        previous = {}
+        queue = [(0, start)]
+        while queue:
+            cost, window = heapq.heappop(queue)
+            if window == goal:
+                break
+            if cost > costs[window]:
+                continue
+            for action in actions:
+                moved = self._move(window, action)
+                moved_cost = cost + self._cost(action)
+                if moved_cost < costs.get(moved, float("inf")):
+                    costs[moved] = moved_cost
+                    previous[moved] = (window, action)
+                    heapq.heappush(queue, (moved_cost, moved))
+
+        if goal not in previous:
+            return []
+        plan = []
+        window = goal
+        while window != start:
+            window, action = previous[window]
+            plan.append(action)
+        plan.reverse()
+        return plan
+
+    def apply(self, action):
+        """Update the window after the action command was emitted."""
+        before = self.window
+        self.window = self._move(before, action)
+        if action not in (STEP_UP, STEP_DOWN) or (
+            # saturated at the end of the range
+            self.known
+            and (before[0] != before[1] or before == self.window)
+        ):
+            self.unconfirmed = 0
+            return
+
+        self.unconfirmed += 1
+        if self.drift_steps and self.unconfirmed >= self.drift_steps:
+            lo, hi = self.window
+            self.window = (max(lo - 1, 0), min(hi + 1, self.count - 1))
+            self.unconfirmed = 0
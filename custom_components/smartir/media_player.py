@@ -1,5 +1,5 @@
-import asyncio
 import logging
+from collections.abc import Mapping
 
 import voluptuous as vol
 
@@ -13,7 +13,13 @@ from homeassistant.core import HomeAssistant, Event, EventStateChangedData
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType
-from .smartir_entity import load_device_data_file, SmartIR, PLATFORM_SCHEMA
+from .device_data import DeviceData
+from .smartir_entity import (
+    entry_config,
+    load_device_data_file,
+    SmartIR,
+    PLATFORM_SCHEMA,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,52 +37,22 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     }
 )
 
-# custom_components/smartir/climate.py
-"""Climate platform that uses config‑entries."""
-from __future__ import annotations
-
-import logging
-
-from homeassistant.components.media_player import MediaPlayerEntity, PLATFORM_SCHEMA
-from homeassistant.const import (
-    CONF_NAME,
-    CONF_UNIQUE_ID,
-    CONF_DEVICE_CODE,
-    CONF_CONTROLLER_DATA,
-)
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.restore_state import RestoreEntity
-from .smartir_entity import SmartIRMediaPlayer  # Your existing class
-
-_LOGGER = logging.getLogger(__name__)
-
 
-async def async_setup_entry(hass: HomeAssistant, entry) -> bool:
-    """Set up a climate device from a config‑entry."""
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> None:
+    """Set up a media player device from a config entry."""
     _LOGGER.debug("Setting up SmartIR Media Player entity for %s", entry.title)
 
-    # Load the same device data that the old YAML code used
-    device_data = await load_device_data_file(
-        entry.data,
-        "climate",
-        {
-            "hvac_modes": [mode for mode in HVAC_MODES if mode != HVACMode.OFF],
-        },
-        hass,
-    )
+    config = entry_config(entry)
+    device_data = await load_device_data_file(config, "media_player", {}, hass)
     if not device_data:
-        _LOGGER.error("Could not load Media Player data for %s", entry.title)
-        return False
+        _LOGGER.error("Could not load media player data for %s", entry.title)
+        return
 
-    # Pass the config entry data to the existing SmartIRClimate class
-    entity = SmartIRMediaPlayer(hass, entry.data, device_data)
-    hass.async_create_task(
-        hass.helpers.entity_platform.async_add_entities([entity], True)
-    )
-    return True
+    entity = SmartIRMediaPlayer(hass, config, device_data)
+    async_add_entities([entity], True)
 
 
-class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
+class SmartIRMediaPlayer(SmartIR, MediaPlayerEntity, RestoreEntity):
 
     def __init__(self, hass: HomeAssistant, config: ConfigType, device_data):
         # Initialize SmartIR device
@@ -132,19 +108,39 @@ class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
                 | MediaPlayerEntityFeature.PLAY_MEDIA
             )
 
-            for source, new_name in config.get(CONF_SOURCE_NAMES, {}).items():
-                if source in self._commands["sources"]:
-                    if new_name is not None:
-                        self._commands["sources"][new_name] = self._commands["sources"][
-                            source
-                        ]
-
-                    del self._commands["sources"][source]
-
             # Sources list
             for key in self._commands["sources"]:
                 self._sources_list.append(key)
 
+    def _reachable_commands(self, config, device_data):
+        """Return media player commands with sources renamed by the config."""
+        commands = DeviceData.prune_commands(
+            device_data["commands"],
+            [
+                set(
+                    [
+                        "on",
+                        "off",
+                        "previousChannel",
+                        "nextChannel",
+                        "volumeDown",
+                        "volumeUp",
+                        "mute",
+                        "sources",
+                    ]
+                )
+            ],
+        )
+        if isinstance(commands.get("sources"), Mapping):
+            sources = dict(commands["sources"])
+            for source, new_name in config.get(CONF_SOURCE_NAMES, {}).items():
+                if source in sources:
+                    if new_name is not None:
+                        sources[new_name] = sources[source]
+                    del sources[source]
+            commands["sources"] = sources
+        return commands
+
     async def async_added_to_hass(self):
         """Run when entity about to be added."""
         await super().async_added_to_hass()
@@ -194,36 +190,36 @@ class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
 
     async def async_turn_off(self):
         """Turn the media player off."""
-        await self._send_command(STATE_OFF, [])
+        await self._async_send_commands((STATE_OFF, []))
 
     async def async_turn_on(self):
         """Turn the media player off."""
-        await self._send_command(STATE_ON, [])
+        await self._async_send_commands((STATE_ON, []))
 
     async def async_media_previous_track(self):
         """Send previous track command."""
-        await self._send_command(self._state, [["previousChannel"]])
+        await self._async_send_commands((self._state, [["previousChannel"]]))
 
     async def async_media_next_track(self):
         """Send next track command."""
-        await self._send_command(self._state, [["nextChannel"]])
+        await self._async_send_commands((self._state, [["nextChannel"]]))
 
     async def async_volume_down(self):
         """Turn volume down for media player."""
-        await self._send_command(self._state, [["volumeDown"]])
+        await self._async_send_commands((self._state, [["volumeDown"]]))
 
     async def async_volume_up(self):
         """Turn volume up for media player."""
-        await self._send_command(self._state, [["volumeUp"]])
+        await self._async_send_commands((self._state, [["volumeUp"]]))
 
     async def async_mute_volume(self, mute):
         """Mute the volume."""
-        await self._send_command(self._state, [["mute"]])
+        await self._async_send_commands((self._state, [["mute"]]))
 
     async def async_select_source(self, source):
         """Select channel from source."""
         self._source = source
-        await self._send_command(self._state, [["sources", source]])
+        await self._async_send_commands((self._state, [["sources", source]]))
 
     async def async_play_media(self, media_type, media_id, **kwargs):
         """Support channel change through play_media service."""
@@ -238,7 +234,12 @@ class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
         commands = []
         for digit in media_id:
             commands.append(["sources", "Channel {}".format(digit)])
-        await self._send_command(STATE_ON, commands)
+        await self._async_send_commands((STATE_ON, commands))
+
+    async def _async_send_commands(self, request):
+        """Send the commands of a service call, return False on failure."""
+        self._send_retries = 0
+        return await self._async_send_request(request)
 
     async def _send_command(self, state, commands):
         async with self._temp_lock:
@@ -265,11 +266,10 @@ class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
                             )
                         else:
                             _LOGGER.debug("Found 'off' operation mode command.")
-                            await self._controller.send(self._commands["off"])
-                            await asyncio.sleep(self._delay)
+                            await self._async_transmit(self._commands["off"], state)
                     else:
                         _LOGGER.error("Missing device IR code for 'off' mode.")
-                        return
+                        return False
                 else:
                     if "on" in self._commands.keys() and isinstance(
                         self._commands["on"], str
@@ -289,42 +289,42 @@ class SmartIRMediaPlayer(MediaPlayerEntity, RestoreEntity):
                         else:
                             # if on code is not present, the on bit can be still set later in the all operation/fan codes"""
                             _LOGGER.debug("Found 'on' operation mode command.")
-                            await self._controller.send(self._commands["on"])
-                            await asyncio.sleep(self._delay)
+                            await self._async_transmit(self._commands["on"], state)
 
                     for keys in commands:
                         data = self._commands
                         for idx in range(len(keys)):
-                            if not (isinstance(data, dict) and keys[idx] in data):
+                            if not (isinstance(data, Mapping) and keys[idx] in data):
                                 _LOGGER.error(
                                     "Missing device IR code for '%s' command.",
                                     keys[idx],
                                 )
-                                return
+                                return False
                             elif idx + 1 == len(keys):
                                 if not isinstance(data[keys[idx]], str):
                                     _LOGGER.error(
                                         "Missing device IR code for '%s' command.",
                                         keys[idx],
                                     )
-                                    return
+                                    return False
                                 else:
-                                    await self._controller.send(data[keys[idx]])
-                                    await asyncio.sleep(self._delay)
-                            elif isinstance(data[keys[idx]], dict):
+                                    await self._async_transmit(data[keys[idx]], state)
+                            elif isinstance(data[keys[idx]], Mapping):
                                 data = data[keys[idx]]
                             else:
                                 _LOGGER.error(
                                     "Missing device IR code for '%s' command.",
                                     keys[idx],
                                 )
-                                return
+                                return False
 
-                self._state = state
-                self._on_by_remote = False
+                self._record_send((state, commands))
+                await self._async_apply_state(state, commands)
                 self.async_write_ha_state()
+                return True
 
             except Exception as e:
                 _LOGGER.exception(
                     "Exception raised in the in the _send_command '%s'", e
                 )
+                return False
@@ -0,0 +1,167 @@
+"""Latency and throughput metrics of the send path.
+
+Metrics are collected per entity when its 'send_metrics' option is set,
+entities without it use a plain lock and skip every measurement. Times
+are kept in fixed log scale histograms, so the memory used doesn't grow
+with the number of sends.
+"""
+
+import asyncio
+import bisect
+import time
+from contextvars import ContextVar
+
+# bucket upper bounds from 0.1 ms growing by 25 %, the last is ~100 s
+HISTOGRAM_BOUNDS = tuple(0.0001 * 1.25**i for i in range(63))
+
+PHASE_TOTAL = "total"
+PHASE_LOCK_WAIT = "lock_wait"
+PHASE_QUEUE_WAIT = "queue_wait"
+PHASE_RESOLVE = "resolve"
+PHASE_CONTROLLER_SEND = "controller_send"
+PHASE_SLEEP = "sleep"
+
+# time spent in measured phases of the request sent by the current task
+_measured = ContextVar("smartir_send_measured", default=None)
+
+PHASES = [
+    PHASE_TOTAL,
+    PHASE_LOCK_WAIT,
+    PHASE_QUEUE_WAIT,
+    PHASE_RESOLVE,
+    PHASE_CONTROLLER_SEND,
+    PHASE_SLEEP,
+]
+
+
+class Histogram:
+    """Log scale histogram of durations in seconds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(HISTOGRAM_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """Return the bucket upper bound of the percentile, None if empty."""
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(HISTOGRAM_BOUNDS):
+                    return min(HISTOGRAM_BOUNDS[index], self.max)
+                return self.max
+        return self.max
+
+    def summary(self):
+        """Return count, mean and percentiles in milliseconds."""
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 2)
+
+        return {
+            "count": self.count,
+            "mean": ms(self.total / self.count) if self.count else None,
+            "p50": ms(self.percentile(50)),
+            "p95": ms(self.percentile(95)),
+            "p99": ms(self.percentile(99)),
+            "max": ms(self.max) if self.count else None,
+        }
+
+
+class SendMetrics:
+    """Send path metrics of one entity."""
+
+    def __init__(self):
+        self.histograms = {phase: Histogram() for phase in PHASES}
+        self.sends = 0
+        self.failures = 0
+        self.frames = 0
+        self.frame_failures = 0
+        self.started = time.monotonic()
+
+    def add(self, phase, duration):
+        self.histograms[phase].add(duration)
+        measured = _measured.get()
+        if measured is not None:
+            measured[0] += duration
+
+    async def async_measure(self, send):
+        """Await the send coroutine of a requested state, time its phases.
+
+        The time not spent waiting for the lock or the blaster, sending
+        or sleeping is resolving the command.
+        """
+        measured = [0.0]
+        token = _measured.set(measured)
+        start = time.perf_counter()
+        sent = False
+        try:
+            sent = await send
+            return sent
+        finally:
+            _measured.reset(token)
+            total = time.perf_counter() - start
+            self.histograms[PHASE_TOTAL].add(total)
+            self.histograms[PHASE_RESOLVE].add(max(total - measured[0], 0.0))
+            self.sends += 1
+            if sent is False:
+                self.failures += 1
+
+    def merge(self, other):
+        for phase, histogram in other.histograms.items():
+            self.histograms[phase].merge(histogram)
+        self.sends += other.sends
+        self.failures += other.failures
+        self.frames += other.frames
+        self.frame_failures += other.frame_failures
+        self.started = min(self.started, other.started)
+
+    def report(self):
+        """Return counters, throughput and phase summaries."""
+        minutes = (time.monotonic() - self.started) / 60
+        return {
+            "sends": self.sends,
+            "failures": self.failures,
+            "frames": self.frames,
+            "frame_failures": self.frame_failures,
+            "frames_per_minute": round(self.frames / minutes, 2) if minutes else 0.0,
+            "phases": {
+                phase: histogram.summary()
+                for phase, histogram in self.histograms.items()
+            },
+        }
+
+
+class TimedLock(asyncio.Lock):
+    """Lock recording the acquire wait time as lock wait metric."""
+
+    def __init__(self, metrics):
+        super().__init__()
+        self._metrics = metrics
+
+    async def acquire(self):
+        start = time.perf_counter()
+        result = await super().acquire()
+        self._metrics.add(PHASE_LOCK_WAIT, time.perf_counter() - start)
+        return result
@@ -0,0 +1,88 @@
+"""On-demand profiling of the SmartIR code running on the event loop.
+
+The profiler records everything the event loop runs while enabled, the
+profile file keeps it all for context. The summary logged and returned
+is restricted to SmartIR functions: entity service handlers, command
+resolution, controller sends and device file loading. Reads done in the
+executor aren't profiled.
+"""
+
+import asyncio
+import logging
+import os.path
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .controller_const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROFILING = "profiling"
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+async def async_profile(hass: HomeAssistant, duration, top) -> dict:
+    """Profile the event loop for the duration, return the SmartIR top.
+
+    The full profile is written in pstats format to the configuration
+    directory, it can be opened with snakeviz or turned into a flame
+    graph with flameprof.
+    """
+    import cProfile
+
+    data = hass.data.setdefault(DOMAIN, {})
+    if data.get(DATA_PROFILING):
+        raise HomeAssistantError("A SmartIR profile is already running")
+
+    data[DATA_PROFILING] = True
+    profiler = cProfile.Profile()
+    try:
+        _LOGGER.info("Profiling SmartIR for %s seconds", duration)
+        profiler.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+    finally:
+        data[DATA_PROFILING] = False
+
+    path = hass.config.path(f"{DOMAIN}_profile_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+    functions = await hass.async_add_executor_job(_dump_profile, profiler, path, top)
+    _LOGGER.warning(
+        "SmartIR profile written to %s, top %d SmartIR functions by cumulative time:\n%s",
+        path,
+        len(functions),
+        "\n".join(
+            f"{function['cumtime']:10.4f} {function['tottime']:10.4f} "
+            f"{function['calls']:8d}  {function['function']}"
+            for function in functions
+        ),
+    )
+    return {"path": path, "duration": duration, "functions": functions}
+
+
+def _dump_profile(profiler, path, top):
+    """Write the profile, return the SmartIR functions of the top."""
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    stats.dump_stats(path)
+
+    functions = [
+        (key, value)
+        for key, value in stats.stats.items()
+        if key[0].startswith(PACKAGE_DIR)
+    ]
+    functions.sort(key=lambda function: function[1][3], reverse=True)
+    return [
+        {
+            "function": f"{os.path.basename(file)}:{line}({name})",
+            "calls": calls,
+            "tottime": round(tottime, 4),
+            "cumtime": round(cumtime, 4),
+        }
+        for (file, line, name), (_, calls, tottime, cumtime, _) in functions[:top]
+    ]
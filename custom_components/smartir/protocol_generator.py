@@ -0,0 +1,525 @@
+"""Protocol generator device definitions.
+
+Many AC remotes send the whole device state as a single pulse distance
+encoded bit field protected by a checksum. Instead of storing every
+recorded frame, such devices can be described by a frame template, bit
+fields for the individual modes and a checksum rule. Frames are then
+synthesized on demand.
+"""
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import reduce
+import itertools
+import json
+import logging
+
+from .controller import Helper
+from .controller_const import (
+    BROADLINK_CONTROLLER,
+    ESPHOME_CONTROLLER,
+    ENC_BASE64,
+    ENC_RAW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PROTOCOL_PULSE_DISTANCE = "pulse_distance"
+
+BIT_ORDER_LSB = "lsb"
+BIT_ORDER_MSB = "msb"
+
+CHECKSUM_SUM = "sum"
+CHECKSUM_XOR = "xor"
+CHECKSUM_NIBBLE = "nibble"
+
+CHECKSUMS = {
+    CHECKSUM_SUM: lambda data: sum(data) & 0xFF,
+    CHECKSUM_XOR: lambda data: reduce(lambda a, b: a ^ b, data, 0),
+    CHECKSUM_NIBBLE: lambda data: sum((b >> 4) + (b & 0x0F) for b in data) & 0xFF,
+}
+
+# controller -> encoding of the synthesized frames
+GENERATOR_SUPPORT = {
+    BROADLINK_CONTROLLER: ENC_BASE64,
+    ESPHOME_CONTROLLER: ENC_RAW,
+}
+
+DEFAULT_CACHE_SIZE = 32
+
+
+def _bits_to_bytes(bits, bit_order):
+    data = []
+    for i in range(0, len(bits) - len(bits) % 8, 8):
+        chunk = bits[i : i + 8]
+        if bit_order == BIT_ORDER_LSB:
+            chunk = chunk[::-1]
+        data.append(reduce(lambda a, b: (a << 1) | b, chunk, 0))
+    return data
+
+
+def _byte_to_bits(value, bit_order):
+    bits = [(value >> (7 - i)) & 1 for i in range(8)]
+    if bit_order == BIT_ORDER_LSB:
+        bits.reverse()
+    return bits
+
+
+def _bits_to_hex(bits):
+    padded = bits + [0] * (-len(bits) % 4)
+    return "".join(
+        "%x" % reduce(lambda a, b: (a << 1) | b, padded[i : i + 4], 0)
+        for i in range(0, len(padded), 4)
+    )
+
+
+def _hex_to_bits(value, count):
+    bits = []
+    for digit in value:
+        nibble = int(digit, 16)
+        bits.extend((nibble >> (3 - i)) & 1 for i in range(4))
+    return bits[:count]
+
+
+def decode_frame(command, controller, encoding):
+    """Decode recorded command into list of pulses in microseconds."""
+    if controller == BROADLINK_CONTROLLER and encoding == ENC_BASE64:
+        return Helper.broadlink2lirc(b64decode(command))
+    if controller == ESPHOME_CONTROLLER and encoding == ENC_RAW:
+        return [abs(int(pulse)) for pulse in json.loads(command)]
+    raise ValueError(f"unsupported {controller} {encoding} frame")
+
+
+def demodulate(pulses):
+    """Split pulses into pulse distance encoded segments.
+
+    Return tuple of (segments, timing) or None if pulses do not look like
+    pulse distance encoding.
+    """
+    import statistics
+
+    if len(pulses) < 4:
+        return None
+    if len(pulses) % 2:
+        pulses = pulses + [0]
+
+    marks = pulses[0::2]
+    bit_mark = statistics.median(marks)
+    spaces = sorted(s for s in pulses[1::2] if s < 4 * bit_mark)
+    if len(spaces) < 2:
+        return None
+
+    # zero and one spaces are split by the biggest step between sorted spaces
+    split = max(range(1, len(spaces)), key=lambda i: spaces[i] - spaces[i - 1])
+    zero_space = statistics.median(spaces[:split])
+    one_space = statistics.median(spaces[split:])
+    if one_space < 1.5 * zero_space:
+        return None
+    threshold = (zero_space + one_space) / 2
+
+    segments = []
+    segment = None
+    for i in range(0, len(pulses), 2):
+        mark = pulses[i]
+        space = pulses[i + 1]
+        if mark > 2.5 * bit_mark:
+            segment = {"header": [mark, space], "bits": [], "trailer": False, "gap": 0}
+            segments.append(segment)
+            continue
+        if segment is None:
+            segment = {"header": None, "bits": [], "trailer": False, "gap": 0}
+            segments.append(segment)
+        if 0 < space < 1.6 * one_space:
+            segment["bits"].append(1 if space > threshold else 0)
+        else:
+            segment["trailer"] = True
+            segment["gap"] = space
+            segment = None
+
+    return segments, {
+        "bitMark": bit_mark,
+        "zeroSpace": zero_space,
+        "oneSpace": one_space,
+    }
+
+
+class ProtocolGenerator:
+    """Synthesize IR frames from a protocol description."""
+
+    def __init__(self, spec, controller, cache_size=DEFAULT_CACHE_SIZE):
+        self._spec = spec
+        self._controller = controller
+        self._levels = spec["levels"]
+        self._bit_order = spec.get("bitOrder", BIT_ORDER_LSB)
+        self._timing = spec["timing"]
+        self._segments = spec["segments"]
+        self._template = []
+        for segment in self._segments:
+            self._template.extend(_hex_to_bits(segment["template"], segment["bits"]))
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def levels(self):
+        return self._levels
+
+    @property
+    def states(self):
+        return self._spec["states"]
+
+    def frame(self, path):
+        """Return the encoded frame for (operation, ..., temperature) path."""
+        path = tuple(path)
+        if path in self._cache:
+            self._cache.move_to_end(path)
+            self.cache_hits += 1
+            return self._cache[path]
+
+        self.cache_misses += 1
+        frame = self._encode(self.pulses(path))
+        self._cache[path] = frame
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return frame
+
+    def bits(self, path):
+        """Return the payload bits for given path."""
+        keys = dict(zip(self._levels, path))
+        bits = list(self._template)
+        for field in self._spec["fields"]:
+            key = "|".join(str(keys[level]) for level in field["levels"])
+            if key not in field["values"]:
+                raise KeyError(f"no '{key}' value for {field['levels']} field")
+            value = field["values"][key]
+            for idx, pos in enumerate(field["bits"]):
+                bits[pos] = (value >> idx) & 1
+
+        offset = 0
+        for segment in self._segments:
+            checksum = segment.get("checksum")
+            if checksum:
+                data = _bits_to_bytes(
+                    bits[offset : offset + segment["bits"]], self._bit_order
+                )
+                value = CHECKSUMS[checksum["type"]](data[: checksum["byte"]])
+                if checksum["type"] == CHECKSUM_XOR:
+                    value ^= checksum.get("offset", 0)
+                else:
+                    value = (value + checksum.get("offset", 0)) & 0xFF
+                start = offset + checksum["byte"] * 8
+                bits[start : start + 8] = _byte_to_bits(value, self._bit_order)
+            offset += segment["bits"]
+        return bits
+
+    def pulses(self, path):
+        """Return the frame pulses in microseconds for given path."""
+        bits = self.bits(path)
+        bit_mark = self._timing["bitMark"]
+        spaces = [self._timing["zeroSpace"], self._timing["oneSpace"]]
+        pulses = []
+        offset = 0
+        for segment in self._segments:
+            if segment.get("header"):
+                pulses.extend(segment["header"])
+            for bit in bits[offset : offset + segment["bits"]]:
+                pulses.append(bit_mark)
+                pulses.append(spaces[bit])
+            offset += segment["bits"]
+            if segment.get("trailer", True):
+                pulses.append(bit_mark)
+                if segment["gap"]:
+                    pulses.append(segment["gap"])
+        return pulses
+
+    def _encode(self, pulses):
+        if self._controller == BROADLINK_CONTROLLER:
+            packet = Helper.lirc2broadlink(pulses)
+            packet[1] = self._spec.get("repeat", 0)
+            return b64encode(packet).decode("utf-8")
+        if self._controller == ESPHOME_CONTROLLER:
+            return json.dumps(
+                [pulse if i % 2 == 0 else -pulse for i, pulse in enumerate(pulses)]
+            )
+        raise ValueError(f"unsupported controller {self._controller}")
+
+    def commands(self, static_commands):
+        """Return lazy climate commands tree."""
+        return GeneratedCommands(self, static_commands)
+
+
+class GeneratedCommands(Mapping):
+    """Read only climate commands tree synthesizing frames on access."""
+
+    def __init__(self, generator, static_commands=None, path=()):
+        self._generator = generator
+        self._static = static_commands or {}
+        self._path = path
+        if path:
+            keys = generator.states[path[0]][len(path) - 1]
+        else:
+            keys = list(self._static) + [
+                mode for mode in generator.states if mode not in self._static
+            ]
+        self._keys = keys
+
+    def __getitem__(self, key):
+        if not self._path and key in self._static:
+            return self._static[key]
+        if key not in self._keys:
+            raise KeyError(key)
+        path = self._path + (key,)
+        if len(path) == len(self._generator.levels):
+            return self._generator.frame(path)
+        return GeneratedCommands(self._generator, None, path)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def static_keys(self):
+        """Return keys of the recorded (not generated) commands."""
+        return list(self._static)
+
+    def generator_stats(self):
+        """Return generator cache statistics."""
+        return {
+            "generator_cache_size": len(self._generator._cache),
+            "generator_cache_hits": self._generator.cache_hits,
+            "generator_cache_misses": self._generator.cache_misses,
+        }
+
+    def materialize(self):
+        """Return fully enumerated commands as nested dicts."""
+        return {
+            key: value.materialize() if isinstance(value, GeneratedCommands) else value
+            for key, value in self.items()
+        }
+
+
+def _leaves(node, path=()):
+    if isinstance(node, Mapping):
+        for key, value in node.items():
+            yield from _leaves(value, path + (key,))
+    else:
+        yield path, node
+
+
+def _find_checksum(frames, byte):
+    for name, func in CHECKSUMS.items():
+        offsets = set()
+        for data in frames:
+            if name == CHECKSUM_XOR:
+                offsets.add(data[byte] ^ func(data[:byte]))
+            else:
+                offsets.add((data[byte] - func(data[:byte])) & 0xFF)
+            if len(offsets) > 1:
+                break
+        if len(offsets) == 1:
+            return {"type": name, "byte": byte, "offset": offsets.pop()}
+    return None
+
+
+def _dependency(values, dimensions):
+    """Return smallest tuple of dimensions the bit value is function of."""
+    for size in (1, 2):
+        for dims in itertools.combinations(range(dimensions), size):
+            seen = {}
+            if all(
+                seen.setdefault(tuple(path[d] for d in dims), value) == value
+                for path, value in values.items()
+            ):
+                return dims
+    return None
+
+
+def fit_generator(device_data, levels):
+    """Try to describe climate device data by a protocol generator.
+
+    Return the 'commandsGenerator' specification or None if the recorded
+    frames can't be reproduced by a generator.
+    """
+    import statistics
+
+    controller = device_data.get("supportedController")
+    encoding = device_data.get("commandsEncoding")
+    if GENERATOR_SUPPORT.get(controller) != encoding:
+        return None
+
+    paths = {}
+    for path, command in _leaves(device_data.get("commands", {})):
+        if len(path) == 1:
+            continue
+        if len(path) != len(levels) or not isinstance(command, str):
+            return None
+        paths[path] = command
+
+    if not paths:
+        return None
+
+    # every recorded frame has to decode into the same layout, the generator
+    # replaces all of them
+    layouts = {}
+    repeats = {}
+    for path, command in paths.items():
+        try:
+            result = demodulate(decode_frame(command, controller, encoding))
+        except Exception:
+            result = None
+        if result is None:
+            return None
+        segments, timing = result
+        layout = tuple(
+            (s["header"] is not None, len(s["bits"]), s["trailer"]) for s in segments
+        )
+        layouts.setdefault(layout, {})[path] = (segments, timing)
+        if controller == BROADLINK_CONTROLLER:
+            repeat = b64decode(command)[1]
+            repeats[repeat] = repeats.get(repeat, 0) + 1
+
+    if len(layouts) != 1:
+        return None
+    layout, decoded = layouts.popitem()
+    if not sum(bits for _, bits, _ in layout):
+        return None
+
+    frames = {
+        path: [bit for segment in segments for bit in segment["bits"]]
+        for path, (segments, _) in decoded.items()
+    }
+    sizes = [bits for _, bits, _ in layout]
+    template = list(next(iter(frames.values())))
+
+    # per operation mode states must be full products of the level keys
+    states = {}
+    for path in paths:
+        mode_states = states.setdefault(path[0], [[] for _ in levels[1:]])
+        for idx, key in enumerate(path[1:]):
+            if key not in mode_states[idx]:
+                mode_states[idx].append(key)
+    for mode, mode_states in states.items():
+        count = 1
+        for keys in mode_states:
+            count *= len(keys)
+        if count != len([path for path in paths if path[0] == mode]):
+            return None
+
+    for bit_order in (BIT_ORDER_LSB, BIT_ORDER_MSB):
+        spec = _fit_fields(frames, sizes, template, levels, bit_order)
+        if spec is not None:
+            break
+    else:
+        return None
+
+    timings = [timing for _, timing in decoded.values()]
+    segments = []
+    offset = 0
+    for idx, (has_header, bits, trailer) in enumerate(layout):
+        segment = {
+            "header": None,
+            "bits": bits,
+            "trailer": trailer,
+            "gap": int(statistics.median(s[idx]["gap"] for s, _ in decoded.values())),
+            "template": _bits_to_hex(template[offset : offset + bits]),
+        }
+        if has_header:
+            segment["header"] = [
+                int(statistics.median(s[idx]["header"][i] for s, _ in decoded.values()))
+                for i in range(2)
+            ]
+        if idx in spec["checksums"]:
+            segment["checksum"] = spec["checksums"][idx]
+        segments.append(segment)
+        offset += bits
+
+    generator = {
+        "protocol": PROTOCOL_PULSE_DISTANCE,
+        "levels": levels,
+        "bitOrder": spec["bitOrder"],
+        "timing": {
+            name: int(statistics.median(timing[name] for timing in timings))
+            for name in ["bitMark", "zeroSpace", "oneSpace"]
+        },
+        "segments": segments,
+        "states": states,
+        "fields": spec["fields"],
+    }
+    if repeats:
+        generator["repeat"] = max(repeats, key=repeats.get)
+
+    # verify every recorded state can be generated and decodes to same bits
+    try:
+        test = ProtocolGenerator(generator, controller)
+        for path in paths:
+            bits = test.bits(path)
+            if bits != frames[path]:
+                return None
+    except KeyError:
+        return None
+
+    return generator
+
+
+def _fit_fields(frames, sizes, template, levels, bit_order):
+    dimensions = len(levels)
+    free = set()
+    dependencies = {}
+    for pos in range(len(template)):
+        values = {path: bits[pos] for path, bits in frames.items()}
+        if len(set(values.values())) == 1:
+            continue
+        dims = _dependency(values, dimensions)
+        if dims is None:
+            free.add(pos)
+        else:
+            dependencies[pos] = dims
+
+    # bits not explained by the mode fields have to be covered by checksums
+    checksums = {}
+    checksum_bits = set()
+    offset = 0
+    for idx, bits in enumerate(sizes):
+        segment_free = sorted(
+            pos - offset for pos in free if offset <= pos < offset + bits
+        )
+        if segment_free:
+            byte = segment_free[0] // 8
+            if segment_free[-1] // 8 != byte or (byte + 1) * 8 > bits:
+                return None
+            checksum = _find_checksum(
+                [
+                    _bits_to_bytes(frame[offset : offset + bits], bit_order)
+                    for frame in frames.values()
+                ],
+                byte,
+            )
+            if checksum is None:
+                return None
+            checksums[idx] = checksum
+            checksum_bits.update(range(offset + byte * 8, offset + byte * 8 + 8))
+        offset += bits
+
+    groups = {}
+    for pos, dims in dependencies.items():
+        if pos not in checksum_bits:
+            groups.setdefault(dims, []).append(pos)
+
+    fields = []
+    for dims, positions in groups.items():
+        values = {}
+        for path, bits in frames.items():
+            key = "|".join(str(path[d]) for d in dims)
+            values[key] = sum(bits[pos] << idx for idx, pos in enumerate(positions))
+        fields.append(
+            {
+                "levels": [levels[d] for d in dims],
+                "bits": positions,
+                "values": values,
+            }
+        )
+
+    return {"bitOrder": bit_order, "checksums": checksums, "fields": fields}
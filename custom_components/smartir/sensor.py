@@ -0,0 +1,127 @@
+"""Diagnostic sensors of the SmartIR send path metrics."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+
+from .metrics import PHASE_LOCK_WAIT, PHASE_TOTAL, PHASES
+from .smartir_entity import CONF_SEND_METRICS, async_get_entities, entry_config
+
+_LOGGER = logging.getLogger(__name__)
+
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SmartIRMetricsSensorDescription(SensorEntityDescription):
+    """Sensor reading one value of the entity metrics."""
+
+    value_fn: Callable[[object], float | int | None]
+
+
+def _p95(phase):
+    return lambda entity: entity.metrics().histograms[phase].summary()["p95"]
+
+
+SENSORS = (
+    SmartIRMetricsSensorDescription(
+        key="send_latency",
+        name="Send latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_p95(PHASE_TOTAL),
+    ),
+    SmartIRMetricsSensorDescription(
+        key="lock_wait",
+        name="Lock wait",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_p95(PHASE_LOCK_WAIT),
+    ),
+    SmartIRMetricsSensorDescription(
+        key="sends",
+        name="Sends",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda entity: entity.metrics().sends,
+    ),
+    SmartIRMetricsSensorDescription(
+        key="send_failures",
+        name="Send failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda entity: entity.metrics().failures,
+    ),
+    SmartIRMetricsSensorDescription(
+        key="sends_skipped",
+        name="Sends skipped",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda entity: entity.send_stats()["skipped"]
+        + entity.send_stats()["superseded"],
+    ),
+)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities) -> None:
+    """Set up the metrics sensors of a config entry with send metrics."""
+    if not entry_config(entry).get(CONF_SEND_METRICS):
+        return
+    _LOGGER.debug("Setting up SmartIR metrics sensors for %s", entry.title)
+    async_add_entities(
+        SmartIRMetricsSensor(hass, entry, description) for description in SENSORS
+    )
+
+
+class SmartIRMetricsSensor(SensorEntity):
+    """Metrics value of the SmartIR entity of a config entry.
+
+    The SmartIR entity is looked up on every update, the sensor is
+    unavailable until the entity is added or after it is removed.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = True
+
+    def __init__(self, hass: HomeAssistant, entry, description):
+        self.hass = hass
+        self.entity_description = description
+        self._entry_id = entry.entry_id
+        self._attr_name = f"{entry.title} {description.name}"
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_available = False
+
+    def _entity(self):
+        """Return the SmartIR entity of the config entry with metrics."""
+        for entity in async_get_entities(self.hass).values():
+            platform = getattr(entity, "platform", None)
+            if platform is None or platform.config_entry is None:
+                continue
+            if platform.config_entry.entry_id != self._entry_id:
+                continue
+            if entity.metrics() is not None:
+                return entity
+        return None
+
+    async def async_update(self):
+        entity = self._entity()
+        self._attr_available = entity is not None
+        if entity is None:
+            return
+        self._attr_native_value = self.entity_description.value_fn(entity)
+        if self.entity_description.key == "send_latency":
+            # percentiles of every phase, the state is the total p95
+            self._attr_extra_state_attributes = {
+                phase: entity.metrics().histograms[phase].summary() for phase in PHASES
+            }
@@ -0,0 +1,234 @@
+"""Domain services of SmartIR."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from .blaster_queue import PRIORITY_OFF, async_get_blaster_queue
+from .blocking import detect_blocking
+from .controller_const import DOMAIN
+from .profiler import async_profile
+from .smartir_entity import async_get_entities
+from .tracing import SCHEDULER
+from .traffic import async_record
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_ALL_OFF = "all_off"
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD = "record"
+
+ATTR_AREA_ID = "area_id"
+ATTR_BLASTER = "blaster"
+ATTR_DURATION = "duration"
+ATTR_TOP = "top"
+
+DEFAULT_PROFILE_DURATION = 30
+DEFAULT_PROFILE_TOP = 20
+DEFAULT_RECORD_DURATION = 300
+
+ALL_OFF_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_AREA_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_BLASTER): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=600)
+        ),
+        vol.Optional(ATTR_TOP, default=DEFAULT_PROFILE_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=200)
+        ),
+    }
+)
+
+RECORD_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=DEFAULT_RECORD_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the SmartIR services."""
+
+    async def _async_all_off(call: ServiceCall) -> ServiceResponse:
+        return await async_all_off(
+            hass, call.data.get(ATTR_AREA_ID), call.data.get(ATTR_BLASTER)
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ALL_OFF,
+        _async_all_off,
+        schema=ALL_OFF_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_profile(call: ServiceCall) -> ServiceResponse:
+        return await async_profile(hass, call.data[ATTR_DURATION], call.data[ATTR_TOP])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _async_record(call: ServiceCall) -> ServiceResponse:
+        return await async_record(hass, call.data[ATTR_DURATION])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RECORD,
+        _async_record,
+        schema=RECORD_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _entity_area(hass: HomeAssistant, entity_id):
+    """Return the area of the entity, or of its device."""
+    entry = er.async_get(hass).async_get(entity_id)
+    if entry is None:
+        return None
+    if entry.area_id:
+        return entry.area_id
+    if entry.device_id:
+        device = dr.async_get(hass).async_get(entry.device_id)
+        if device is not None:
+            return device.area_id
+    return None
+
+
+def _send_config(entity):
+    """Return the configuration of the controller sending the entity frames.
+
+    Only frames sent with the same configuration (target, repeats, delay
+    and encoding) can be batched into one controller send.
+    """
+    return (
+        entity._supported_controller,
+        entity._commands_encoding,
+        tuple(sorted(entity._controller_data.items())),
+    )
+
+
+@detect_blocking
+async def async_all_off(hass: HomeAssistant, areas=None, blasters=None) -> dict:
+    """Turn off the selected SmartIR entities, return timing statistics.
+
+    The off frames are batched per blaster and controller configuration
+    into the fewest controller sends, queued with the off priority. The
+    blasters are dispatched in parallel.
+    """
+    start = time.monotonic()
+    batches = {}
+    for entity_id, entity in async_get_entities(hass).items():
+        blaster = entity.blaster()
+        if blasters and str(blaster[1]) not in blasters:
+            continue
+        if areas and _entity_area(hass, entity_id) not in areas:
+            continue
+        batches.setdefault(blaster, {}).setdefault(_send_config(entity), []).append(
+            entity
+        )
+
+    stats = {
+        "entities": 0,
+        "sent": 0,
+        "skipped": 0,
+        "failed": {},
+        "blasters": len(batches),
+        "service_calls": 0,
+    }
+
+    async def _async_blaster_off(blaster, configs):
+        queue = async_get_blaster_queue(hass, blaster)
+        for entities in configs.values():
+            stats["entities"] += len(entities)
+            # the off pre-empts sends holding the entity lock, like a light
+            # step sequence
+            for entity in entities:
+                await entity.async_off_prepare()
+            async with AsyncExitStack() as stack:
+                for entity in entities:
+                    await stack.enter_async_context(entity._temp_lock)
+
+                frames = []
+                sending = []
+                for entity in entities:
+                    frame = await entity.async_off_frame()
+                    if frame is None:
+                        stats["skipped"] += 1
+                        continue
+                    frames.append(frame)
+                    sending.append(entity)
+                if not frames:
+                    continue
+
+                # the entities share the controller configuration
+                controller = sending[0]._controller
+                delays = [
+                    entity._command_delay(frame)
+                    for entity, frame in zip(sending, frames)
+                ]
+                if controller.batch_send:
+                    batch = []
+                    for frame in frames:
+                        if isinstance(frame, (list, tuple)):
+                            batch.extend(frame)
+                        else:
+                            batch.append(frame)
+                    sends = [(batch, max(delays))]
+                else:
+                    sends = list(zip(frames, delays))
+                try:
+                    for command, delay in sends:
+
+                        async def _async_send(command=command, delay=delay):
+                            await controller.send(command)
+                            await asyncio.sleep(delay)
+
+                        await queue.async_transmit(PRIORITY_OFF, _async_send)
+                        stats["service_calls"] += 1
+                except Exception as e:
+                    _LOGGER.exception("Exception raised turning off %s", entities)
+                    for entity in sending:
+                        stats["failed"][entity.entity_id] = str(e) or type(e).__name__
+                    continue
+
+                for entity in sending:
+                    await entity.async_off_sent()
+                stats["sent"] += len(sending)
+
+    await asyncio.gather(
+        *(_async_blaster_off(blaster, configs) for blaster, configs in batches.items())
+    )
+
+    stats["duration"] = round(time.monotonic() - start, 3)
+    if SCHEDULER.enabled:
+        SCHEDULER("All off finished: %s", stats)
+    return stats
@@ -1,22 +1,47 @@
 import asyncio
 import logging
 import os.path
+import time
 
 import voluptuous as vol
 from homeassistant.core import HomeAssistant, Event, EventStateChangedData, callback
+from homeassistant.components import persistent_notification
 from homeassistant.components.climate import PLATFORM_SCHEMA
 from homeassistant.const import CONF_NAME, STATE_ON, STATE_OFF
 from homeassistant.helpers.event import async_track_state_change_event, async_call_later
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 
+from .adaptive_delay import AdaptiveDelay, async_get_adaptive_store
+from .blaster_queue import (
+    PRIORITY_AUTOMATION,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_OFF,
+    async_get_blaster_queue,
+)
+from .blocking import detect_blocking
+from .codes_archive import ARCHIVE_FILE_NAME, read_archive_json
 from .device_data import DeviceData
+from .metrics import (
+    PHASE_CONTROLLER_SEND,
+    PHASE_QUEUE_WAIT,
+    PHASE_SLEEP,
+    SendMetrics,
+    TimedLock,
+)
 from .controller import get_controller, get_controller_schema
+from .controller_const import DOMAIN
+from .tracing import LOADER, RESOLVER, SCHEDULER
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_DELAY = 0.5
 DEFAULT_POWER_SENSOR_DELAY = 10
+DEFAULT_FORCE_REFRESH_INTERVAL = 600
+DEFAULT_AIRTIME_GUARD = 0.15
+
+DATA_ENTITIES = "entities"
+DATA_DEVICE_FILES = "device_files"
 
 CONF_UNIQUE_ID = "unique_id"
 CONF_DEVICE_CODE = "device_code"
@@ -25,6 +50,13 @@ CONF_DELAY = "delay"
 CONF_POWER_SENSOR = "power_sensor"
 CONF_POWER_SENSOR_DELAY = "power_sensor_delay"
 CONF_POWER_SENSOR_RESTORE_STATE = "power_sensor_restore_state"
+CONF_FORCE_REFRESH_INTERVAL = "force_refresh_interval"
+CONF_OPTIMISTIC = "optimistic"
+CONF_AIRTIME_DELAY = "airtime_delay"
+CONF_AIRTIME_GUARD = "airtime_guard"
+CONF_ADAPTIVE_DELAY = "adaptive_delay"
+CONF_NORMALIZE_COMMANDS = "normalize_commands"
+CONF_SEND_METRICS = "send_metrics"
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
@@ -37,83 +69,187 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
             CONF_POWER_SENSOR_DELAY, default=DEFAULT_POWER_SENSOR_DELAY
         ): cv.positive_int,
         vol.Optional(CONF_POWER_SENSOR_RESTORE_STATE, default=True): cv.boolean,
+        vol.Optional(
+            CONF_FORCE_REFRESH_INTERVAL, default=DEFAULT_FORCE_REFRESH_INTERVAL
+        ): cv.positive_int,
+        vol.Optional(CONF_OPTIMISTIC, default=False): cv.boolean,
+        vol.Optional(CONF_AIRTIME_DELAY, default=True): cv.boolean,
+        vol.Optional(
+            CONF_AIRTIME_GUARD, default=DEFAULT_AIRTIME_GUARD
+        ): cv.positive_float,
+        vol.Optional(CONF_ADAPTIVE_DELAY, default=False): cv.boolean,
+        vol.Optional(CONF_NORMALIZE_COMMANDS, default=False): cv.boolean,
+        vol.Optional(CONF_SEND_METRICS, default=False): cv.boolean,
     }
 )
 
 
 @staticmethod
+@detect_blocking
 async def load_device_data_file(config, device_class, check_data, hass):
     device_code = config.get(CONF_DEVICE_CODE)
 
     """Load device JSON file."""
     device_json_file_name = str(device_code) + ".json"
 
-    device_files_subdir = os.path.join("custom_codes", device_class)
-    device_files_absdir = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), device_files_subdir
+    device_json_file_path, source = await hass.async_add_executor_job(
+        _locate_device_file, device_class, device_json_file_name
     )
-    if os.path.isdir(device_files_absdir):
-        device_json_file_path = os.path.join(device_files_absdir, device_json_file_name)
-        if os.path.exists(device_json_file_path):
-            _LOGGER.debug(
-                "Loading custom %s device JSON file '%s'.",
+    if source == ARCHIVE_FILE_NAME:
+        if LOADER.enabled:
+            LOADER(
+                "Loading %s device JSON file '%s' from codes archive.",
                 device_class,
                 device_json_file_name,
             )
-            device_data = await hass.async_add_executor_job(
-                DeviceData.read_file_as_json, device_json_file_path
-            )
-            if await DeviceData.check_file(
-                device_json_file_name,
+        start = time.perf_counter()
+        device_data = await hass.async_add_executor_job(
+            read_archive_json, device_json_file_path, device_class, device_code
+        )
+        if device_data is not None:
+            return await _async_check_device_data(
+                hass,
                 device_data,
+                device_json_file_name,
                 device_class,
                 check_data,
-            ):
-                return device_data
-            else:
-                return None
-    else:
-        os.makedirs(device_files_absdir)
-
-    device_files_subdir = os.path.join("codes", device_class)
-    device_files_absdir = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), device_files_subdir
-    )
-    if os.path.isdir(device_files_absdir):
-        device_json_file_path = os.path.join(device_files_absdir, device_json_file_name)
-        if os.path.exists(device_json_file_path):
-            _LOGGER.debug(
-                "Loading %s device JSON file '%s'.",
-                device_class,
-                device_json_file_name,
-            )
-            device_data = await hass.async_add_executor_job(
-                DeviceData.read_file_as_json, device_json_file_path
+                ARCHIVE_FILE_NAME,
+                time.perf_counter() - start,
             )
-            if await DeviceData.check_file(
-                device_json_file_name,
-                device_data,
+    elif source is not None:
+        if LOADER.enabled:
+            LOADER(
+                "Loading %s%s device JSON file '%s'.",
+                "custom " if source == "custom_codes" else "",
                 device_class,
-                check_data,
-            ):
-                return device_data
-            else:
-                return None
-        else:
-            _LOGGER.error(
-                "Device JSON file '%s' doesn't exists!", device_json_file_name
+                device_json_file_name,
             )
-    else:
-        _LOGGER.error(
-            "Devices JSON files directory '%s' doesn't exists!", device_files_absdir
+        return await _async_load_device_file(
+            hass,
+            device_json_file_path,
+            device_json_file_name,
+            device_class,
+            check_data,
+            source,
         )
 
+    _LOGGER.error("Device JSON file '%s' doesn't exists!", device_json_file_name)
     return None
 
 
+def _locate_device_file(device_class, device_json_file_name):
+    """Return the path and source of the device file.
+
+    Custom codes take precedence over the codes directory, then the codes
+    archive is returned if present. The custom codes directory of the class
+    is created if missing. Runs in the executor, it touches the disk.
+    """
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for source in ("custom_codes", "codes"):
+        device_files_absdir = os.path.join(package_dir, source, device_class)
+        if os.path.isdir(device_files_absdir):
+            device_json_file_path = os.path.join(
+                device_files_absdir, device_json_file_name
+            )
+            if os.path.exists(device_json_file_path):
+                return device_json_file_path, source
+        elif source == "custom_codes":
+            os.makedirs(device_files_absdir)
+
+    archive_path = os.path.join(package_dir, ARCHIVE_FILE_NAME)
+    if os.path.exists(archive_path):
+        return archive_path, ARCHIVE_FILE_NAME
+    return None, None
+
+
+async def _async_load_device_file(
+    hass,
+    device_json_file_path,
+    device_json_file_name,
+    device_class,
+    check_data,
+    source,
+):
+    """Read, check and expand single device JSON file."""
+    start = time.perf_counter()
+    device_data = await hass.async_add_executor_job(
+        DeviceData.read_file_as_json, device_json_file_path
+    )
+    return await _async_check_device_data(
+        hass,
+        device_data,
+        device_json_file_name,
+        device_class,
+        check_data,
+        source,
+        time.perf_counter() - start,
+    )
+
+
+def _check_device_data(device_data, device_json_file_name, device_class, check_data):
+    """Check and expand device data, return the check result and the data."""
+    valid = DeviceData.check_device_data(
+        device_json_file_name,
+        device_data,
+        device_class,
+        check_data,
+    )
+    if valid:
+        # v2 and generator files are expanded, so entities always work with
+        # nested commands, generated frames are synthesized on demand
+        device_data = DeviceData.from_generator(DeviceData.from_v2(device_data))
+    return valid, device_data
+
+
+async def _async_check_device_data(
+    hass, device_data, device_json_file_name, device_class, check_data, source, read
+):
+    """Check and expand device data, record the load for the diagnostics."""
+    start = time.perf_counter()
+    valid, device_data = await hass.async_add_executor_job(
+        _check_device_data,
+        device_data,
+        device_json_file_name,
+        device_class,
+        check_data,
+    )
+    validate = time.perf_counter() - start
+
+    files = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_DEVICE_FILES, {})
+    record = files.setdefault(
+        f"{device_class}/{device_json_file_name}",
+        {"loads": 0, "read": 0.0, "validate": 0.0},
+    )
+    record["source"] = source
+    record["valid"] = bool(valid)
+    record["loads"] += 1
+    record["read"] = round(read, 4)
+    record["validate"] = round(validate, 4)
+    return device_data if valid else None
+
+
+@callback
+def async_get_device_files(hass: HomeAssistant) -> dict:
+    """Return the device files loaded by file name, with the last load times."""
+    return hass.data.get(DOMAIN, {}).get(DATA_DEVICE_FILES, {})
+
+
+def entry_config(entry) -> dict:
+    """Return the configuration of a config entry, its options overriding its data."""
+    return {**entry.data, **entry.options}
+
+
+@callback
+def async_get_entities(hass: HomeAssistant) -> dict:
+    """Return all SmartIR entities added to Home Assistant by entity_id."""
+    return hass.data.get(DOMAIN, {}).get(DATA_ENTITIES, {})
+
+
 class SmartIR:
     _attr_should_poll = False
     _attr_assumed_state = True
+    # state attributes published optimistically, extended by the platforms
+    _state_attrs = ("_state", "_on_by_remote")
 
     def __init__(self, hass: HomeAssistant, config: ConfigType, device_data):
         _LOGGER.debug(
@@ -127,24 +263,54 @@ class SmartIR:
         self._name = config.get(CONF_NAME)
         self._device_code = config.get(CONF_DEVICE_CODE)
         self._controller_data = config.get(CONF_CONTROLLER_DATA)
-        self._delay = config.get(CONF_DELAY)
+        self._delay = config.get(CONF_DELAY, DEFAULT_DELAY)
+        self._airtime_delay = config.get(CONF_AIRTIME_DELAY, True)
+        self._airtime_guard = config.get(CONF_AIRTIME_GUARD, DEFAULT_AIRTIME_GUARD)
         self._power_sensor = config.get(CONF_POWER_SENSOR)
         self._power_sensor_delay = config.get(CONF_POWER_SENSOR_DELAY)
         self._power_sensor_restore_state = config.get(CONF_POWER_SENSOR_RESTORE_STATE)
+        self._force_refresh_interval = config.get(
+            CONF_FORCE_REFRESH_INTERVAL, DEFAULT_FORCE_REFRESH_INTERVAL
+        )
+        self._optimistic = config.get(CONF_OPTIMISTIC, False)
+        # learning needs the power sensor to confirm sends
+        self._adaptive_delay = bool(
+            config.get(CONF_ADAPTIVE_DELAY, False) and self._power_sensor
+        )
+        self._adaptive = AdaptiveDelay()
+        self._send_retries = 0
+        self._send_tasks = set()
 
         self._state = STATE_OFF
         self._on_by_remote = False
         self._power_sensor_check_expect = None
         self._power_sensor_check_cancel = None
 
+        # last transmitted state, used to skip redundant transmissions
+        self._sent_state = None
+        self._sent_time = None
+        self._sends_transmitted = 0
+        self._sends_skipped = 0
+        self._sends_superseded = 0
+        # newest requested state, waiting older requests are superseded
+        self._latest_request = None
+        self._blaster_queue = None
+
         self._manufacturer = device_data["manufacturer"]
         self._supported_models = device_data["supportedModels"]
         self._supported_controller = device_data["supportedController"]
         self._commands_encoding = device_data["commandsEncoding"]
-        self._commands = device_data["commands"]
+
+        # send path metrics, None when disabled
+        self._metrics = SendMetrics() if config.get(CONF_SEND_METRICS) else None
+        # traffic recording of the sends, None unless recording
+        self._recording = None
 
         # Init exclusive lock for sending IR commands
-        self._temp_lock = asyncio.Lock()
+        if self._metrics is None:
+            self._temp_lock = asyncio.Lock()
+        else:
+            self._temp_lock = TimedLock(self._metrics)
 
         # Init the IR/RF controller
         self._controller = get_controller(
@@ -154,7 +320,288 @@ class SmartIR:
             self._controller_data,
         )
 
+        commands = self._reachable_commands(config, device_data)
+        self._normalize_stats = None
+        if config.get(CONF_NORMALIZE_COMMANDS, False):
+            commands = self._normalize_commands(commands)
+        # keep only read-only table of the reachable commands, so the raw
+        # device data can be released after the entity initialization
+        self._commands = DeviceData.compile_commands(commands)
+
+    def _reachable_commands(self, config, device_data):
+        """Return commands the entity can send, platforms prune the rest."""
+        return device_data["commands"]
+
+    def _normalize_commands(self, commands):
+        """Return the commands normalized by the controller.
+
+        The number of normalized frames and the airtime saved are kept
+        for the diagnostics.
+        """
+        stats = {"frames": 0, "normalized": 0, "airtime_saved": 0.0}
+
+        def normalize(command):
+            stats["frames"] += 1
+            normalized = self._controller.normalize(command)
+            if normalized != command:
+                stats["normalized"] += 1
+                before = self._controller.airtime(command, cache=False)
+                after = self._controller.airtime(normalized, cache=False)
+                if before is not None and after is not None:
+                    stats["airtime_saved"] += before - after
+            return normalized
+
+        commands = DeviceData.map_frames(commands, normalize)
+        stats["airtime_saved"] = round(stats["airtime_saved"], 3)
+        self._normalize_stats = stats
+        if LOADER.enabled:
+            LOADER(
+                "Normalized %d of %d frames of %s, saved %.3f s of airtime.",
+                stats["normalized"],
+                stats["frames"],
+                self._name,
+                stats["airtime_saved"],
+            )
+        return commands
+
+    def normalize_stats(self):
+        """Return statistics of the command normalization, None if disabled."""
+        return self._normalize_stats
+
+    def _command_delay(self, command):
+        """Return the wait after sending the command.
+
+        That is the command airtime plus the guard time, or the fixed
+        delay if airtime delay is disabled or the airtime is unknown. The
+        learned adaptive factor scales the guard time or the fixed delay.
+        """
+        if self._airtime_delay:
+            airtime = self._controller.airtime(command)
+            if airtime is not None:
+                return airtime + self._airtime_guard * self._adaptive.factor
+        return self._delay * self._adaptive.factor
+
+    @detect_blocking
+    async def _async_send_state(self, *request):
+        """Send the requested state.
+
+        In optimistic mode the requested state is published at once and
+        transmitted by a background task. The entity attributes keep the
+        transmitted state until the send applies the new one, so a failed
+        send rolls back by publishing them again.
+
+        Return False if the state wasn't sent, an optimistic send counts
+        as sent once it is scheduled.
+        """
+        self._send_retries = 0
+        self._latest_request = request
+        if not self._optimistic:
+            return await self._async_send_request(request)
+
+        transmitted = {attr: getattr(self, attr) for attr in self._state_attrs}
+        await self._async_apply_state(*request)
+        self.async_write_ha_state()
+        for attr, value in transmitted.items():
+            setattr(self, attr, value)
+
+        task = self.hass.async_create_task(self._async_send_background(request))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+        return True
+
+    async def _async_send_background(self, request):
+        if await self._async_send_request(request):
+            return
+
+        self.async_write_ha_state()
+        persistent_notification.async_create(
+            self.hass,
+            f"Sending state to '{self.name}' failed, the state was rolled back.",
+            title="SmartIR",
+            notification_id=f"smartir_send_failed_{self.entity_id}",
+        )
+
+    @detect_blocking
+    async def _async_send_request(self, request):
+        """Send the requested state, measured if metrics are enabled."""
+        if self._metrics is None:
+            return await self._send_command(*request)
+        return await self._metrics.async_measure(self._send_command(*request))
+
+    def _send_priority(self, state):
+        """Return the blaster queue priority of a frame sent for the state."""
+        if state == STATE_OFF:
+            return PRIORITY_OFF
+        if self._context is not None and self._context.user_id is not None:
+            return PRIORITY_INTERACTIVE
+        return PRIORITY_AUTOMATION
+
+    async def _async_transmit(self, command, state=STATE_ON):
+        """Send the command and wait for its delay, queued on the blaster."""
+
+        metrics = self._metrics
+        if metrics is not None:
+            enqueued = time.perf_counter()
+
+        async def _async_send():
+            if metrics is None:
+                await self._controller.send(command)
+                if self._recording is not None:
+                    self._recording.record_send(self.entity_id, state)
+                await asyncio.sleep(self._command_delay(command))
+                return
+
+            start = time.perf_counter()
+            metrics.add(PHASE_QUEUE_WAIT, start - enqueued)
+            try:
+                await self._controller.send(command)
+            except Exception:
+                metrics.frame_failures += 1
+                raise
+            sent = time.perf_counter()
+            metrics.add(PHASE_CONTROLLER_SEND, sent - start)
+            metrics.frames += 1
+            if self._recording is not None:
+                self._recording.record_send(self.entity_id, state)
+            await asyncio.sleep(self._command_delay(command))
+            metrics.add(PHASE_SLEEP, time.perf_counter() - sent)
+
+        if self._blaster_queue is None:
+            await _async_send()
+            return
+        await self._blaster_queue.async_transmit(
+            self._send_priority(state), _async_send
+        )
+
+    async def _send_command(self, state, *request):
+        """Transmit the requested state, return False on failure.
+
+        By default the 'on' or 'off' command of the power state is sent,
+        the platforms override it to send their modes.
+        """
+        command = self._commands.get("off" if state == STATE_OFF else "on")
+        if not isinstance(command, str):
+            _LOGGER.error("Missing device IR code for '%s' state.", state)
+            return False
+
+        async with self._temp_lock:
+            if self._power_sensor and self._state != state:
+                self._async_power_sensor_check_schedule(state)
+            try:
+                await self._async_transmit(command, state)
+            except Exception as e:
+                _LOGGER.exception(
+                    "Exception raised in the in the _send_command '%s'", e
+                )
+                return False
+            self._record_send((state, *request))
+            await self._async_apply_state(state, *request)
+            self.async_write_ha_state()
+            return True
+
+    async def _async_apply_state(self, state, *request):
+        """Set the entity state attributes from the requested state."""
+        self._state = state
+        self._on_by_remote = False
+
+    def _is_redundant_send(self, request):
+        """Return True if the requested state needn't be transmitted.
+
+        That is a request superseded by a newer one while it waited, or an
+        already transmitted state. An unchanged state is transmitted again
+        once the force refresh interval elapsed, to correct drift of the
+        assumed state. Interval 0 disables skipping.
+        """
+        if self._latest_request is not None and request != self._latest_request:
+            self._sends_superseded += 1
+            if RESOLVER.enabled:
+                RESOLVER("Skipping send of superseded state %s.", request)
+            return True
+        if (
+            self._force_refresh_interval
+            and request == self._sent_state
+            and time.monotonic() - self._sent_time < self._force_refresh_interval
+        ):
+            self._sends_skipped += 1
+            if RESOLVER.enabled:
+                RESOLVER("Skipping send of already transmitted state %s.", request)
+            return True
+        return False
+
+    def _record_send(self, request):
+        """Remember the transmitted state."""
+        self._sent_state = request
+        self._sent_time = time.monotonic()
+        self._sends_transmitted += 1
+
+    def _invalidate_sent_state(self):
+        """Force the next send after the device state changed externally."""
+        self._sent_state = None
+
+    def send_stats(self):
+        """Return counters of transmitted and skipped sends."""
+        return {
+            "transmitted": self._sends_transmitted,
+            "skipped": self._sends_skipped,
+            "superseded": self._sends_superseded,
+            "force_refresh_interval": self._force_refresh_interval,
+            "adaptive_delay": (
+                self._adaptive.as_dict() if self._adaptive_delay else None
+            ),
+        }
+
+    async def async_off_prepare(self):
+        """Stop the sends the 'all_off' service pre-empts.
+
+        Called before the service waits for the entity lock.
+        """
+
+    async def async_off_frame(self):
+        """Return the frame turning the device off, None if it is off.
+
+        The 'all_off' service batches the frames of many entities.
+        """
+        if self._state == STATE_OFF:
+            return None
+        command = self._commands.get("off")
+        return command if isinstance(command, str) else None
+
+    async def async_off_sent(self):
+        """Publish the off state after the 'all_off' service sent the frame."""
+        if self._power_sensor:
+            self._async_power_sensor_check_schedule(STATE_OFF)
+        self._state = STATE_OFF
+        self._on_by_remote = False
+        self._invalidate_sent_state()
+        self.async_write_ha_state()
+
+    def metrics(self):
+        """Return the send path metrics, None if disabled."""
+        return self._metrics
+
+    def blaster(self):
+        """Return identity of the device transmitting the commands."""
+        return self._controller.blaster()
+
+    def memory_report(self):
+        """Return memory used by the entity commands table."""
+        return DeviceData.commands_memory(self._commands)
+
+    def cache_stats(self):
+        """Return sizes and hit rates of the entity caches."""
+        return {"airtime": self._controller.cache_stats()}
+
     async def async_added_to_hass(self):
+        self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_ENTITIES, {})[
+            self.entity_id
+        ] = self
+        self._blaster_queue = async_get_blaster_queue(self.hass, self.blaster())
+
+        if self._adaptive_delay:
+            self._adaptive = await async_get_adaptive_store(self.hass).async_get(
+                self.unique_id or self.entity_id
+            )
+
         last_state = await self.async_get_last_state()
 
         if last_state is not None:
@@ -171,6 +618,12 @@ class SmartIR:
                 self.hass, self._power_sensor, self._async_power_sensor_changed
             )
 
+    async def async_will_remove_from_hass(self):
+        async_get_entities(self.hass).pop(self.entity_id, None)
+        for task in self._send_tasks:
+            task.cancel()
+
+    @detect_blocking
     async def _async_power_sensor_changed(
         self, event: Event[EventStateChangedData]
     ) -> None:
@@ -183,6 +636,8 @@ class SmartIR:
         if old_state is not None and new_state.state == old_state.state:
             return
 
+        self._invalidate_sent_state()
+
         if new_state.state == STATE_ON and self._state != STATE_ON:
             self._state = STATE_ON
             self._on_by_remote = True
@@ -209,29 +664,74 @@ class SmartIR:
             current_state = getattr(
                 self.hass.states.get(self._power_sensor), "state", None
             )
-            _LOGGER.debug(
-                "Executing power sensor check for expected state '%s', current state '%s'.",
-                expected_state,
-                current_state,
-            )
+            if SCHEDULER.enabled:
+                SCHEDULER(
+                    "Executing power sensor check for expected state '%s', current state '%s'.",
+                    expected_state,
+                    current_state,
+                )
 
-            if (
-                expected_state in [STATE_ON, STATE_OFF]
-                and current_state in [STATE_ON, STATE_OFF]
-                and expected_state != current_state
-            ):
-                self._state = current_state
-                _LOGGER.debug(
+            if expected_state not in [STATE_ON, STATE_OFF] or current_state not in [
+                STATE_ON,
+                STATE_OFF,
+            ]:
+                return
+
+            if expected_state == current_state:
+                self._async_learn(True)
+                return
+
+            self._async_learn(False)
+            request = self._sent_state
+            self._state = current_state
+            self._invalidate_sent_state()
+            if SCHEDULER.enabled:
+                SCHEDULER(
                     "Power sensor check failed, reverted device state to '%s'.",
                     self._state,
                 )
-                self.async_write_ha_state()
+            self.async_write_ha_state()
+
+            if (
+                self._adaptive_delay
+                and request is not None
+                and self._send_retries < self._adaptive.retries
+            ):
+                self._send_retries += 1
+                if SCHEDULER.enabled:
+                    SCHEDULER(
+                        "Retransmitting state %s, retry %d of %d.",
+                        request,
+                        self._send_retries,
+                        self._adaptive.retries,
+                    )
+                task = self.hass.async_create_task(self._async_send_request(request))
+                self._send_tasks.add(task)
+                task.add_done_callback(self._send_tasks.discard)
 
         self._power_sensor_check_expect = state
         self._power_sensor_check_cancel = async_call_later(
             self.hass, self._power_sensor_delay, _async_power_sensor_check
         )
-        _LOGGER.debug("Scheduled power sensor check for '%s' state", state)
+        if SCHEDULER.enabled:
+            SCHEDULER("Scheduled power sensor check for '%s' state", state)
+
+    @callback
+    def _async_learn(self, confirmed):
+        """Adapt the command delay to the power sensor check result."""
+        if not self._adaptive_delay:
+            return
+        if confirmed:
+            self._adaptive.confirm()
+        else:
+            self._adaptive.miss()
+        async_get_adaptive_store(self.hass).async_schedule_save()
+        if SCHEDULER.enabled:
+            SCHEDULER(
+                "Adaptive delay factor %.3f, retries %d.",
+                self._adaptive.factor,
+                self._adaptive.retries,
+            )
 
     @property
     def unique_id(self):
@@ -0,0 +1,59 @@
+"""Per-subsystem debug tracing.
+
+Every subsystem traces to its own child logger, so tracing is switched on
+per subsystem with the Home Assistant logger configuration or the
+'logger.set_level' service, e.g.:
+
+    logger:
+      logs:
+        custom_components.smartir.trace.resolver: debug
+
+Hot paths guard traces with 'enabled', so a disabled trace costs a single
+cached level check and no argument formatting.
+"""
+
+import logging
+
+TRACE_LOGGER = __name__.rsplit(".", 1)[0] + ".trace"
+
+TRACE_LOADER = "loader"
+TRACE_RESOLVER = "resolver"
+TRACE_CONTROLLER = "controller"
+TRACE_SCHEDULER = "scheduler"
+TRACE_BLOCKING = "blocking"
+
+TRACE_SUBSYSTEMS = [
+    TRACE_LOADER,
+    TRACE_RESOLVER,
+    TRACE_CONTROLLER,
+    TRACE_SCHEDULER,
+    TRACE_BLOCKING,
+]
+
+
+class Tracer:
+    """Debug trace of a single subsystem."""
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, subsystem):
+        self._logger = logging.getLogger(f"{TRACE_LOGGER}.{subsystem}")
+
+    @property
+    def enabled(self):
+        return self._logger.isEnabledFor(logging.DEBUG)
+
+    def __call__(self, msg, *args):
+        self._logger.debug(msg, *args)
+
+
+LOADER = Tracer(TRACE_LOADER)
+RESOLVER = Tracer(TRACE_RESOLVER)
+CONTROLLER = Tracer(TRACE_CONTROLLER)
+SCHEDULER = Tracer(TRACE_SCHEDULER)
+BLOCKING = Tracer(TRACE_BLOCKING)
+
+
+def trace_levels():
+    """Return enabled state of every subsystem trace."""
+    return {subsystem: Tracer(subsystem).enabled for subsystem in TRACE_SUBSYSTEMS}
@@ -0,0 +1,236 @@
+"""Recording of SmartIR traffic for replay.
+
+A recording keeps the service calls handled by SmartIR entities, the
+state changes of their sensors and the controller sends, stamped with
+the time since the recording started. The trace is written as JSON
+lines: a header with the recorded entities and their initial states,
+one line per event and a footer with the final states. The replay.py
+script feeds a trace to the load-test stand-in to compare send counts,
+latencies and final states between code versions.
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .controller_const import DOMAIN
+from .smartir_entity import async_get_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_RECORDING = "recording"
+
+TRACE_VERSION = 1
+
+EVENT_CALL = "call"
+EVENT_STATE = "state"
+EVENT_SEND = "send"
+
+# entity service handlers recorded, by name prefix
+SERVICE_PREFIXES = (
+    "async_turn_",
+    "async_set_",
+    "async_oscillate",
+    "async_volume_",
+    "async_mute_",
+    "async_select_",
+    "async_play_",
+    "async_media_",
+)
+
+# sensor attributes of the entities and their state change handlers
+SENSOR_HANDLERS = {
+    "_temperature_sensor": "_async_temp_sensor_changed",
+    "_humidity_sensor": "_async_humidity_sensor_changed",
+    "_power_sensor": "_async_power_sensor_changed",
+}
+
+
+class TrafficRecording:
+    """Events of the recorded entities, in arrival order."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._start = loop.time()
+        self.events = []
+
+    def record(self, kind, entity_id, name, args=(), kwargs=None):
+        self.events.append(
+            [
+                round(self._loop.time() - self._start, 4),
+                kind,
+                entity_id,
+                name,
+                list(args),
+                kwargs or {},
+            ]
+        )
+
+    def record_send(self, entity_id, state):
+        self.record(EVENT_SEND, entity_id, state)
+
+    def attach(self, entity):
+        """Record the controller sends of the entity."""
+        entity._recording = self
+
+    def detach(self, entity):
+        entity._recording = None
+
+
+# sensor readings kept by the entities, the hvac action depends on them
+SENSOR_VALUES = ("_current_temperature", "_current_humidity")
+
+
+def entity_states(entities):
+    """Return the state attributes and sensor readings of every entity."""
+    return {
+        entity_id: {
+            attr: getattr(entity, attr)
+            for attr in entity._state_attrs + SENSOR_VALUES
+            if hasattr(entity, attr)
+        }
+        for entity_id, entity in sorted(entities.items())
+    }
+
+
+def entity_header(entity):
+    """Return what the replay needs to set up the entity."""
+    return {
+        "platform": entity.entity_id.split(".")[0],
+        "device_code": entity._device_code,
+        "blaster": str(entity.blaster()[1]),
+        "delay": entity._delay,
+        "airtime_delay": entity._airtime_delay,
+    }
+
+
+def service_handlers(entity):
+    """Return the names of the SmartIR service handlers of the entity."""
+    return [
+        name
+        for name in dir(type(entity))
+        if name.startswith(SERVICE_PREFIXES)
+        and getattr(getattr(type(entity), name), "__module__", "").startswith(
+            __package__
+        )
+    ]
+
+
+def _wrap_handler(recording, entity, name):
+    handler = getattr(entity, name)
+
+    async def _async_recorded(*args, **kwargs):
+        recording.record(EVENT_CALL, entity.entity_id, name, args, kwargs)
+        return await handler(*args, **kwargs)
+
+    setattr(entity, name, _async_recorded)
+
+
+async def async_record(hass: HomeAssistant, duration) -> dict:
+    """Record the SmartIR traffic for the duration, return the trace path.
+
+    The entity service handlers are wrapped for the duration, Home
+    Assistant looks them up by name on every service call.
+    """
+    data = hass.data.setdefault(DOMAIN, {})
+    if data.get(DATA_RECORDING) is not None:
+        raise HomeAssistantError("A SmartIR recording is already running")
+
+    entities = dict(async_get_entities(hass))
+    recording = TrafficRecording(hass.loop)
+    data[DATA_RECORDING] = recording
+    header = {
+        "version": TRACE_VERSION,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration": duration,
+        "entities": {
+            entity_id: entity_header(entity) for entity_id, entity in entities.items()
+        },
+        "states": entity_states(entities),
+    }
+
+    sensors = {}
+    for entity_id, entity in entities.items():
+        for attr, handler in SENSOR_HANDLERS.items():
+            sensor = getattr(entity, attr, None)
+            if sensor:
+                sensors.setdefault(sensor, []).append((entity_id, handler))
+
+    @callback
+    def _async_sensor_changed(event):
+        new_state = event.data["new_state"]
+        old_state = event.data["old_state"]
+        for entity_id, handler in sensors[event.data["entity_id"]]:
+            recording.record(
+                EVENT_STATE,
+                entity_id,
+                handler,
+                (
+                    None if new_state is None else new_state.state,
+                    None if old_state is None else old_state.state,
+                ),
+            )
+
+    unsubscribe = None
+    if sensors:
+        unsubscribe = async_track_state_change_event(
+            hass, list(sensors), _async_sensor_changed
+        )
+    for entity in entities.values():
+        recording.attach(entity)
+        for name in service_handlers(entity):
+            _wrap_handler(recording, entity, name)
+
+    try:
+        _LOGGER.info(
+            "Recording SmartIR traffic of %d entities for %s seconds",
+            len(entities),
+            duration,
+        )
+        await asyncio.sleep(duration)
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
+        for entity in entities.values():
+            recording.detach(entity)
+            for name in service_handlers(entity):
+                entity.__dict__.pop(name, None)
+        data[DATA_RECORDING] = None
+
+    footer = {"states": entity_states(entities)}
+    path = hass.config.path(f"{DOMAIN}_trace_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    await hass.async_add_executor_job(
+        write_trace, path, header, recording.events, footer
+    )
+    _LOGGER.warning(
+        "SmartIR traffic trace of %d events written to %s",
+        len(recording.events),
+        path,
+    )
+    return {
+        "path": path,
+        "entities": len(entities),
+        "events": len(recording.events),
+        "sends": sum(1 for event in recording.events if event[1] == EVENT_SEND),
+    }
+
+
+def write_trace(path, header, events, footer):
+    with open(path, "w") as file:
+        for line in (header, *events, footer):
+            file.write(json.dumps(line, default=str) + "\n")
+
+
+def read_trace(path):
+    """Return the header, events and footer of a trace."""
+    with open(path) as file:
+        lines = [json.loads(line) for line in file if line.strip()]
+    if not lines or lines[0].get("version") != TRACE_VERSION:
+        raise ValueError(f"{path} isn't a SmartIR trace version {TRACE_VERSION}")
+    footer = lines[-1] if len(lines) > 1 and isinstance(lines[-1], dict) else {}
+    return lines[0], [line for line in lines[1:] if isinstance(line, list)], footer
@@ -0,0 +1,135 @@
+import compileall
+import json
+import os
+import subprocess
+import sys
+
+USAGE = "usage: import_budget.py [--budget MS] [--runs N] [--output FILE]"
+
+PACKAGE = "custom_components.smartir"
+
+# the modules Home Assistant imports to set SmartIR up
+MODULES = [
+    PACKAGE,
+    f"{PACKAGE}.config_flow",
+    f"{PACKAGE}.climate",
+    f"{PACKAGE}.fan",
+    f"{PACKAGE}.light",
+    f"{PACKAGE}.media_player",
+    f"{PACKAGE}.sensor",
+    f"{PACKAGE}.diagnostics",
+]
+
+# own import time of the SmartIR modules, in ms
+DEFAULT_BUDGET = 25.0
+
+# modules SmartIR imports on first use only, backends and tools most
+# installations never need
+DEFERRED = ("requests", "ipaddress", "statistics", "cProfile", "pstats")
+
+
+def import_times():
+    """Import the SmartIR modules in a fresh interpreter.
+
+    Return (name, self us, cumulative us, importer) of every module
+    imported, importer being the module whose import imported it first.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(MODULES)}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if process.returncode:
+        print(process.stderr)
+        sys.exit(1)
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append([name.strip(), int(own), int(cumulative), depth, None])
+
+    # a module is listed after the modules it imported, one level deeper
+    stack = []
+    for entry in reversed(entries):
+        while stack and stack[-1][3] >= entry[3]:
+            stack.pop()
+        if stack:
+            entry[4] = stack[-1][0]
+        stack.append(entry)
+    return [
+        (name, own, cumulative, importer)
+        for name, own, cumulative, _, importer in entries
+    ]
+
+
+def main():
+    args = sys.argv[1:]
+    budget = DEFAULT_BUDGET
+    runs = 5
+    output = None
+    while args:
+        option = args.pop(0)
+        if option == "--budget":
+            budget = float(args.pop(0))
+        elif option == "--runs":
+            runs = int(args.pop(0))
+        elif option == "--output":
+            output = args.pop(0)
+        else:
+            print(USAGE)
+            sys.exit(1)
+
+    # Home Assistant imports from cached bytecode, don't measure compiling
+    compileall.compile_dir(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), *PACKAGE.split(".")),
+        quiet=1,
+    )
+
+    # the fastest run of every module, the least disturbed by other
+    # processes
+    modules = {}
+    deferred = set()
+    for _ in range(runs):
+        for name, own, cumulative, importer in import_times():
+            if name.split(".")[0] in DEFERRED and (importer or "").startswith(PACKAGE):
+                deferred.add((name, importer))
+            if not name.startswith(PACKAGE):
+                continue
+            previous = modules.get(name)
+            if previous is None or own < previous["self_us"]:
+                modules[name] = {"self_us": own, "cumulative_us": cumulative}
+
+    total = sum(module["self_us"] for module in modules.values()) / 1000
+    for name, module in sorted(
+        modules.items(), key=lambda item: item[1]["self_us"], reverse=True
+    ):
+        print(
+            "%-48s %10.3f ms %10.3f ms"
+            % (name, module["self_us"] / 1000, module["cumulative_us"] / 1000)
+        )
+    print("%-48s %10.3f ms (budget %.3f ms)" % ("total", total, budget))
+    for name, importer in sorted(deferred):
+        print(f"{name} imported by {importer}, it should be imported on first use")
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "modules": modules,
+                    "total_ms": round(total, 3),
+                    "budget_ms": budget,
+                    "deferred": sorted(deferred),
+                },
+                file,
+                indent=2,
+            )
+    if total > budget or deferred:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
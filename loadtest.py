@@ -0,0 +1,481 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from homeassistant.components.media_player.const import MediaType
+from homeassistant.const import ATTR_TEMPERATURE
+from homeassistant.util.unit_system import UnitOfTemperature
+
+from custom_components.smartir import blocking
+from custom_components.smartir.blaster_queue import (
+    async_get_blaster_queue,
+    async_get_blaster_queues,
+)
+from custom_components.smartir.climate import SmartIRClimate
+from custom_components.smartir.controller import _http_get
+from custom_components.smartir.controller_const import CONTROLLER_CONF, DOMAIN
+from custom_components.smartir.fan import SmartIRFan
+from custom_components.smartir.light import SmartIRLight
+from custom_components.smartir.media_player import SmartIRMediaPlayer
+from custom_components.smartir.smartir_entity import (
+    DATA_ENTITIES,
+    load_device_data_file,
+)
+from custom_components.smartir.tracing import TRACE_BLOCKING, TRACE_LOGGER
+
+USAGE = (
+    "usage: loadtest.py [--entities N] [--blasters N] [--duration S] [--rate R] "
+    "[--storm R] [--delay S] [--service-latency S] [--seed S] [--tracemalloc] "
+    "[--detect-blocking MS] [--output FILE]"
+)
+
+CODES_DIR = "codes"
+
+CHECK_DATA = {
+    "climate": {
+        "hvac_modes": ["auto", "heat", "cool", "heat_cool", "fan_only", "dry"],
+    },
+    "fan": {},
+    "media_player": {},
+    "light": {},
+}
+
+ENTITY_CLASSES = {
+    "climate": SmartIRClimate,
+    "fan": SmartIRFan,
+    "light": SmartIRLight,
+    "media_player": SmartIRMediaPlayer,
+}
+
+# share of the entities per platform
+PLATFORM_MIX = {"climate": 0.5, "media_player": 0.2, "fan": 0.15, "light": 0.15}
+
+# interval of the event loop lag probe
+LAG_INTERVAL = 0.01
+
+
+class StandInServices:
+    """Service registry recording the controller sends.
+
+    A send takes the service latency, like a blaster acknowledging the
+    command.
+    """
+
+    def __init__(self, hass, latency):
+        self._hass = hass
+        self.latency = latency
+        self.calls = []
+
+    async def async_call(self, domain, service, service_data, *args, **kwargs):
+        self.calls.append((self._hass.loop.time(), domain, service))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class StandInStates:
+    def get(self, entity_id):
+        return None
+
+
+class StandInHass:
+    """The parts of Home Assistant used by the SmartIR entities."""
+
+    def __init__(self, service_latency=0.0):
+        self.loop = asyncio.get_running_loop()
+        self.data = {}
+        self.services = StandInServices(self, service_latency)
+        self.states = StandInStates()
+        self.config = SimpleNamespace(
+            units=SimpleNamespace(temperature_unit=UnitOfTemperature.CELSIUS),
+            path=lambda *parts: os.path.join(os.getcwd(), *parts),
+        )
+        self.state_writes = 0
+
+    def async_create_task(self, target, *args, **kwargs):
+        return self.loop.create_task(target)
+
+    async def async_add_executor_job(self, target, *args):
+        if target is _http_get:
+            # LOOKin sends through an HTTP request, record it instead
+            await self.services.async_call("lookin", "http", args)
+            return None
+        return await self.loop.run_in_executor(None, target, *args)
+
+
+def device_codes(platform):
+    class_dir = os.path.join(CODES_DIR, platform)
+    return sorted(
+        int(file_name[:-5])
+        for file_name in os.listdir(class_dir)
+        if file_name.endswith(".json") and file_name[:-5].isdigit()
+    )
+
+
+def controller_data(controller, blaster):
+    """Return controller data sending through the blaster."""
+    return {
+        CONTROLLER_CONF["CONTROLLER_TYPE"]: controller,
+        CONTROLLER_CONF["REMOTE_ENTITY"]: f"remote.blaster_{blaster}",
+        CONTROLLER_CONF["MQTT_TOPIC"]: f"blaster/{blaster}",
+        CONTROLLER_CONF["REMOTE_HOST"]: f"192.0.2.{blaster + 1}",
+        CONTROLLER_CONF["ESPHOME_SERVICE"]: f"blaster_{blaster}_send_raw",
+        CONTROLLER_CONF["ZHA_IEEE"]: f"00:00:00:00:00:00:00:{blaster % 256:02x}",
+        CONTROLLER_CONF["ZHA_ENDPOINT_ID"]: 1,
+        CONTROLLER_CONF["ZHA_CLUSTER_ID"]: 57348,
+        CONTROLLER_CONF["ZHA_CLUSTER_TYPE"]: "in",
+        CONTROLLER_CONF["ZHA_COMMAND"]: 2,
+        CONTROLLER_CONF["ZHA_COMMAND_TYPE"]: "server",
+    }
+
+
+async def async_create_entity(hass, platform, entity_id, device_code, blaster, delay):
+    """Load the device file and add the entity, like a config entry setup.
+
+    Return None if the device file doesn't load.
+    """
+    config = {
+        "name": entity_id,
+        "unique_id": entity_id,
+        "device_code": device_code,
+        "delay": 0.5 if delay is None else delay,
+        "airtime_delay": delay is None,
+    }
+    if platform == "climate":
+        config["temperature_sensor"] = f"sensor.{entity_id.split('.')[1]}_temp"
+    device_data = await load_device_data_file(
+        config, platform, CHECK_DATA[platform], hass
+    )
+    if not device_data:
+        return None
+    config["controller_data"] = controller_data(
+        device_data["supportedController"], blaster
+    )
+    entity = ENTITY_CLASSES[platform](hass, config, device_data)
+    entity.entity_id = entity_id
+    entity._context = None
+
+    def write_state():
+        hass.state_writes += 1
+
+    entity.async_write_ha_state = write_state
+    if platform == "climate":
+        # as restored from the last state, the first mode of the device file
+        entity._hvac_mode = entity._hvac_modes[0]
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_ENTITIES, {})[entity_id] = entity
+    entity._blaster_queue = async_get_blaster_queue(hass, entity.blaster())
+    return entity
+
+
+async def async_create_entities(hass, count, blasters, rng, delay=None):
+    """Add count entities of random corpus devices spread over the blasters."""
+    entities = {}
+    index = 0
+    for platform, share in PLATFORM_MIX.items():
+        codes = device_codes(platform)
+        for number in range(max(1, round(count * share))):
+            entity_id = f"{platform}.loadtest_{number}"
+            for _ in range(10):
+                entity = await async_create_entity(
+                    hass,
+                    platform,
+                    entity_id,
+                    rng.choice(codes),
+                    index % blasters,
+                    delay,
+                )
+                if entity is not None:
+                    entities[entity_id] = entity
+                    break
+            index += 1
+    return entities
+
+
+def random_call(entity, rng):
+    """Return a random service call of the entity as (method, args, kwargs)."""
+    if isinstance(entity, SmartIRClimate):
+        modes = [mode for mode in entity.hvac_modes if mode != "off"]
+        choice = rng.random()
+        if choice < 0.1:
+            return "async_turn_off", (), {}
+        if choice < 0.3:
+            return "async_set_hvac_mode", (rng.choice(modes),), {}
+        if choice < 0.4 and entity.fan_modes:
+            return "async_set_fan_mode", (rng.choice(entity.fan_modes),), {}
+        temperature = rng.randint(int(entity.min_temp), int(entity.max_temp))
+        return "async_set_temperature", (), {ATTR_TEMPERATURE: temperature}
+    if isinstance(entity, SmartIRFan):
+        choice = rng.random()
+        if choice < 0.2:
+            return "async_turn_off", (), {}
+        if choice < 0.3 and entity._oscillating is not None:
+            return "async_oscillate", (rng.random() < 0.5,), {}
+        return "async_set_percentage", (rng.randint(1, 100),), {}
+    if isinstance(entity, SmartIRLight):
+        if rng.random() < 0.2:
+            return "async_turn_off", (), {}
+        return "async_turn_on", (), {ATTR_BRIGHTNESS: rng.randint(1, 255)}
+    choice = rng.random()
+    if choice < 0.1:
+        return "async_turn_off", (), {}
+    if choice < 0.2:
+        return "async_turn_on", (), {}
+    if choice < 0.4 and entity.source_list:
+        return "async_select_source", (rng.choice(entity.source_list),), {}
+    if choice < 0.5:
+        channel = str(rng.randint(1, 999))
+        return "async_play_media", (MediaType.CHANNEL, channel), {}
+    return rng.choice(["async_volume_up", "async_volume_down"]), (), {}
+
+
+def random_schedule(entities, rng, duration, rate, storm):
+    """Return Poisson arrivals of service calls and sensor updates.
+
+    The schedule items are (time, kind, entity_id, name, args, kwargs),
+    kind 'call' calls the entity method, kind 'state' feeds a new state
+    of a sensor to the entity handler.
+    """
+    schedule = []
+    entity_ids = list(entities)
+    climates = [
+        entity_id
+        for entity_id, entity in entities.items()
+        if isinstance(entity, SmartIRClimate)
+    ]
+    at = 0.0
+    while rate:
+        at += rng.expovariate(rate)
+        if at >= duration:
+            break
+        entity_id = rng.choice(entity_ids)
+        method, args, kwargs = random_call(entities[entity_id], rng)
+        schedule.append((at, "call", entity_id, method, args, kwargs))
+    at = 0.0
+    while storm and climates:
+        at += rng.expovariate(storm)
+        if at >= duration:
+            break
+        temperature = f"{rng.uniform(15, 30):.1f}"
+        schedule.append(
+            (
+                at,
+                "state",
+                rng.choice(climates),
+                "_async_temp_sensor_changed",
+                (temperature,),
+                {},
+            )
+        )
+    schedule.sort(key=lambda item: item[0])
+    return schedule
+
+
+def state_event(state, old_state=None):
+    """Return a state changed event of a sensor."""
+
+    def sensor_state(state):
+        if state is None:
+            return None
+        return SimpleNamespace(state=state, attributes={})
+
+    return SimpleNamespace(
+        data={"old_state": sensor_state(old_state), "new_state": sensor_state(state)}
+    )
+
+
+def percentiles(values, scale=1000.0):
+    """Return p50/p95/p99/max of the values, in ms for values in seconds."""
+    if not values:
+        return None
+    values = sorted(values)
+
+    def at(percent):
+        return round(
+            values[min(len(values) - 1, int(len(values) * percent))] * scale, 3
+        )
+
+    return {
+        "count": len(values),
+        "p50": at(0.5),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(values[-1] * scale, 3),
+    }
+
+
+async def async_run(hass, entities, schedule, speed=1.0):
+    """Feed the schedule to the entities, speed > 1 accelerates it.
+
+    Return the latencies of the calls per platform, the failed calls and
+    the event loop lag samples.
+    """
+    loop = asyncio.get_running_loop()
+    latencies = {}
+    failures = []
+    lags = []
+    running = True
+
+    async def probe():
+        while running:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            lags.append(loop.time() - start - LAG_INTERVAL)
+
+    async def call(kind, entity, name, args, kwargs):
+        start = loop.time()
+        try:
+            if kind == "state":
+                await getattr(entity, name)(state_event(*args))
+            else:
+                await getattr(entity, name)(*args, **kwargs)
+        except Exception as e:
+            failures.append((entity.entity_id, name, str(e) or type(e).__name__))
+            return
+        platform = entity.entity_id.split(".")[0]
+        latencies.setdefault(f"{kind}.{platform}", []).append(loop.time() - start)
+
+    probe_task = loop.create_task(probe())
+    tasks = []
+    start = loop.time()
+    for at, kind, entity_id, name, args, kwargs in schedule:
+        delay = start + at / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        entity = entities.get(entity_id)
+        if entity is None:
+            failures.append((entity_id, name, "unknown entity"))
+            continue
+        tasks.append(loop.create_task(call(kind, entity, name, args, kwargs)))
+    await asyncio.gather(*tasks)
+    # optimistic entities transmit in background tasks
+    while sends := [
+        task for entity in entities.values() for task in entity._send_tasks
+    ]:
+        await asyncio.gather(*sends, return_exceptions=True)
+    running = False
+    await probe_task
+    return latencies, failures, lags
+
+
+def report(hass, entities, schedule, latencies, failures, lags, elapsed):
+    sends = hass.services.calls
+    platforms = {}
+    for entity_id in entities:
+        platform = entity_id.split(".")[0]
+        platforms[platform] = platforms.get(platform, 0) + 1
+    return {
+        "entities": platforms,
+        "blasters": len(async_get_blaster_queues(hass)),
+        "scheduled": len(schedule),
+        "completed": sum(len(values) for values in latencies.values()),
+        "failed": len(failures),
+        "failures": failures[:20],
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(
+            sum(len(values) for values in latencies.values()) / elapsed, 2
+        ),
+        "sends": len(sends),
+        "sends_per_s": round(len(sends) / elapsed, 2),
+        "state_writes": hass.state_writes,
+        "latency_ms": {
+            name: percentiles(values) for name, values in sorted(latencies.items())
+        },
+        "loop_lag_ms": percentiles(lags),
+        "blaster_drops": sum(
+            queue.stats()["dropped"]
+            for queue in async_get_blaster_queues(hass).values()
+        ),
+        # kilobytes on Linux
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+async def async_main(options):
+    rng = random.Random(options["seed"])
+    if options["tracemalloc"]:
+        tracemalloc.start()
+    if options["detect_blocking"] is not None:
+        blocking.BLOCKING_THRESHOLD = options["detect_blocking"] / 1000
+        logging.getLogger(f"{TRACE_LOGGER}.{TRACE_BLOCKING}").setLevel(logging.DEBUG)
+    hass = StandInHass(options["service_latency"])
+
+    start = time.perf_counter()
+    entities = await async_create_entities(
+        hass, options["entities"], options["blasters"], rng, options["delay"]
+    )
+    startup = time.perf_counter() - start
+
+    schedule = random_schedule(
+        entities, rng, options["duration"], options["rate"], options["storm"]
+    )
+    start = time.perf_counter()
+    latencies, failures, lags = await async_run(hass, entities, schedule)
+    elapsed = time.perf_counter() - start
+
+    result = report(hass, entities, schedule, latencies, failures, lags, elapsed)
+    result["startup_s"] = round(startup, 3)
+    if options["detect_blocking"] is not None:
+        result["blocking"] = blocking.blocking_reports()
+    if options["tracemalloc"]:
+        current, peak = tracemalloc.get_traced_memory()
+        result["python_memory_mb"] = {
+            "current": round(current / 2**20, 1),
+            "peak": round(peak / 2**20, 1),
+        }
+    return result
+
+
+def main():
+    args = sys.argv[1:]
+    options = {
+        "entities": 300,
+        "blasters": 30,
+        "duration": 60.0,
+        "rate": 20.0,
+        "storm": 50.0,
+        "delay": None,
+        "service_latency": 0.02,
+        "seed": 0,
+        "tracemalloc": False,
+        "detect_blocking": None,
+        "output": None,
+    }
+    while args:
+        option = args.pop(0)
+        if option in ("--entities", "--blasters", "--seed"):
+            options[option[2:]] = int(args.pop(0))
+        elif option in ("--duration", "--rate", "--storm", "--delay"):
+            options[option[2:]] = float(args.pop(0))
+        elif option == "--service-latency":
+            options["service_latency"] = float(args.pop(0))
+        elif option == "--tracemalloc":
+            options["tracemalloc"] = True
+        elif option == "--detect-blocking":
+            options["detect_blocking"] = float(args.pop(0))
+        elif option == "--output":
+            options["output"] = args.pop(0)
+        else:
+            print(USAGE)
+            sys.exit(1)
+
+    result = asyncio.run(async_main(options))
+    print(json.dumps(result, indent=2))
+    if options["output"]:
+        with open(options["output"], "w") as file:
+            json.dump(result, file, indent=2)
+    # fails like a test when a SmartIR path blocked the event loop
+    if result.get("blocking"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
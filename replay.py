@@ -0,0 +1,205 @@
+import asyncio
+import bisect
+import json
+import sys
+
+from custom_components.smartir.traffic import (
+    EVENT_CALL,
+    EVENT_SEND,
+    TrafficRecording,
+    entity_states,
+    read_trace,
+)
+from loadtest import StandInHass, async_create_entity, async_run, percentiles, report
+
+USAGE = (
+    "usage: replay.py TRACE [--speed X] [--service-latency S] [--output FILE] "
+    "[--compare FILE] [--threshold PCT]"
+)
+
+# results compared against a previous replay, lower is better
+COMPARED = ("sends", "end_to_end_p50", "end_to_end_p95", "states_differ")
+
+
+def end_to_end(events):
+    """Return the time from every call to the next send of its entity."""
+    sends = {}
+    for at, kind, entity_id, *_ in events:
+        if kind == EVENT_SEND:
+            sends.setdefault(entity_id, []).append(at)
+    latencies = []
+    for at, kind, entity_id, *_ in events:
+        if kind != EVENT_CALL or entity_id not in sends:
+            continue
+        times = sends[entity_id]
+        index = bisect.bisect_left(times, at)
+        if index < len(times):
+            latencies.append(times[index] - at)
+    return latencies
+
+
+def send_counts(events):
+    counts = {}
+    for _, kind, entity_id, *_ in events:
+        if kind == EVENT_SEND:
+            counts[entity_id] = counts.get(entity_id, 0) + 1
+    return counts
+
+
+def state_differences(recorded, replayed):
+    """Return the attributes of every entity differing at the end."""
+    # compare as written to the trace
+    replayed = json.loads(json.dumps(replayed, default=str))
+    differences = {}
+    for entity_id, states in replayed.items():
+        expected = recorded.get(entity_id, {})
+        differ = {
+            attr: [expected.get(attr), value]
+            for attr, value in states.items()
+            if expected.get(attr) != value
+        }
+        if differ:
+            differences[entity_id] = differ
+    return differences
+
+
+async def async_replay(path, speed, service_latency):
+    """Replay the trace on the stand-in, return the report."""
+    header, events, footer = read_trace(path)
+    hass = StandInHass(service_latency)
+
+    blasters = {}
+    entities = {}
+    missing = []
+    for entity_id, setup in header["entities"].items():
+        blaster = blasters.setdefault(setup["blaster"], len(blasters))
+        entity = await async_create_entity(
+            hass,
+            setup["platform"],
+            entity_id,
+            setup["device_code"],
+            blaster,
+            None if setup["airtime_delay"] else setup["delay"],
+        )
+        if entity is None:
+            missing.append(entity_id)
+            continue
+        entity._delay = setup["delay"]
+        for attr, value in header["states"].get(entity_id, {}).items():
+            setattr(entity, attr, value)
+        entities[entity_id] = entity
+
+    recording = TrafficRecording(hass.loop)
+    for entity in entities.values():
+        recording.attach(entity)
+    schedule = [event for event in events if event[1] != EVENT_SEND]
+    start = hass.loop.time()
+    latencies, failures, lags = await async_run(hass, entities, schedule, speed)
+    elapsed = hass.loop.time() - start
+
+    # in real time, without the sends after the end of the recording
+    end = header["duration"] / speed
+    replayed = [[at / speed, *event] for at, *event in schedule] + [
+        event for event in recording.events if event[0] <= end
+    ]
+    replayed.sort(key=lambda event: event[0])
+    recorded_sends = send_counts(events)
+    replayed_sends = send_counts(replayed)
+    differences = state_differences(footer.get("states", {}), entity_states(entities))
+    recorded_latency = percentiles(end_to_end(events))
+    replayed_latency = percentiles(end_to_end(replayed))
+
+    result = report(hass, entities, schedule, latencies, failures, lags, elapsed)
+    result["trace"] = {
+        "path": path,
+        "started": header.get("started"),
+        "speed": speed,
+        "duration": header["duration"],
+        "entities": len(header["entities"]),
+        "missing": missing,
+        "sends_recorded": sum(recorded_sends.values()),
+        "sends_replayed": sum(replayed_sends.values()),
+        "sends_differ": {
+            entity_id: [recorded_sends.get(entity_id), replayed_sends.get(entity_id)]
+            for entity_id in sorted(set(recorded_sends) | set(replayed_sends))
+            if recorded_sends.get(entity_id) != replayed_sends.get(entity_id)
+        },
+        "end_to_end_ms": {"recorded": recorded_latency, "replayed": replayed_latency},
+        "states_differ": len(differences),
+        "state_differences": differences,
+    }
+    result["compared"] = {
+        "sends": sum(replayed_sends.values()),
+        "end_to_end_p50": replayed_latency and replayed_latency["p50"],
+        "end_to_end_p95": replayed_latency and replayed_latency["p95"],
+        "states_differ": len(differences),
+    }
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Print the change of every result against the baseline replay.
+
+    Return the results higher than the threshold percentage.
+    """
+    regressions = []
+    for name in COMPARED:
+        value = results.get(name)
+        previous = baseline.get(name)
+        if value is None or previous is None:
+            print("%-20s %12s (not compared)" % (name, value))
+            continue
+        change = (value / previous - 1) * 100 if previous else (value and 100.0)
+        flag = ""
+        if change > threshold:
+            flag = " REGRESSION"
+            regressions.append(name)
+        print("%-20s %12.3f %+7.1f %%%s" % (name, value, change, flag))
+    return regressions
+
+
+def main():
+    args = sys.argv[1:]
+    path = None
+    speed = 1.0
+    service_latency = 0.02
+    output = None
+    baseline = None
+    threshold = 10.0
+    while args:
+        option = args.pop(0)
+        if option == "--speed":
+            speed = float(args.pop(0))
+        elif option == "--service-latency":
+            service_latency = float(args.pop(0))
+        elif option == "--output":
+            output = args.pop(0)
+        elif option == "--compare":
+            baseline = args.pop(0)
+        elif option == "--threshold":
+            threshold = float(args.pop(0))
+        elif path is None and not option.startswith("--"):
+            path = option
+        else:
+            print(USAGE)
+            sys.exit(1)
+    if path is None:
+        print(USAGE)
+        sys.exit(1)
+
+    result = asyncio.run(async_replay(path, speed, service_latency))
+    print(json.dumps(result, indent=2, default=str))
+    if output:
+        with open(output, "w") as file:
+            json.dump(result, file, indent=2, default=str)
+
+    if baseline:
+        with open(baseline) as file:
+            previous = json.load(file)
+        print("compared to %s" % baseline)
+        if compare(result["compared"], previous["compared"], threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import importlib.util
+import json
+import random
+import sys
+
+# load the planner module directly, so Home Assistant is not required
+spec = importlib.util.spec_from_file_location(
+    "light_planner", "custom_components/smartir/light_planner.py"
+)
+light_planner = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(light_planner)
+
+USAGE = (
+    "usage: simulate_light_planner.py [--targets N] [--seed S] [--absolute N] FILE..."
+)
+
+
+def legacy_frames(count, absolute, current, target):
+    """Return frames sent by the previous step logic for a level change."""
+    if target in absolute:
+        return 1
+    # a step run to either end was always sent over the full range
+    if target in (0, count - 1):
+        return count
+    return abs(target - current)
+
+
+def simulate(levels, targets, absolute, rng):
+    count = len(levels)
+    planner = light_planner.LevelPlanner(count, absolute)
+    current = count - 1
+    planner.reset(current)
+    legacy = 0
+    planned = 0
+    resyncs = 0
+    for _ in range(targets):
+        target = rng.randrange(count)
+        if target != current:
+            legacy += legacy_frames(count, absolute, current, target)
+        known = planner.known
+        plan = planner.plan(target)
+        if not known:
+            resyncs += 1
+        for action in plan:
+            planner.apply(action)
+        planned += len(plan)
+        current = target
+    return legacy, planned, resyncs
+
+
+def main():
+    args = sys.argv[1:]
+    targets = 1000
+    seed = 0
+    absolute_every = 0
+    while args and args[0].startswith("--"):
+        option = args.pop(0)
+        if option == "--targets":
+            targets = int(args.pop(0))
+        elif option == "--seed":
+            seed = int(args.pop(0))
+        elif option == "--absolute":
+            absolute_every = int(args.pop(0))
+        else:
+            print(USAGE)
+            sys.exit(1)
+    if not args:
+        print(USAGE)
+        sys.exit(1)
+
+    totals = [0, 0, 0]
+    for file_path in args:
+        with open(file_path) as file:
+            device_data = json.load(file)
+        for attr in ["brightness", "colorTemperature"]:
+            levels = device_data.get(attr)
+            if not isinstance(levels, list) or len(levels) < 2:
+                continue
+            absolute = set()
+            if absolute_every:
+                absolute = set(range(0, len(levels), absolute_every))
+            rng = random.Random(f"{seed}:{file_path}:{attr}")
+            legacy, planned, resyncs = simulate(levels, targets, absolute, rng)
+            print(
+                "%s %-16s levels %2d: legacy %6d frames, planner %6d frames, %d resyncs"
+                % (file_path, attr, len(levels), legacy, planned, resyncs)
+            )
+            totals[0] += legacy
+            totals[1] += planned
+            totals[2] += resyncs
+
+    if totals[0]:
+        print(
+            "total: legacy %d frames, planner %d frames (%.2f), %d resyncs"
+            % (totals[0], totals[1], totals[1] / totals[0], totals[2])
+        )
+
+
+main()
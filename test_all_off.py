@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from homeassistant.const import STATE_OFF, STATE_ON
+
+from custom_components.smartir.services import async_all_off
+from loadtest import StandInHass, async_create_entity
+
+DELAY = 0.2
+
+
+def _record_calls(hass):
+    calls = []
+
+    async def _async_call(domain, service, service_data, *args, **kwargs):
+        calls.append((hass.loop.time(), service_data))
+
+    hass.services.async_call = _async_call
+    return calls
+
+
+def test_all_off_preempts_step_plan():
+    async def _async_test():
+        hass = StandInHass()
+        light = await async_create_entity(hass, "light", "light.test", 1000, 0, DELAY)
+        calls = _record_calls(hass)
+
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 26})
+        assert light.brightness == 26
+        # a 9 step sequence, DELAY each
+        turn_on = asyncio.create_task(light.async_turn_on(**{ATTR_BRIGHTNESS: 255}))
+        await asyncio.sleep(DELAY * 1.5)
+        assert light._step_task is not None
+
+        start = hass.loop.time()
+        stats = await async_all_off(hass)
+        # the frame in flight and the off frame
+        assert hass.loop.time() - start < DELAY * 2.5
+        assert stats["sent"] == 1
+        assert light.state == STATE_OFF
+        assert 26 < light.brightness < 255
+
+        await turn_on
+        assert light.state == STATE_OFF
+        assert calls[-1][1]["command"] == [
+            "b64:" + frame for frame in light._commands["off"]
+        ]
+
+    asyncio.run(_async_test())
+
+
+async def _async_create_entities(hass, controller_data):
+    entities = []
+    for index, data in enumerate(controller_data):
+        entity = await async_create_entity(
+            hass, "media_player", f"media_player.test_{index}", 1000, 0, DELAY * index
+        )
+        entity._controller._controller_data.update(data)
+        entity._state = STATE_ON
+        entities.append(entity)
+    return entities
+
+
+def test_all_off_batches_same_controller_data():
+    async def _async_test():
+        hass = StandInHass()
+        await _async_create_entities(hass, [{"num_repeats": 2}] * 3)
+        calls = _record_calls(hass)
+
+        start = hass.loop.time()
+        stats = await async_all_off(hass)
+        assert stats["sent"] == 3
+        assert stats["service_calls"] == 1
+        ((_, service_data),) = calls
+        assert len(service_data["command"]) == 3
+        assert service_data["num_repeats"] == 2
+        # the longest delay of the batch
+        assert hass.loop.time() - start >= DELAY * 2
+
+    asyncio.run(_async_test())
+
+
+def test_all_off_keeps_controller_data():
+    async def _async_test():
+        hass = StandInHass()
+        entities = await _async_create_entities(
+            hass, [{"num_repeats": 2}, {"num_repeats": 3, "delay_secs": 0.5}, {}]
+        )
+        calls = _record_calls(hass)
+
+        stats = await async_all_off(hass)
+        assert stats["sent"] == 3
+        assert stats["service_calls"] == 3
+        assert {
+            (data.get("num_repeats"), data.get("delay_secs")) for _, data in calls
+        } == {(2, None), (3, 0.5), (None, None)}
+        assert all(entity.state == STATE_OFF for entity in entities)
+
+    asyncio.run(_async_test())
@@ -0,0 +1,92 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("homeassistant")
+pytest.importorskip("pytest_benchmark")
+
+from benchmark import (
+    bench_load_validate,
+    climate_requests,
+    closest_match_inputs,
+    codec_inputs,
+    controller_cases,
+    resolve,
+    send,
+)
+from custom_components.smartir.controller import Helper
+from custom_components.smartir.smartir_helpers import (
+    closest_match_index,
+    closest_match_value,
+)
+
+SEED = 0
+
+CORPUS = bench_load_validate({}, 1)
+
+CONTROLLER_CASES = {name: case for name, *case in controller_cases(CORPUS)}
+
+
+@pytest.fixture
+def corpus():
+    return CORPUS
+
+
+@pytest.fixture
+def rng():
+    return random.Random(SEED)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def codecs():
+    return codec_inputs(CORPUS, random.Random(SEED))
+
+
+def test_load_validate(benchmark):
+    corpus = benchmark.pedantic(bench_load_validate, args=({}, 1), rounds=3)
+    assert corpus["climate"]
+
+
+def test_climate_resolve(benchmark, corpus, rng, loop):
+    requests = climate_requests(corpus, rng, 50)
+    benchmark(lambda: loop.run_until_complete(resolve(requests)))
+
+
+@pytest.mark.parametrize("function", [closest_match_value, closest_match_index])
+def test_closest_match(benchmark, rng, function):
+    values, targets = closest_match_inputs(rng)
+    benchmark(lambda: [function(target, values) for target in targets])
+
+
+def test_pronto2lirc(benchmark, codecs):
+    pronto, _, _ = codecs
+    benchmark(lambda: [Helper.pronto2lirc(frame) for frame in pronto])
+
+
+def test_broadlink2lirc(benchmark, codecs):
+    _, broadlink, _ = codecs
+    benchmark(lambda: [Helper.broadlink2lirc(packet) for packet in broadlink])
+
+
+def test_lirc2broadlink(benchmark, codecs):
+    _, _, pulses = codecs
+    benchmark(lambda: [Helper.lirc2broadlink(frame) for frame in pulses])
+
+
+def test_normalize_broadlink(benchmark, codecs):
+    _, broadlink, _ = codecs
+    benchmark(lambda: [Helper.normalize_broadlink(packet) for packet in broadlink])
+
+
+@pytest.mark.parametrize("name", CONTROLLER_CASES)
+def test_controller_send(benchmark, loop, name):
+    controller, commands = CONTROLLER_CASES[name]
+    benchmark(lambda: loop.run_until_complete(send(controller, commands)))
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.smartir import blocking
+from custom_components.smartir.tracing import BLOCKING
+
+
+@blocking.detect_blocking
+async def _blocking_entry_point(seconds):
+    await asyncio.sleep(0)
+    time.sleep(seconds)
+
+
+def test_trace_enabled():
+    # enabled by the fail_on_blocking fixture of conftest.py
+    assert BLOCKING.enabled
+
+
+def test_block_reported():
+    asyncio.run(_blocking_entry_point(blocking.BLOCKING_THRESHOLD * 2))
+    reports = blocking.blocking_reports()
+    # checked, don't fail this test in the fixture
+    blocking._REPORTS.clear()
+    assert [report["function"] for report in reports] == ["_blocking_entry_point"]
+    assert reports[0]["duration_ms"] > blocking.BLOCKING_THRESHOLD * 1000
+    assert "_blocking_entry_point" in reports[0]["stack"]
+
+
+def test_short_step_not_reported():
+    asyncio.run(_blocking_entry_point(0))
+    assert blocking.blocking_reports() == []
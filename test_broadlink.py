@@ -0,0 +1,196 @@
+import asyncio
+import binascii
+from base64 import b64decode
+import glob
+import json
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.smartir.controller import Helper, get_controller
+
+# 'off' of codes/media_player/1000.json, the trailer counted in the length
+BASE64 = "JgAaAB0dOx4cHhweHR4cHhw8HR0dHhweOzsdAA0FAAAAAAAAAAAAAAAAAAA="
+HEX = binascii.hexlify(b64decode(BASE64)).decode()
+# 'off' of codes/media_player/9999.json
+PRONTO = (
+    "0000 006D 0022 0002 0155 00AA 0016 003F 0016 0015 0016 003F 0016 003F "
+    "0016 003F 0016 003F 0016 003F 0016 0015 0016 0015 0016 003F 0016 0014 "
+    "0016 0015 0016 0015 0016 0015 0016 0015 0016 003F 0016 0015 0016 0015 "
+    "0016 0015 0016 0015 0016 003F 0016 0015 0016 0015 0016 003F 0016 003F "
+    "0016 003F 0016 003F 0016 003F 0016 0015 0016 003F 0016 003F 0016 0014 "
+    "0016 05E8 0155 0055 0016 0E3C"
+)
+
+ENCODINGS = {
+    "Base64": (BASE64, b64decode(BASE64)),
+    "Hex": (HEX, b64decode(BASE64)),
+    "Pronto": (
+        PRONTO,
+        Helper.lirc2broadlink(
+            Helper.pronto2lirc(bytearray.fromhex(PRONTO.replace(" ", "")))
+        ),
+    ),
+}
+
+
+def _length(packet):
+    return struct.unpack("<H", packet[2:4])[0]
+
+
+def _trailer(packet):
+    """Return the 0x0d05 trailer position, counted in the length or after."""
+    length = _length(packet)
+    for end in (4 + length, 6 + length):
+        if packet[end - 2 : end] == b"\x0d\x05":
+            return end - 2
+    return None
+
+
+def _send(encoding, command, **controller_data):
+    calls = []
+
+    async def _async_call(domain, service, service_data):
+        calls.append(service_data)
+
+    hass = SimpleNamespace(services=SimpleNamespace(async_call=_async_call))
+    controller = get_controller(
+        hass,
+        "Broadlink",
+        encoding,
+        {"controller_type": "Broadlink", "remote_entity": "remote.test"}
+        | controller_data,
+    )
+    asyncio.run(controller.send(command))
+    (service_data,) = calls
+    packets = [b64decode(_command[4:]) for _command in service_data["command"]]
+    return packets, service_data
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_packet_repeats_folded(encoding):
+    command, packet = ENCODINGS[encoding]
+    assert _trailer(packet) is not None
+
+    (sent,), service_data = _send(encoding, command, num_repeats=3, packet_repeats=True)
+    assert "num_repeats" not in service_data
+    assert sent[0] == 0x26
+    assert sent[1] == (packet[1] + 1) * 3 - 1
+    # the little-endian length, the pulses and the trailer are kept
+    assert sent[2:4] == struct.pack("<H", _length(packet))
+    assert sent[2:] == packet[2:]
+    assert _trailer(sent) == _trailer(packet)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_repeats_not_folded(encoding):
+    command, packet = ENCODINGS[encoding]
+
+    (sent,), service_data = _send(encoding, command, num_repeats=3)
+    assert service_data["num_repeats"] == 3
+    assert sent == packet
+
+    # a sequence is repeated by the service as a whole
+    sent, service_data = _send(
+        encoding, [command, command], num_repeats=3, packet_repeats=True
+    )
+    assert service_data["num_repeats"] == 3
+    assert sent == [packet, packet]
+
+
+def test_repeat_byte_capped():
+    packet = b64decode(BASE64)
+    assert Helper.broadlink_repeat(packet, 1) == packet
+    assert Helper.broadlink_repeat(packet, 256)[1] == 255
+
+    repeated = bytearray(packet)
+    repeated[1] = 99
+    assert Helper.broadlink_repeat(repeated, 2)[1] == 199
+    assert Helper.broadlink_repeat(repeated, 3)[1] == 255
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_folded_airtime(encoding):
+    command, _ = ENCODINGS[encoding]
+    data = {"controller_type": "Broadlink", "num_repeats": 3}
+    folded = get_controller(
+        None, "Broadlink", encoding, data | {"packet_repeats": True}
+    )
+    repeated = get_controller(None, "Broadlink", encoding, data)
+    assert folded._pulses(command) == repeated._pulses(command)
+
+
+def _broadlink_files():
+    for path in sorted(glob.glob("codes/*/*.json")):
+        with open(path) as file:
+            device_data = json.load(file)
+        if device_data.get("supportedController") == "Broadlink" and device_data.get(
+            "commandsEncoding"
+        ) in ("Base64", "Hex"):
+            yield path
+
+
+def _packets(device_data):
+    def commands(node):
+        if isinstance(node, dict):
+            for value in node.values():
+                yield from commands(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from commands(value)
+        elif isinstance(node, str):
+            yield node
+
+    for command in commands(device_data.get("commands", {})):
+        try:
+            if device_data["commandsEncoding"] == "Hex":
+                yield binascii.unhexlify(command)
+            else:
+                yield b64decode(command, validate=True)
+        except (binascii.Error, ValueError):
+            continue
+
+
+# packets shared by device files are checked once
+_CHECKED = set()
+
+
+@pytest.mark.parametrize("path", list(_broadlink_files()))
+def test_normalize_round_trip(path):
+    with open(path) as file:
+        device_data = json.load(file)
+    for packet in set(_packets(device_data)) - _CHECKED:
+        _CHECKED.add(packet)
+        normalized = Helper.normalize_broadlink(packet)
+        if packet[:1] != b"\x26":
+            # RF and other packets aren't decoded
+            assert normalized == packet
+            continue
+        if _trailer(packet) is not None:
+            assert _trailer(normalized) is not None
+        assert Helper.normalize_broadlink(normalized) == normalized
+        if normalized == packet:
+            continue
+
+        # the same pulses are transmitted, up to a shorter trailing gap
+        before = Helper.broadlink2units(packet) * (packet[1] + 1)
+        after = Helper.broadlink2units(normalized) * (normalized[1] + 1)
+        assert after[:-1] == before[:-1]
+        assert after[-1] <= before[-1]
+        # re-encoding the decoded packet gives the same bytes
+        assert (
+            Helper.units2broadlink(Helper.broadlink2units(normalized), normalized[1])
+            == normalized
+        )
+
+
+def test_units2broadlink_trailer():
+    pulses = [0x100, 0x80, 0x20, 0x1000]
+    packet = Helper.units2broadlink(pulses, 2)
+    assert packet[:4] == bytes([0x26, 2]) + struct.pack("<H", 8)
+    assert _trailer(packet) == 12
+    assert (len(packet) + 4) % 16 == 0
+    assert Helper.broadlink2units(packet) == pulses
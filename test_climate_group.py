@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.components.climate import HVACMode
+from homeassistant.const import STATE_ON
+from homeassistant.core import Context
+
+from custom_components.smartir.blaster_queue import (
+    PRIORITY_AUTOMATION,
+    PRIORITY_INTERACTIVE,
+)
+from custom_components.smartir.climate_group import SmartIRClimateGroup
+from loadtest import StandInHass, async_create_entity
+
+MEMBERS = ["climate.bedroom", "climate.office", "climate.kitchen"]
+
+
+async def _async_group():
+    hass = StandInHass()
+    members = [
+        # two members share a blaster
+        await async_create_entity(hass, "climate", entity_id, 1000, blaster, 0)
+        for entity_id, blaster in zip(MEMBERS, [0, 1, 1])
+    ]
+    group = SmartIRClimateGroup(
+        hass, {"name": "Ground floor", "unique_id": "ground", "members": MEMBERS}
+    )
+    group.entity_id = "climate.ground_floor"
+    group.async_write_ha_state = lambda: None
+    return hass, group, members
+
+
+def test_dispatch_in_group_context():
+    async def _async_test():
+        hass, group, members = await _async_group()
+        automation = Context()
+        for member in members:
+            member.async_set_context(automation)
+            assert member._send_priority(STATE_ON) == PRIORITY_AUTOMATION
+
+        user = Context(user_id="user")
+        group.async_set_context(user)
+        mode = next(mode for mode in group.hvac_modes if mode != HVACMode.OFF)
+        await group.async_set_hvac_mode(mode)
+        assert group.extra_state_attributes["last_dispatch"]["completed"] == 3
+        for member in members:
+            assert member.hvac_mode == mode
+            assert member._context is user
+            assert member._send_priority(STATE_ON) == PRIORITY_INTERACTIVE
+
+    asyncio.run(_async_test())
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.const import STATE_ON, UnitOfTemperature
+
+from custom_components.smartir.climate import SmartIRClimate, temperature_grid
+from loadtest import StandInHass, controller_data
+
+
+def _device_data(precision, temperatures):
+    return {
+        "manufacturer": "Test",
+        "supportedModels": ["Celsius"],
+        "supportedController": "Broadlink",
+        "commandsEncoding": "Base64",
+        "temperatureUnit": "C",
+        "precision": precision,
+        "minTemperature": temperatures[0],
+        "maxTemperature": temperatures[-1],
+        "operationModes": ["cool"],
+        "commands": {
+            "off": "off",
+            "cool": {str(t): f"cool_{t}" for t in temperatures},
+        },
+    }
+
+
+async def _async_climate(device_data):
+    hass = StandInHass()
+    hass.config.units.temperature_unit = UnitOfTemperature.FAHRENHEIT
+    config = {
+        "name": "climate.test",
+        "unique_id": "climate.test",
+        "device_code": 0,
+        "delay": 0,
+        "controller_data": controller_data("Broadlink", 0),
+    }
+    climate = SmartIRClimate(hass, config, device_data)
+    climate.entity_id = "climate.test"
+    climate.async_write_ha_state = lambda: None
+    climate._hvac_mode = "cool"
+    climate.sent = []
+
+    async def _async_transmit(command, state=STATE_ON):
+        climate.sent.append(command)
+
+    climate._async_transmit = _async_transmit
+    return climate
+
+
+def _climate(device_data):
+    return asyncio.run(_async_climate(device_data))
+
+
+def _sent(climate, temperature):
+    async def _async_send():
+        climate.sent.clear()
+        assert await climate._send_command(
+            STATE_ON, "cool", None, None, None, temperature
+        )
+        return climate.sent[-1], climate.target_temperature
+
+    return asyncio.run(_async_send())
+
+
+WHOLE = _device_data(1, list(range(16, 31)))
+HALVES = _device_data(0.5, [t / 2 for t in range(32, 61)])
+
+
+def test_grid_rounding():
+    # 16 C is 60.8 F, 30 C is 86 F, whole Celsius degrees are sent in
+    # 2 F steps
+    climate = _climate(WHOLE)
+    assert climate.target_temperature_step == 2
+    assert climate.min_temp == 60
+    assert climate.max_temp == 86
+    assert climate._temp_grid == tuple(range(60, 87, 2))
+
+    climate = _climate(HALVES)
+    assert climate.target_temperature_step == 1
+    assert climate.min_temp == 61
+    assert climate.max_temp == 86
+    assert climate._temp_grid == tuple(range(61, 87))
+
+
+def test_grid_without_float_drift():
+    grid = temperature_grid(60.5, 70.5, 0.1)
+    assert len(grid) == 101
+    assert grid[-1] == 70.5
+    assert all(round(value, 1) == value for value in grid)
+
+
+def test_table_lookup():
+    climate = _climate(WHOLE)
+    (table,) = climate._temp_tables.values()
+    # 72 F is 22.2 C, sent as 22 C shown as 71.6 F on the 2 F grid
+    assert table[72] == ("22", 72)
+    assert table[68] == ("20", 68)
+
+    climate = _climate(HALVES)
+    (table,) = climate._temp_tables.values()
+    # 70 F is 21.1 C, 71 F is 21.7 C
+    assert table[70] == ("21.0", 70)
+    assert table[71] == ("21.5", 71)
+
+
+def test_fractional_setpoints():
+    climate = _climate(WHOLE)
+    # between the 2 F grid steps, rounded to the grid first
+    assert _sent(climate, 71.2) == ("cool_22", 72)
+    assert _sent(climate, 68.9) == ("cool_20", 68)
+
+    climate = _climate(HALVES)
+    assert _sent(climate, 70.4) == ("cool_21.0", 70)
+    assert _sent(climate, 70.6) == ("cool_21.5", 71)
+
+
+def test_min_max_edges():
+    climate = _climate(WHOLE)
+    # the grid starts below 16 C, the closest command is sent
+    assert _sent(climate, climate.min_temp) == ("cool_16", 60)
+    assert _sent(climate, climate.max_temp) == ("cool_30", 86)
+
+    climate = _climate(HALVES)
+    assert _sent(climate, climate.min_temp) == ("cool_16.0", 61)
+    assert _sent(climate, climate.max_temp) == ("cool_30.0", 86)
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+import voluptuous as vol
+import voluptuous_serialize
+import yaml
+
+from homeassistant.data_entry_flow import FlowResultType
+import homeassistant.helpers.config_validation as cv
+
+from custom_components.smartir import _entry_platforms
+from custom_components.smartir.config_flow import ConfigFlow
+from custom_components.smartir.smartir_entity import (
+    DEFAULT_AIRTIME_GUARD,
+    DEFAULT_FORCE_REFRESH_INTERVAL,
+    entry_config,
+)
+
+TRANSLATIONS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "custom_components",
+    "smartir",
+    "translations",
+)
+
+SERVICES = ["all_off", "profile", "record"]
+
+DEVICE = {
+    "name": "Bedroom",
+    "unique_id": "bedroom",
+    "device_code": 1000,
+    "platform": "climate",
+    "controller_type": "ESPHome",
+    "esphome_service": "bedroom_send_raw_command",
+}
+
+
+class _Services:
+    async def async_services(self):
+        return {"esphome": {"bedroom_send_raw_command": None}}
+
+
+def _flow():
+    flow = ConfigFlow()
+    flow.hass = SimpleNamespace(services=_Services())
+    flow.context = {"source": "user"}
+    return flow
+
+
+def _entry(data, options=None):
+    return SimpleNamespace(data=data, options=options or {})
+
+
+def _defaults(result):
+    """Return the default of every field of the form."""
+    # the form is sent to the frontend serialized
+    voluptuous_serialize.convert(
+        result["data_schema"], custom_serializer=cv.custom_serializer
+    )
+    return {
+        key.schema: key.default()
+        for key in result["data_schema"].schema
+        if key.default is not vol.UNDEFINED
+    }
+
+
+def test_device_step_asks_options():
+    async def _async_test():
+        flow = _flow()
+        result = await flow.async_step_device(DEVICE)
+        assert result["type"] == FlowResultType.FORM
+        assert result["step_id"] == "optional"
+        defaults = _defaults(result)
+        assert defaults["force_refresh_interval"] == DEFAULT_FORCE_REFRESH_INTERVAL
+        assert defaults["optimistic"] is False
+        assert defaults["airtime_delay"] is True
+        assert defaults["airtime_guard"] == DEFAULT_AIRTIME_GUARD
+        assert defaults["adaptive_delay"] is False
+        assert defaults["normalize_commands"] is False
+        assert defaults["send_metrics"] is False
+
+        result = await flow.async_step_optional(
+            {"power_sensor": "binary_sensor.bedroom", "adaptive_delay": True}
+        )
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert result["title"] == "Bedroom"
+        assert result["data"] == {
+            **DEVICE,
+            "power_sensor": "binary_sensor.bedroom",
+            "adaptive_delay": True,
+        }
+
+    asyncio.run(_async_test())
+
+
+def test_options_flow():
+    async def _async_test():
+        entry = _entry(
+            {**DEVICE, "force_refresh_interval": 60},
+            {"force_refresh_interval": 30, "optimistic": True, "airtime_guard": 0.05},
+        )
+        assert ConfigFlow.async_supports_options_flow(entry)
+        flow = ConfigFlow.async_get_options_flow(entry)
+        result = await flow.async_step_init()
+        assert result["type"] == FlowResultType.FORM
+        # the options override the data of the entry
+        defaults = _defaults(result)
+        assert defaults["force_refresh_interval"] == 30
+        assert defaults["optimistic"] is True
+        # a per device guard
+        assert defaults["airtime_guard"] == 0.05
+
+        result = await flow.async_step_init(
+            {"force_refresh_interval": 0, "normalize_commands": True}
+        )
+        assert result["type"] == FlowResultType.CREATE_ENTRY
+        assert result["data"] == {
+            "force_refresh_interval": 0,
+            "normalize_commands": True,
+        }
+
+    asyncio.run(_async_test())
+
+
+def test_group_without_options():
+    entry = _entry({"name": "Ground floor", "members": ["climate.bedroom"]})
+    assert not ConfigFlow.async_supports_options_flow(entry)
+
+
+def test_entry_config():
+    entry = _entry({**DEVICE, "force_refresh_interval": 60}, {"optimistic": True})
+    assert entry_config(entry) == {
+        **DEVICE,
+        "force_refresh_interval": 60,
+        "optimistic": True,
+    }
+    entry.options["force_refresh_interval"] = 0
+    assert entry_config(entry)["force_refresh_interval"] == 0
+
+
+def test_metrics_platform():
+    entry = _entry(DEVICE)
+    assert _entry_platforms(entry, "climate") == ["climate"]
+    # enabled in the options flow
+    entry.options["send_metrics"] = True
+    assert _entry_platforms(entry, "climate") == ["climate", "sensor"]
+
+
+@pytest.mark.parametrize("language", ["en", "fr"])
+def test_forms_translated(language):
+    with open(os.path.join(TRANSLATIONS, f"{language}.json")) as file:
+        translations = json.load(file)
+
+    async def _async_forms():
+        flow = _flow()
+        menu = await flow.async_step_user()
+        forms = [
+            ("config", await flow.async_step_device()),
+            ("config", await flow.async_step_group()),
+        ]
+        await flow.async_step_device(DEVICE)
+        forms.append(("config", await flow.async_step_optional()))
+        options = ConfigFlow.async_get_options_flow(_entry(DEVICE))
+        forms.append(("options", await options.async_step_init()))
+        return menu, forms
+
+    menu, forms = asyncio.run(_async_forms())
+    step = translations["config"]["step"][menu["step_id"]]
+    assert set(step["menu_options"]) == set(menu["menu_options"])
+    for section, form in forms:
+        step = translations[section]["step"][form["step_id"]]
+        assert step["title"]
+        fields = {key.schema for key in form["data_schema"].schema}
+        assert fields <= set(step["data"]), form["step_id"]
+
+
+@pytest.mark.parametrize("language", ["en", "fr"])
+@pytest.mark.parametrize("service", SERVICES)
+def test_service_translated(language, service):
+    with open(os.path.join(TRANSLATIONS, f"{language}.json")) as file:
+        translations = json.load(file)["services"][service]
+    with open(os.path.join(TRANSLATIONS, os.pardir, "services.yaml")) as file:
+        fields = yaml.safe_load(file)[service]["fields"]
+    assert translations["name"]
+    assert translations["description"]
+    assert set(translations["fields"]) == set(fields)
+    for field in translations["fields"].values():
+        assert field["name"]
+        assert field["description"]
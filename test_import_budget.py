@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+
+def test_import_budget():
+    process = subprocess.run(
+        [sys.executable, "import_budget.py"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    assert process.returncode == 0, process.stdout + process.stderr
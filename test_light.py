@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.components.light import ATTR_BRIGHTNESS
+
+from custom_components.smartir.light_planner import STEP_DOWN, STEP_UP
+from loadtest import StandInHass, async_create_entity
+
+DELAY = 0.2
+
+
+def _record_commands(hass):
+    commands = []
+
+    async def _async_call(domain, service, service_data, *args, **kwargs):
+        commands.append(service_data["command"])
+
+    hass.services.async_call = _async_call
+    return commands
+
+
+def _steps(commands, light, action):
+    frame = ["b64:" + light._brightness_frames[action]]
+    return sum(command == frame for command in commands)
+
+
+def test_turn_on_replans_from_reached_level():
+    async def _async_test():
+        hass = StandInHass()
+        light = await async_create_entity(hass, "light", "light.test", 1000, 0, DELAY)
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 26})
+        commands = _record_commands(hass)
+
+        # a 9 step sequence, DELAY each
+        first = asyncio.create_task(light.async_turn_on(**{ATTR_BRIGHTNESS: 255}))
+        await asyncio.sleep(DELAY * 3.5)
+        assert light._step_task is not None
+
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 77})
+        # the first sequence was cancelled before its end
+        assert first.done()
+        ups = _steps(commands, light, STEP_UP)
+        assert 3 <= ups < 9
+        # stepped back from the level reached, without a resync
+        assert _steps(commands, light, STEP_DOWN) == ups - 2
+        assert len(commands) == 2 * ups - 2
+        assert light.brightness == 77
+        assert light._brightness_planner.window == (2, 2)
+        assert light._step_task is None
+
+    asyncio.run(_async_test())
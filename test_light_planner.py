@@ -0,0 +1,116 @@
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.smartir.light_planner import STEP_DOWN, STEP_UP, LevelPlanner
+
+COUNT = 10
+
+
+def _run(planner, target):
+    plan = planner.plan(target)
+    for action in plan:
+        planner.apply(action)
+    return plan
+
+
+def test_plan_from_known_level():
+    planner = LevelPlanner(COUNT)
+    planner.reset(2)
+    assert _run(planner, 5) == [STEP_UP] * 3
+    assert planner.window == (5, 5)
+    assert _run(planner, 5) == []
+    # an end of the range is stepped to, not resynced over the full range
+    assert _run(planner, 0) == [STEP_DOWN] * 5
+    assert planner.window == (0, 0)
+
+
+def test_plan_from_unknown_level():
+    planner = LevelPlanner(COUNT)
+    assert not planner.known
+    # saturated at the nearer end, then stepped back
+    assert _run(planner, 3) == [STEP_DOWN] * 9 + [STEP_UP] * 3
+    assert planner.window == (3, 3)
+
+    planner.reset()
+    assert _run(planner, COUNT - 1) == [STEP_UP] * 9
+    assert planner.known
+
+
+def test_resync_only_as_far_as_the_window_requires():
+    planner = LevelPlanner(COUNT)
+    planner.window = (3, 5)
+    # 5 steps down collapse the window, not the full range
+    assert _run(planner, 4) == [STEP_DOWN] * 5 + [STEP_UP] * 4
+    assert planner.window == (4, 4)
+
+    planner.window = (6, 8)
+    assert _run(planner, 9) == [STEP_UP] * 3
+
+
+def test_absolute_over_steps():
+    planner = LevelPlanner(COUNT, absolute=[5, 7])
+    planner.reset(0)
+    assert _run(planner, 5) == [5]
+    assert _run(planner, 6) == [STEP_UP]
+
+    # an absolute code resyncs an unknown level
+    planner.reset()
+    assert _run(planner, 8) == [7, STEP_UP]
+    assert planner.window == (8, 8)
+
+
+def test_costly_absolute_code():
+    planner = LevelPlanner(COUNT, absolute=[5], costs={5: 3})
+    planner.reset(3)
+    assert planner.plan(5) == [STEP_UP] * 2
+    planner.reset(0)
+    assert planner.plan(5) == [5]
+
+
+def test_absolute_only():
+    planner = LevelPlanner(COUNT, absolute=[2, 5], stepping=False)
+    planner.reset()
+    assert planner.plan(5) == [5]
+    # no command reaches the level
+    assert planner.plan(4) == []
+
+
+def test_apply_narrows_window():
+    planner = LevelPlanner(COUNT)
+    planner.apply(STEP_DOWN)
+    assert planner.window == (0, 8)
+    planner.apply(STEP_UP)
+    assert planner.window == (1, 9)
+    planner.apply(4)
+    assert planner.window == (4, 4)
+    assert planner.unconfirmed == 0
+
+
+def test_apply_widens_window_after_drift_steps():
+    planner = LevelPlanner(COUNT, drift_steps=3)
+    planner.reset(2)
+    planner.apply(STEP_UP)
+    planner.apply(STEP_UP)
+    assert planner.window == (4, 4)
+    assert planner.unconfirmed == 2
+    planner.apply(STEP_UP)
+    # a frame may have been lost
+    assert planner.window == (4, 6)
+    assert planner.unconfirmed == 0
+
+
+def test_saturation_confirms_level():
+    planner = LevelPlanner(COUNT, drift_steps=3)
+    planner.reset(8)
+    planner.apply(STEP_UP)
+    assert planner.unconfirmed == 1
+    # held at the end of the range, the level is certain
+    planner.apply(STEP_UP)
+    assert planner.window == (9, 9)
+    assert planner.unconfirmed == 0
+
+    planner.window = (0, 1)
+    planner.apply(STEP_DOWN)
+    assert planner.window == (0, 0)
+    assert planner.unconfirmed == 0
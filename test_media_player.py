@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from homeassistant.const import STATE_OFF, STATE_ON
+
+from custom_components.smartir.metrics import SendMetrics
+from loadtest import StandInHass, async_create_entity
+
+
+async def _async_media_player():
+    hass = StandInHass()
+    media_player = await async_create_entity(
+        hass, "media_player", "media_player.test", 1000, 0, 0
+    )
+    media_player._metrics = SendMetrics()
+    return hass, media_player
+
+
+def test_sent_state_recorded():
+    async def _async_test():
+        hass, media_player = await _async_media_player()
+        assert await media_player._async_send_commands((STATE_ON, [["mute"]]))
+        assert media_player.state == STATE_ON
+        assert media_player._sent_state == (STATE_ON, [["mute"]])
+        assert media_player.send_stats()["transmitted"] == 1
+        assert len(hass.services.calls) == 2
+
+        await media_player.async_turn_off()
+        assert media_player.state == STATE_OFF
+        assert media_player._sent_state == (STATE_OFF, [])
+        assert media_player.metrics().sends == 2
+        assert media_player.metrics().failures == 0
+
+    asyncio.run(_async_test())
+
+
+def test_missing_command_fails():
+    async def _async_test():
+        hass, media_player = await _async_media_player()
+        assert not await media_player._async_send_commands(
+            (STATE_ON, [["sources", "Unknown"]])
+        )
+        assert media_player._sent_state is None
+        assert media_player.metrics().failures == 1
+
+        await media_player.async_turn_on()
+        await media_player.async_select_source("Unknown")
+        assert media_player.metrics().sends == 3
+        assert media_player.metrics().failures == 2
+
+    asyncio.run(_async_test())
+
+
+def test_failed_send():
+    async def _async_test():
+        hass, media_player = await _async_media_player()
+
+        async def _async_call(*args, **kwargs):
+            raise ConnectionError("blaster unreachable")
+
+        hass.services.async_call = _async_call
+        assert not await media_player._async_send_commands((STATE_ON, []))
+        assert media_player.state != STATE_ON
+        assert media_player._sent_state is None
+        assert media_player.metrics().failures == 1
+
+    asyncio.run(_async_test())
@@ -0,0 +1,63 @@
+from base64 import b64encode
+import copy
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.smartir.device_data import DeviceData
+from custom_components.smartir.protocol_generator import (
+    ProtocolGenerator,
+    decode_frame,
+    demodulate,
+    fit_generator,
+)
+
+DEVICE_FILE = "codes/climate/2801.json"
+
+
+def _device_data():
+    device_data = DeviceData.from_v2(DeviceData.read_file_as_json(DEVICE_FILE))
+    levels = ["operation"]
+    for level in ["preset", "fan", "swing"]:
+        if isinstance(device_data.get(level + "Modes"), list):
+            levels.append(level)
+    levels.append("temperature")
+    return copy.deepcopy(device_data), levels
+
+
+def _states(commands, path=()):
+    for key, value in commands.items():
+        if isinstance(value, dict):
+            yield from _states(value, path + (key,))
+        elif path:
+            yield path + (key,), value
+
+
+def _set(commands, path, command):
+    for key in path[:-1]:
+        commands = commands[key]
+    commands[path[-1]] = command
+
+
+def test_fit_generates_every_recorded_state():
+    device_data, levels = _device_data()
+    spec = fit_generator(device_data, levels)
+    assert spec is not None
+
+    controller = device_data["supportedController"]
+    generator = ProtocolGenerator(spec, controller)
+    for path, command in _states(device_data["commands"]):
+        segments, _ = demodulate(
+            decode_frame(command, controller, device_data["commandsEncoding"])
+        )
+        recorded = [bit for segment in segments for bit in segment["bits"]]
+        assert generator.bits(path) == recorded
+
+
+def test_fit_rejects_undecodable_frame():
+    device_data, levels = _device_data()
+    path, _ = next(_states(device_data["commands"]))
+    # a Broadlink IR packet without any pulse
+    _set(device_data["commands"], path, b64encode(b"\x26\x00\x00\x00").decode())
+    assert fit_generator(device_data, levels) is None